@@ -3,8 +3,11 @@ Ask Question Endpoint
 Route: POST /ask
 """
 import logging
+from typing import Optional
+from fastapi import Header
 from .base import ask_base
 from .models import QuestionRequest, QuestionResponse
+from app.api.endpoints.health.readiness import not_ready_response
 
 logger = logging.getLogger(__name__)
 
@@ -12,25 +15,36 @@ def register_ask_route(app):
     """Register the POST /ask route"""
     
     @app.post("/ask", response_model=QuestionResponse)
-    async def ask_question(request: QuestionRequest):
+    async def ask_question(request: QuestionRequest, x_debug_profile: Optional[str] = Header(None)):
         """
         Ask a question to the RAG system
+        "profile": true or an X-Debug-Profile: 1 header returns the request's hot functions (when PROFILING_ENABLED)
         """
+        from app.services.qa.startup import startup_manager
+        if not startup_manager.is_ready():
+            return not_ready_response()
+        
         try:
             from app.services.qa.qa_service import qa_service
             
             logger.info(f"Question received: {request.question}")
-            result = qa_service.process_question(request.question)
+            profile = bool(request.profile) or (x_debug_profile or "").lower() in ("1", "true", "yes")
+            result = await qa_service.process_question(request.question, use_cache=request.use_cache, profile=profile)
             
-            if "error" in result:
-                logger.error(f"QA processing error: {result['error']}")
+            # Failures are reported by process_question in success / service_context["error"]
+            if not result.get("success"):
+                logger.error(f"QA processing error: {result.get('service_context', {}).get('error', 'unknown error')}")
                 return QuestionResponse(
                     success=False,
                     question=request.question,
                     answer=result["answer"],
                     sources=result.get("sources", []),
                     timestamp=ask_base.get_current_timestamp(),
-                    service_context=ask_base.get_service_context()
+                    service_context={
+                        **ask_base.get_service_context(),
+                        **result.get("service_context", {}),
+                        "processing_time": result.get("processing_time", "unknown")
+                    }
                 )
             
             # Success response
@@ -42,6 +56,7 @@ def register_ask_route(app):
                 timestamp=ask_base.get_current_timestamp(),
                 service_context={
                     **ask_base.get_service_context(),
+                    **result.get("service_context", {}),
                     "model": result.get("model", "unknown"),
                     "confidence": result.get("confidence", 0.0),
                     "processing_time": result.get("processing_time", "unknown")
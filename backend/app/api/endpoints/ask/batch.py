@@ -0,0 +1,57 @@
+"""
+Batch Ask Endpoints
+Routes: POST /ask/batch, GET /ask/batch/{job_id}
+"""
+import logging
+from fastapi import HTTPException
+from app.core.config import config
+from .models import BatchQuestionRequest, BatchJobResponse
+
+logger = logging.getLogger(__name__)
+
+def register_ask_batch_route(app):
+    """Register the batch question routes"""
+    
+    @app.post("/ask/batch", response_model=BatchJobResponse, status_code=202)
+    async def ask_batch(request: BatchQuestionRequest):
+        """
+        Submit a list of questions; returns a job ID to poll (or results are POSTed to callback_url)
+        """
+        from app.services.qa.batch_jobs import batch_job_manager
+        
+        questions = [question.strip() for question in request.questions if question and question.strip()]
+        if not questions:
+            raise HTTPException(status_code=400, detail="No questions provided")
+        if len(questions) > config.BATCH_MAX_QUESTIONS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Too many questions: {len(questions)} (max {config.BATCH_MAX_QUESTIONS})"
+            )
+        if request.callback_url and not request.callback_url.startswith(("http://", "https://")):
+            raise HTTPException(status_code=400, detail="callback_url must be an http(s) URL")
+        
+        job = batch_job_manager.submit(questions, use_cache=request.use_cache, callback_url=request.callback_url)
+        logger.info(f"Batch of {len(questions)} questions received: job {job['job_id']}")
+        
+        return BatchJobResponse(
+            success=True,
+            status_url=f"/ask/batch/{job['job_id']}",
+            **batch_job_manager.to_response(job, include_results=False)
+        )
+    
+    @app.get("/ask/batch/{job_id}", response_model=BatchJobResponse)
+    async def get_batch_job(job_id: str, include_results: bool = True):
+        """
+        Job progress; results are aligned with the submitted questions (null while pending)
+        """
+        from app.services.qa.batch_jobs import batch_job_manager
+        
+        job = batch_job_manager.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail=f"Unknown batch job: {job_id}")
+        
+        return BatchJobResponse(
+            success=job["status"] != "failed",
+            status_url=f"/ask/batch/{job_id}",
+            **batch_job_manager.to_response(job, include_results=include_results)
+        )
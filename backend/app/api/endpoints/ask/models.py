@@ -8,6 +8,8 @@ class QuestionRequest(BaseModel):
     question: str
     max_results: Optional[int] = 5
     use_context: Optional[bool] = True
+    use_cache: Optional[bool] = True
+    profile: Optional[bool] = False  # Run under cProfile, hot functions in service_context["profile"]
 
 class Source(BaseModel):
     document: str
@@ -21,4 +23,24 @@ class QuestionResponse(BaseModel):
     answer: str
     sources: List[Source]
     timestamp: str
-    service_context: Optional[Dict[str, Any]] = None
\ No newline at end of file
+    service_context: Optional[Dict[str, Any]] = None
+class BatchQuestionRequest(BaseModel):
+    questions: List[str]
+    use_cache: Optional[bool] = True
+    callback_url: Optional[str] = None
+
+class BatchJobResponse(BaseModel):
+    success: bool
+    job_id: str
+    status: str
+    total: int
+    completed: int = 0
+    failed: int = 0
+    status_url: Optional[str] = None
+    callback_url: Optional[str] = None
+    callback: Optional[Dict[str, Any]] = None
+    created_at: Optional[str] = None
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    error: Optional[str] = None
+    results: Optional[List[Optional[QuestionResponse]]] = None
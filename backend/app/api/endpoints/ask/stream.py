@@ -0,0 +1,41 @@
+"""
+Streaming Ask Endpoint
+Route: POST /ask/stream (Server-Sent Events)
+"""
+import json
+import logging
+from fastapi.responses import StreamingResponse
+from .models import QuestionRequest
+from app.api.endpoints.health.readiness import not_ready_response
+
+logger = logging.getLogger(__name__)
+
+def format_sse(event: str, data) -> str:
+    """Serialize one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+def register_ask_stream_route(app):
+    """Register the POST /ask/stream route"""
+    
+    @app.post("/ask/stream")
+    async def ask_question_stream(request: QuestionRequest):
+        """
+        Ask a question and receive sources, generated tokens and a timing summary as SSE
+        """
+        from app.services.qa.qa_service import qa_service
+        from app.services.qa.startup import startup_manager
+        
+        if not startup_manager.is_ready():
+            return not_ready_response()
+        
+        logger.info(f"Streaming question received: {request.question}")
+        
+        async def event_stream():
+            async for event in qa_service.stream_question(request.question, use_cache=request.use_cache):
+                yield format_sse(event["event"], event["data"])
+        
+        return StreamingResponse(
+            event_stream(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
@@ -2,8 +2,8 @@
 Common utilities for health endpoints
 """
 import logging
-import psutil
 import os
+import time
 from datetime import datetime
 from pathlib import Path
 from app.core.config import config
@@ -21,41 +21,38 @@ class HealthBase:
         return config.get_health_base_info()
     
     @staticmethod
-    def get_detailed_system_health() -> dict:
+    def get_detailed_system_health(deep: bool = False) -> dict:
+        """
+        Default: latest background sample, constant time (no psutil call, no disk walk),
+        a "warming_up" placeholder until the sampler has taken its first one
+        deep=True: fresh 1s CPU reading and expensive checks - blocking, run it off the event loop
+        """
         try:
             # Late import to avoid circular errors
             from app.core.dependencies import dependencies
+            from app.services.health_sampler import health_sampler
             
             # System metrics
-            memory = psutil.virtual_memory()
-            disk = psutil.disk_usage(str(config.DATA_DIR))
-            cpu_percent = psutil.cpu_percent(interval=1)
+            if deep:
+                sample = health_sampler.take_sample(cpu_interval=1)
+                sample["deep_checks"] = HealthBase.get_deep_checks()
+            else:
+                sample = health_sampler.latest() or HealthBase._warming_up_sample()
             
             # File verifications
-            registry_exists = config.REGISTRY_FILE.exists()
-            registry_size = config.REGISTRY_FILE.stat().st_size if registry_exists else 0
+            registry_exists = config.REGISTRY_DB.exists()
+            registry_size = config.REGISTRY_DB.stat().st_size if registry_exists else 0
             documents_exists = config.DOCUMENTS_DIR.exists()
             
-            # Document file count
-            doc_count = 0
-            if documents_exists:
-                try:
-                    doc_count = len(list(config.DOCUMENTS_DIR.rglob("*")))
-                except Exception:
-                    doc_count = -1
+            # Document file count (in-memory catalog kept current by the indexer scans)
+            from app.services.documents.catalog import document_catalog
+            doc_count = document_catalog.snapshot()["total_files"] if documents_exists else 0
             
-            return {
-                "system_metrics": {
-                    "cpu_usage_percent": round(cpu_percent, 2),
-                    "memory_usage_percent": round(memory.percent, 2),
-                    "memory_total_gb": round(memory.total / (1024**3), 2),
-                    "memory_available_gb": round(memory.available / (1024**3), 2),
-                    "memory_used_gb": round(memory.used / (1024**3), 2),
-                    "disk_usage_percent": round((disk.used / disk.total) * 100, 2),
-                    "disk_total_gb": round(disk.total / (1024**3), 2),
-                    "disk_free_gb": round(disk.free / (1024**3), 2),
-                    "disk_used_gb": round(disk.used / (1024**3), 2)
-                },
+            health = {
+                "sampled_at": sample["timestamp"],
+                "sample_age_seconds": round(time.monotonic() - sample["monotonic"], 1),
+                "system_metrics": sample["system_metrics"],
+                "components": sample["components"],
                 "application_health": {
                     "cache_strategy": config.FILE_CACHE_STRATEGY,
                     "scan_interval_seconds": config.FILE_SCAN_INTERVAL,
@@ -86,6 +83,9 @@ class HealthBase:
                     }
                 }
             }
+            if deep:
+                health["deep_checks"] = sample["deep_checks"]
+            return health
         except Exception as e:
             logger.warning(f"Error collecting system metrics: {e}")
             return {
@@ -98,5 +98,36 @@ class HealthBase:
                 "error": str(e)
             }
 
+    @staticmethod
+    def _warming_up_sample() -> dict:
+        """
+        Stands in for the first background sample: a sample taken here would run psutil and the
+        Ollama probe (up to its timeout) on the event loop
+        """
+        return {
+            "timestamp": datetime.now().isoformat(),
+            "monotonic": time.monotonic(),
+            "system_metrics": {"status": "warming_up"},
+            "components": {"status": "warming_up"}
+        }
+    
+    @staticmethod
+    def get_deep_checks() -> dict:
+        """Checks too expensive for every probe: fresh Ollama probe, ChromaDB count, registry read"""
+        from app.services.qa.qa_service import qa_service
+        from app.services.qa.ollama_client import ollama_client
+        from app.services.documents.registry import registry_manager
+        
+        checks = {"ollama": ollama_client.probe(force=True)}
+        try:
+            checks["chromadb_chunks"] = qa_service.vectorstore._collection.count() if qa_service.vectorstore else None
+        except Exception as e:
+            checks["chromadb_error"] = str(e)
+        try:
+            checks["registry_files"] = registry_manager.count()
+        except Exception as e:
+            checks["registry_error"] = str(e)
+        return checks
+
 # Shared instance
 health_base = HealthBase()
\ No newline at end of file
@@ -2,7 +2,9 @@
 Health Check Endpoint
 Route: GET /health
 """
+import asyncio
 import logging
+from typing import Optional
 from .base import health_base
 
 logger = logging.getLogger(__name__)
@@ -11,13 +13,16 @@ def register_health_route(app):
     """Register the GET /health route"""
     
     @app.get("/health")
-    async def health_check():
+    async def health_check(deep: bool = False):
         try:
             # Basic information
             base_info = health_base.get_service_info()
             
-            # COMPLETE system information
-            detailed_health = health_base.get_detailed_system_health()
+            # COMPLETE system information (background sample; deep checks run in a thread)
+            if deep:
+                detailed_health = await asyncio.to_thread(health_base.get_detailed_system_health, True)
+            else:
+                detailed_health = health_base.get_detailed_system_health()
             
             # COMPLETE combination - No information lost
             health_response = {
@@ -43,4 +48,18 @@ def register_health_route(app):
                     "ollama_model": config.OLLAMA_MODEL,
                     "ollama_data_version": config.OLLAMA_DATA_VERSION
                 }
-            }
\ No newline at end of file
+            }
+    
+    @app.get("/health/history")
+    async def health_history(limit: Optional[int] = 60):
+        """Recent background samples (oldest first) as a short time series"""
+        from app.services.health_sampler import health_sampler
+        
+        return {
+            "sampler": health_sampler.get_stats(),
+            "samples": [
+                {key: value for key, value in sample.items() if key != "monotonic"}
+                for sample in health_sampler.history(limit)
+            ],
+            "timestamp": health_base.get_current_timestamp()
+        }
@@ -0,0 +1,18 @@
+"""
+Prometheus metrics endpoint
+Route: GET /metrics
+"""
+import logging
+from fastapi.responses import PlainTextResponse
+
+logger = logging.getLogger(__name__)
+
+def register_metrics_route(app):
+    @app.get("/metrics", response_class=PlainTextResponse)
+    async def get_metrics():
+        """
+        Prometheus text format: per-stage RAG latency histograms, Ollama tokens/sec,
+        ingestion throughput, cache hit ratios, queue depths and in-flight requests
+        """
+        from app.services.metrics import metrics, CONTENT_TYPE
+        return PlainTextResponse(metrics.render(), media_type=CONTENT_TYPE)
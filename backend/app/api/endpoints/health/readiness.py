@@ -0,0 +1,37 @@
+"""
+Liveness and Readiness Endpoints
+Routes: GET /live, GET /ready
+"""
+import logging
+from fastapi.responses import JSONResponse
+from app.core.config import config
+from .base import health_base
+
+logger = logging.getLogger(__name__)
+
+def not_ready_response(detail: str = "RAG system is starting") -> JSONResponse:
+    """503 with Retry-After and the current startup phase"""
+    from app.services.qa.startup import startup_manager
+    
+    return JSONResponse(
+        status_code=503,
+        content={"success": False, "detail": detail, **startup_manager.get_status()},
+        headers={"Retry-After": str(config.READY_RETRY_AFTER)}
+    )
+
+def register_readiness_routes(app):
+    """Register the GET /live and GET /ready routes"""
+    
+    @app.get("/live")
+    async def liveness():
+        """The process is up and serving requests"""
+        return {"status": "alive", "timestamp": health_base.get_current_timestamp()}
+    
+    @app.get("/ready")
+    async def readiness():
+        """200 once the QA chain is initialized and warmed up, 503 (with phase and progress) before"""
+        from app.services.qa.startup import startup_manager
+        
+        if not startup_manager.is_ready():
+            return not_ready_response()
+        return startup_manager.get_status()
@@ -28,11 +28,19 @@ class AppConfig:
     OLLAMA_CONNECT_TIMEOUT = int(os.getenv("OLLAMA_CONNECT_TIMEOUT", "60"))    # Connexion: 1 min
     OLLAMA_READ_TIMEOUT = int(os.getenv("OLLAMA_READ_TIMEOUT", "600"))         # Lecture: 10 min
     OLLAMA_INITIALIZATION_TIMEOUT = int(os.getenv("OLLAMA_INITIALIZATION_TIMEOUT", "900"))  # Init: 15 min
+    OLLAMA_HEALTH_TTL = int(os.getenv("OLLAMA_HEALTH_TTL", "15"))              # Health probe cache (s)
+    OLLAMA_HTTP_POOL_SIZE = int(os.getenv("OLLAMA_HTTP_POOL_SIZE", "4"))       # Keep-alive connections
 
     # ===== 📁 FILE CACHE STRATEGIES (EASILY CONFIGURABLE) =====
     FILE_CACHE_STRATEGY = os.getenv("FILE_CACHE_STRATEGY", "smart")
     # Options: "smart", "full", "incremental", "disabled"
     FILE_SCAN_INTERVAL = int(os.getenv("FILE_SCAN_INTERVAL", "300"))  # 5 minutes
+    SCAN_WORKERS = int(os.getenv("SCAN_WORKERS", "16"))  # Threads listing/stat-ing directories (I/O bound, helps on network volumes)
+    SCAN_PRUNE_DIRECTORIES = os.getenv("SCAN_PRUNE_DIRECTORIES", "true").lower() == "true"  # Skip directories whose mtime is unchanged (only while the inotify watcher runs)
+    SCAN_FULL_VERIFY_SECONDS = int(os.getenv("SCAN_FULL_VERIFY_SECONDS", "900"))  # Full scan at least this often: max delay for in-place edits the inotify watcher missed
+    CONTENT_HASH_ENABLED = os.getenv("CONTENT_HASH_ENABLED", "true").lower() == "true"  # mtime/size change only counts if the content hash differs
+    HASH_WORKERS = int(os.getenv("HASH_WORKERS", "8"))  # Threads hashing files whose mtime/size changed
+    HASH_BLOCK_SIZE = int(os.getenv("HASH_BLOCK_SIZE", str(1024 * 1024)))  # Bytes read per block while hashing
     METADATA_VALIDATION_STRICT = os.getenv("METADATA_VALIDATION_STRICT", "true").lower() == "true"
     REGISTRY_AUTO_BACKUP = os.getenv("REGISTRY_AUTO_BACKUP", "true").lower() == "true"
     
@@ -41,7 +49,8 @@ class AppConfig:
     DATA_DIR: Path = Path("/app/shared_data") 
     DOCUMENTS_DIR = DATA_DIR / "documents"
     CHROMA_DB_DIR: Path = Path("/app/shared_data/chroma_db") 
-    REGISTRY_FILE = DATA_DIR / "file_registry.json"
+    REGISTRY_FILE = DATA_DIR / "file_registry.json"  # Legacy JSON registry, imported once into REGISTRY_DB
+    REGISTRY_DB = DATA_DIR / "file_registry.db"
     
     # ===== LOGGING =====
     LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
@@ -50,10 +59,81 @@ class AppConfig:
     CHUNK_SIZE: int = int(os.getenv("CHUNK_SIZE", "1000"))
     CHUNK_OVERLAP: int = int(os.getenv("CHUNK_OVERLAP", "200"))
     RETRIEVAL_K: int = int(os.getenv("RETRIEVAL_K", "5"))
+    RETRIEVAL_SCORE_THRESHOLD: float = float(os.getenv("RETRIEVAL_SCORE_THRESHOLD", "0.0"))  # Min relevance (0..1), 0 = off
+    RETRIEVAL_USE_MMR: bool = os.getenv("RETRIEVAL_USE_MMR", "false").lower() == "true"        # Diversify results with MMR
+    RETRIEVAL_FETCH_K: int = int(os.getenv("RETRIEVAL_FETCH_K", "20"))                          # MMR candidate pool
+    RETRIEVAL_MMR_LAMBDA: float = float(os.getenv("RETRIEVAL_MMR_LAMBDA", "0.5"))               # 1 = relevance, 0 = diversity
+    HYBRID_SEARCH_ENABLED: bool = os.getenv("HYBRID_SEARCH_ENABLED", "true").lower() == "true"  # BM25 + vector (RRF)
+    HYBRID_RRF_K: int = int(os.getenv("HYBRID_RRF_K", "60"))                                    # Reciprocal-rank fusion constant
+    LEXICAL_MAX_DOC_FREQ: float = float(os.getenv("LEXICAL_MAX_DOC_FREQ", "0.02"))              # Skip terms in more chunks than this
+    RERANK_ENABLED: bool = os.getenv("RERANK_ENABLED", "false").lower() == "true"               # Cross-encoder rerank stage
+    RERANK_MODEL: str = os.getenv("RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+    RERANK_CANDIDATES: int = int(os.getenv("RERANK_CANDIDATES", "20"))                          # Over-fetched before reranking
+    RERANK_BATCH_SIZE: int = int(os.getenv("RERANK_BATCH_SIZE", "16"))
+    RERANK_TIME_BUDGET_MS: int = int(os.getenv("RERANK_TIME_BUDGET_MS", "300"))                 # Retrieval order past this, 0 = none
     EMBEDDING_MODEL: str = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+    EMBEDDING_DEVICE: str = os.getenv("EMBEDDING_DEVICE", "cpu")
+    
+    # ===== ⚙️ INGESTION =====
+    INGESTION_WORKERS: int = int(os.getenv("INGESTION_WORKERS", str(min(8, os.cpu_count() or 1))))  # Parsing processes
+    EMBEDDING_BATCH_SIZE: int = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))     # Chunks per embedding call
+    WRITE_BATCH_SIZE: int = int(os.getenv("WRITE_BATCH_SIZE", "1000"))            # Chunks per Chroma upsert (< Chroma max batch)
+    PIPELINE_QUEUE_SIZE: int = int(os.getenv("PIPELINE_QUEUE_SIZE", "4"))         # Batches buffered between stages
+    
+    # ===== 👀 DOCUMENT WATCHER =====
+    WATCHER_MODE: str = os.getenv("WATCHER_MODE", "auto")                      # auto (inotify, poll every FILE_SCAN_INTERVAL without it) | inotify | poll | off
+    # Detection delay: inotify ~WATCHER_DEBOUNCE_MS; poll <= FILE_SCAN_INTERVAL (every file stat'ed, no pruning)
+    WATCHER_DEBOUNCE_MS: int = int(os.getenv("WATCHER_DEBOUNCE_MS", "1500"))  # Quiet period before a burst of events is indexed
+    
+    # ===== 🩺 HEALTH SAMPLER =====
+    HEALTH_SAMPLE_INTERVAL: int = int(os.getenv("HEALTH_SAMPLE_INTERVAL", "10"))  # Seconds between background health samples
+    HEALTH_HISTORY_SIZE: int = int(os.getenv("HEALTH_HISTORY_SIZE", "360"))       # Samples kept for /health/history (1h at 10s)
+    
+    # ===== 🔬 REQUEST PROFILING =====
+    PROFILING_ENABLED: bool = os.getenv("PROFILING_ENABLED", "false").lower() == "true"  # Honour the per-request profile flag / X-Debug-Profile header
+    PROFILE_TOP_FUNCTIONS: int = int(os.getenv("PROFILE_TOP_FUNCTIONS", "25"))           # Hot functions returned with a profiled answer
+    PROFILE_KEEP: int = int(os.getenv("PROFILE_KEEP", "20"))                             # .prof files kept in PROFILES_DIR
+    PROFILES_DIR: Path = DATA_DIR / "profiles"
+
+    # ===== 🗂️ INDEX VERSIONS =====
+    INDEX_KEEP_VERSIONS: int = int(os.getenv("INDEX_KEEP_VERSIONS", "2"))         # Previous index versions kept for rollback
+    
+    # ===== 🚦 STARTUP / READINESS =====
+    STARTUP_RETRY_SECONDS: int = int(os.getenv("STARTUP_RETRY_SECONDS", "30"))   # Delay between failed init attempts
+    READY_RETRY_AFTER: int = int(os.getenv("READY_RETRY_AFTER", "10"))           # Retry-After (s) on 503 while starting
+    
+    # ===== 🔗 REQUEST COALESCING =====
+    REQUEST_COALESCING_ENABLED: bool = os.getenv("REQUEST_COALESCING_ENABLED", "true").lower() == "true"  # Share in-flight identical questions
+    
+    # ===== 📦 BATCH QUESTIONS =====
+    BATCH_MAX_QUESTIONS: int = int(os.getenv("BATCH_MAX_QUESTIONS", "500"))       # Per /ask/batch request
+    BATCH_MAX_CONCURRENCY: int = int(os.getenv("BATCH_MAX_CONCURRENCY", "2"))     # Concurrent generations across batch jobs
+    BATCH_MAX_JOBS: int = int(os.getenv("BATCH_MAX_JOBS", "100"))                 # Jobs kept in memory for polling
+    BATCH_CALLBACK_TIMEOUT: int = int(os.getenv("BATCH_CALLBACK_TIMEOUT", "30"))
+    BATCH_CALLBACK_RETRIES: int = int(os.getenv("BATCH_CALLBACK_RETRIES", "3"))
+    
+    # ===== 🧠 EMBEDDING CACHE =====
+    EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+    EMBEDDING_CACHE_DIR: Path = DATA_DIR / "embedding_cache"
+    EMBEDDING_CACHE_MAX_ENTRIES: int = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "500000"))  # ~380 MB at 384 dims float16
+    EMBEDDING_CACHE_DTYPE: str = os.getenv("EMBEDDING_CACHE_DTYPE", "float16")  # float16 | float32
+    
+    # ===== 💬 ANSWER CACHE =====
+    ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+    ANSWER_CACHE_FILE: Path = DATA_DIR / "answer_cache.sqlite"
+    ANSWER_CACHE_MAX_ENTRIES: int = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "1000"))
+    ANSWER_CACHE_TTL: int = int(os.getenv("ANSWER_CACHE_TTL", "86400"))  # Seconds, 0 = no expiry
+    ANSWER_CACHE_SIMILARITY: float = float(os.getenv("ANSWER_CACHE_SIMILARITY", "0.95"))  # Cosine threshold
     
     # ===== SUPPORTED EXTENSIONS =====
-    SUPPORTED_EXTENSIONS = [".txt", ".md", ".pdf", ".docx", ".py", ".json"]
+    # Single list for the registry scanner, the indexer (QAService, watcher) and the document catalog
+    SUPPORTED_EXTENSIONS = [
+        ".pdf", ".txt", ".md",
+        ".cs", ".py", ".js", ".cpp", ".c", ".ts",
+        ".json", ".xml",
+        ".doc", ".docx",
+        ".ppt", ".pptx"
+    ]
     
     # ===== APPLICATION HEALTH =====
     HEALTH_CHECK_COMPONENTS = [
@@ -28,8 +28,8 @@ class DependencyContainer:
     def get_registry_manager(self):
         """Lazy loading of RegistryManager"""
         if self._registry_manager is None:
-            from app.services.documents.registry import RegistryManager
-            self._registry_manager = RegistryManager()
+            from app.services.documents.registry import registry_manager
+            self._registry_manager = registry_manager
             logger.debug("✅ RegistryManager initialized")
         return self._registry_manager
     
@@ -1,9 +1,12 @@
 """
 Main entry point for the FastAPI application
 """
+import asyncio
 import logging
+import time
 from datetime import datetime
-from fastapi import FastAPI, HTTPException
+from typing import Optional
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 
@@ -33,11 +36,37 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def track_requests(request: Request, call_next):
+    """In-flight requests and latency by route template for /metrics"""
+    from app.services.metrics import metrics
+    
+    started = time.perf_counter()
+    status = 500
+    metrics.http_in_flight.inc()
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        metrics.http_in_flight.dec()
+        route = request.scope.get("route")
+        metrics.http_seconds.observe(
+            time.perf_counter() - started,
+            method=request.method,
+            route=getattr(route, "path", "unmatched"),
+            status=status
+        )
+
 # Import modular routes
 from app.api.endpoints.health.health import register_health_route
 from app.api.endpoints.health.version import register_version_route
+from app.api.endpoints.health.readiness import register_readiness_routes
+from app.api.endpoints.health.metrics import register_metrics_route
 from app.api.endpoints.smart_reload.smart_reload import register_smart_reload_route
 from app.api.endpoints.ask.ask import register_ask_route
+from app.api.endpoints.ask.stream import register_ask_stream_route
+from app.api.endpoints.ask.batch import register_ask_batch_route
 from app.api.endpoints.ask.stats import register_stats_route
 
 # Startup log with configuration
@@ -49,8 +78,12 @@ logger.info(f"📊 Data version: {config.OLLAMA_DATA_VERSION}")
 # Register modular routes
 register_health_route(app)
 register_version_route(app)
+register_readiness_routes(app)
+register_metrics_route(app)
 register_smart_reload_route(app)
 register_ask_route(app)
+register_ask_stream_route(app)
+register_ask_batch_route(app)
 register_stats_route(app)
 
 # Endpoints 
@@ -177,12 +210,12 @@ async def get_stats():
 # ADDITIONNAL LEGALY ENDPOINTS
 
 @app.post("/test-simple")
-async def test_simple():
-    """Test simple sans documents pour vérifier Ollama (from rag_server.py)"""
+async def test_simple(deep: bool = False):
+    """Test simple sans documents pour vérifier Ollama (from rag_server.py) - deep=true runs a generation"""
     try:
         from app.services.qa.qa_service import qa_service
         
-        result = qa_service.test_ollama_connection()
+        result = await asyncio.to_thread(qa_service.test_ollama_connection, deep=deep)
         return result
     except Exception as e:
         return {"status": "error", "error": str(e)}
@@ -204,7 +237,7 @@ async def initialize_qa():
     try:
         from app.services.qa.qa_service import qa_service
         
-        success = qa_service.initialize_qa_chain()
+        success = await asyncio.to_thread(qa_service.initialize_qa_chain)
         
         if success:
             return {
@@ -230,7 +263,7 @@ async def rebuild_qa_system():
         from app.services.qa.qa_service import qa_service
         logger.info("🔄 Forcing QA system rebuild...")
         
-        if qa_service.initialize_qa_chain(force_rebuild=True):
+        if await asyncio.to_thread(qa_service.initialize_qa_chain, force_rebuild=True):
             return {
                 "success": True,
                 "message": "QA system rebuilt successfully",
@@ -250,27 +283,36 @@ async def rebuild_qa_system():
             "timestamp": datetime.now().isoformat()
         }
 
+@app.get("/index/versions")
+async def list_index_versions():
+    """Index versions on disk (active one, previous ones kept for rollback)"""
+    from app.services.qa.qa_service import qa_service
+    return {
+        "current": qa_service.versions.current_id(),
+        "previous": qa_service.versions.previous_id(),
+        "versions": qa_service.versions.list_versions(),
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.post("/index/rollback")
+async def rollback_index(version_id: Optional[str] = None):
+    """Serve a previous index version again (default: the one active before the current)"""
+    from app.services.qa.qa_service import qa_service
+    logger.info(f"⏪ Rolling back index to {version_id or 'previous version'}...")
+    return await asyncio.to_thread(qa_service.rollback_index, version_id)
+
 app.get("/debug-ollama")
 async def debug_ollama():
     """Debug Ollama connection"""
     try:
         from app.services.qa.qa_service import qa_service
-        import requests
+        from app.services.qa.ollama_client import ollama_client
         
-        # Test direct HTTP
-        health_check = {}
-        try:
-            response = requests.get(f"{config.OLLAMA_BASE_URL}/api/tags", timeout=5)
-            health_check["http_status"] = response.status_code
-            health_check["http_reachable"] = True
-            if response.status_code == 200:
-                health_check["available_models"] = response.json()
-        except Exception as e:
-            health_check["http_reachable"] = False
-            health_check["http_error"] = str(e)
+        # Test direct HTTP (fresh probe, pooled connection)
+        health_check = await asyncio.to_thread(ollama_client.probe, True)
         
         # Test QA service
-        qa_test = qa_service.test_ollama_connection()
+        qa_test = await asyncio.to_thread(qa_service.test_ollama_connection, True)
         
         return {
             "config": {
@@ -294,23 +336,32 @@ async def startup_event():
     logger.info(f"🎯 Application started successfully")
     logger.info(f"🔧 Configuration: {config.get_configuration_summary()}")
     
-    # Initialize QA service on startup
-    try:
-        from app.services.qa.qa_service import qa_service
-        logger.info("🔄 Initializing QA service...")
-        success = qa_service.initialize_qa_chain()
-        if success:
-            logger.info("✅ QA service initialized successfully")
-        else:
-            logger.warning("⚠️ QA service initialization failed")
-    except Exception as e:
-        logger.error(f"❌ QA service initialization error: {e}")
+    # Warm the embedding model and initialize the QA service in the background: /live answers
+    # immediately, /ready (and /ask) report 503 with the current phase until it is done
+    from app.services.qa.startup import startup_manager
+    logger.info("🔄 Initializing QA service in the background...")
+    startup_manager.start()
+    
+    # New/changed documents are indexed automatically (only the touched paths)
+    from app.services.qa.document_watcher import document_watcher
+    document_watcher.start()
+    
+    # CPU/memory/disk and component status sampled in the background: /health only reads the latest sample
+    from app.services.health_sampler import health_sampler
+    health_sampler.start()
 
         
 @app.on_event("shutdown")
 async def shutdown_event():
     """Shutdown events"""
     logger.info("🛑 Application shutdown")
+    from app.services.qa.document_watcher import document_watcher
+    await document_watcher.stop()
+    from app.services.health_sampler import health_sampler
+    await health_sampler.stop()
+    # Ingestion worker processes are kept between index updates
+    from app.services.qa.qa_service import qa_service
+    qa_service.ingestor.shutdown()
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,130 @@
+"""
+Document Catalog
+In-memory view of the documents directory (counts by extension, sizes, indexed set)
+Fed by the scans the indexer already does, so stats/health/ask never walk the disk
+"""
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import Dict, Any, Iterable, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+class DocumentCatalog:
+    """
+    files: relative_path -> (extension, size) for supported files on disk at the last scan
+    indexed: relative paths present in the active index
+    Aggregates are maintained on every change, reads are O(1) (plus a copy of the small per-extension dict)
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._files: Dict[str, tuple] = {}
+        self._indexed: Set[str] = set()
+        self._by_extension: Dict[str, Dict[str, int]] = {}
+        self._total_size = 0
+        self._other_files = 0
+        self._other_size = 0
+        self.built_at: Optional[str] = None
+        self.updated_at: Optional[str] = None
+        self.updates = 0
+
+    @staticmethod
+    def _extension(relative_path: str) -> str:
+        return os.path.splitext(relative_path)[1].lower()
+
+    def _add(self, relative_path: str, size: int) -> None:
+        extension = self._extension(relative_path)
+        self._files[relative_path] = (extension, size)
+        bucket = self._by_extension.setdefault(extension, {"count": 0, "size_bytes": 0})
+        bucket["count"] += 1
+        bucket["size_bytes"] += size
+        self._total_size += size
+
+    def _remove(self, relative_path: str) -> None:
+        entry = self._files.pop(relative_path, None)
+        if entry is None:
+            return
+        extension, size = entry
+        bucket = self._by_extension[extension]
+        bucket["count"] -= 1
+        bucket["size_bytes"] -= size
+        if not bucket["count"]:
+            del self._by_extension[extension]
+        self._total_size -= size
+
+    # ===== WRITES (called by the indexer scans) =====
+
+    def replace(self, registry: Dict[str, Any], other_files: Optional[int] = None, other_size: Optional[int] = None) -> None:
+        """Full snapshot after a complete walk of the documents directory"""
+        with self._lock:
+            self._files = {}
+            self._by_extension = {}
+            self._total_size = 0
+            for relative_path, file_info in registry.items():
+                self._add(relative_path, file_info.get('size') or 0)
+            if other_files is not None:
+                self._other_files = other_files
+                self._other_size = other_size or 0
+            self.built_at = self.updated_at = datetime.now().isoformat()
+            self.updates += 1
+
+    def apply_changes(self, registry: Dict[str, Any], changes: Dict[str, Any], indexed: bool = True) -> None:
+        """Incremental update from IncrementalIndexer.compute_changes (only the touched paths)"""
+        with self._lock:
+            for relative_path in changes.get("deleted", []):
+                self._remove(relative_path)
+                self._indexed.discard(relative_path)
+            for key in ("added", "modified", "touched"):
+                for relative_path in changes.get(key, []):
+                    self._remove(relative_path)
+                    self._add(relative_path, registry[relative_path].get('size') or 0)
+                    if indexed:
+                        self._indexed.add(relative_path)
+            self.updated_at = datetime.now().isoformat()
+            self.updates += 1
+
+    def set_indexed(self, relative_paths: Iterable[str]) -> None:
+        """Files of the index version that was just activated"""
+        indexed = set(relative_paths)
+        with self._lock:
+            self._indexed = indexed
+
+    # ===== READS =====
+
+    @property
+    def ready(self) -> bool:
+        return self.built_at is not None
+
+    def indexed_count(self) -> int:
+        return len(self._indexed)
+
+    def file_count(self) -> int:
+        return len(self._files)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            by_extension = {extension: dict(bucket) for extension, bucket in self._by_extension.items()}
+            return {
+                "ready": self.ready,
+                "supported_files": len(self._files),
+                "indexed_files": len(self._indexed),
+                "other_files": self._other_files,
+                "total_files": len(self._files) + self._other_files,
+                "total_size_bytes": self._total_size + self._other_size,
+                "supported_size_bytes": self._total_size,
+                "by_extension": by_extension,
+                "built_at": self.built_at,
+                "updated_at": self.updated_at
+            }
+
+    def rebuild(self) -> Dict[str, Any]:
+        """Walk the documents directory once (startup): the QA registry scan feeds the catalog"""
+        from app.services.qa.qa_service import qa_service
+
+        qa_service.get_files_registry()
+        return self.snapshot()
+
+# Global instance
+document_catalog = DocumentCatalog()
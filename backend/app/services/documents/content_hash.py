@@ -0,0 +1,33 @@
+"""
+Content Hash
+Streamed file hashing used to tell real edits from mtime-only changes (copies, restores, rsync)
+"""
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Optional
+
+from app.core.config import config
+
+logger = logging.getLogger(__name__)
+
+def content_hash(path: str, block_size: Optional[int] = None) -> Optional[str]:
+    """BLAKE2b of the file, read in fixed-size blocks (constant memory), None if unreadable"""
+    block_size = block_size or config.HASH_BLOCK_SIZE
+    digest = hashlib.blake2b(digest_size=16)
+    try:
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(block_size), b""):
+                digest.update(block)
+    except OSError as e:
+        logger.warning(f"Error hashing file {path}: {e}")
+        return None
+    return digest.hexdigest()
+
+def hash_files(paths: Iterable[str], workers: Optional[int] = None) -> Dict[str, Optional[str]]:
+    """Hash several files in a thread pool (hashlib releases the GIL on large blocks)"""
+    paths = list(paths)
+    if not paths:
+        return {}
+    with ThreadPoolExecutor(max_workers=workers or config.HASH_WORKERS, thread_name_prefix="hash") as pool:
+        return dict(zip(paths, pool.map(content_hash, paths)))
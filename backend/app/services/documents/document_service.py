@@ -17,7 +17,7 @@ class DocumentService:
     def __init__(self):
         self.data_dir = config.DATA_DIR
         self.documents_dir = config.DOCUMENTS_DIR
-        self.registry_file = config.REGISTRY_FILE
+        self.registry_file = config.REGISTRY_DB
         self.supported_extensions = config.SUPPORTED_EXTENSIONS
         logger.debug("DocumentService initialized")
     
@@ -64,30 +64,18 @@ class DocumentService:
             }
     
     def _get_registry_stats(self) -> Dict[str, Any]:
-        """Get statistics from registry file"""
+        """Get statistics from the registry database"""
         try:
-            if not self.registry_file.exists():
+            from app.services.documents.registry import registry_manager
+            
+            if not config.REGISTRY_DB.exists():
                 return {
                     "total_files": 0,
                     "registry_exists": False,
                     "registry_size_bytes": 0
                 }
             
-            import json
-            with open(self.registry_file, 'r', encoding='utf-8') as f:
-                registry_data = json.load(f)
-            
-            # Count files (excluding metadata entries)
-            file_count = len([k for k in registry_data.keys() if not k.startswith('_')])
-            
-            return {
-                "total_files": file_count,
-                "registry_exists": True,
-                "registry_size_bytes": self.registry_file.stat().st_size,
-                "last_modified": datetime.fromtimestamp(
-                    self.registry_file.stat().st_mtime
-                ).isoformat()
-            }
+            return registry_manager.get_stats()
             
         except Exception as e:
             logger.warning(f"Error reading registry stats: {e}")
@@ -98,26 +86,27 @@ class DocumentService:
             }
     
     def _get_file_system_stats(self) -> Dict[str, Any]:
-        """Get file system statistics"""
+        """Get file system statistics (in-memory catalog, no directory walk)"""
         try:
+            from app.services.documents.catalog import document_catalog
+            
             if not self.documents_dir.exists():
                 return {
                     "documents_directory_exists": False,
                     "total_files_on_disk": 0
                 }
             
-            # Count all files in documents directory
-            all_files = list(self.documents_dir.rglob("*"))
-            file_count = len([f for f in all_files if f.is_file()])
-            
-            # Calculate total size
-            total_size = sum(f.stat().st_size for f in all_files if f.is_file())
+            catalog = document_catalog.snapshot()
+            total_size = catalog["total_size_bytes"]
             
             return {
                 "documents_directory_exists": True,
-                "total_files_on_disk": file_count,
+                "total_files_on_disk": catalog["total_files"],
                 "total_size_bytes": total_size,
-                "total_size_mb": round(total_size / (1024 * 1024), 2)
+                "total_size_mb": round(total_size / (1024 * 1024), 2),
+                "indexed_files": catalog["indexed_files"],
+                "catalog_ready": catalog["ready"],
+                "catalog_updated_at": catalog["updated_at"]
             }
             
         except Exception as e:
@@ -128,22 +117,22 @@ class DocumentService:
             }
     
     def _get_extension_stats(self) -> Dict[str, Any]:
-        """Get statistics by file extension"""
+        """Get statistics by file extension (in-memory catalog)"""
         try:
+            from app.services.documents.catalog import document_catalog
+            
             if not self.documents_dir.exists():
                 return {"by_extension": {}}
             
-            extension_counts = {}
-            for ext in self.supported_extensions:
-                files = list(self.documents_dir.rglob(f"*{ext}"))
-                extension_counts[ext] = len(files)
+            catalog = document_catalog.snapshot()
+            by_extension = catalog["by_extension"]
+            extension_counts = {
+                ext: by_extension.get(ext.lower(), {}).get("count", 0)
+                for ext in self.supported_extensions
+            }
             
             # Count other extensions
-            all_files = [f for f in self.documents_dir.rglob("*") if f.is_file()]
-            other_count = len([
-                f for f in all_files 
-                if f.suffix not in self.supported_extensions
-            ])
+            other_count = catalog["total_files"] - sum(extension_counts.values())
             
             return {
                 "by_extension": extension_counts,
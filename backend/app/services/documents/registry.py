@@ -1,153 +1,468 @@
 """
 Registry Manager Service
 Handles document registry operations with centralized configuration
+Stored in SQLite (WAL): one indexed row per file, batched upserts/deletes in a single transaction
 """
 import json
 import logging
+import sqlite3
+import threading
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterable, List, Optional
 from pathlib import Path
 from app.core.config import config
 
 logger = logging.getLogger(__name__)
 
+# Registry keys starting with '_' are not files, they live in registry_meta ('_directories' in its own table)
+_META_PREFIX = "_"
+_DIRECTORIES_KEY = "_directories"
+
 class RegistryManager:
+    """
+    files(path, directory, size, mtime_ns, modified, content_hash, metadata JSON)
+    directories(path, mtime_ns, file_count, subdirs JSON): scan fingerprints, one row per directory
+    registry_meta(key, value JSON) for '_scan', '_metadata'
+    get_current_registry()/update_registry() keep returning/accepting the former JSON dict shape
+    """
+
     def __init__(self):
-        self.registry_file = config.REGISTRY_FILE
+        self.db_path = config.REGISTRY_DB
+        self.legacy_registry_file = config.REGISTRY_FILE
         self.auto_backup = config.REGISTRY_AUTO_BACKUP
         self.data_dir = config.DATA_DIR
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
         logger.debug(f"RegistryManager initialized (auto_backup: {self.auto_backup})")
-    
+
+    # ===== STORAGE =====
+
+    def _open(self) -> sqlite3.Connection:
+        if self._db is not None:
+            return self._db
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        db = sqlite3.connect(str(self.db_path), check_same_thread=False, timeout=30)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.executescript("""
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                directory TEXT NOT NULL,
+                size INTEGER,
+                mtime_ns INTEGER,
+                modified TEXT,
+                content_hash TEXT,
+                metadata TEXT NOT NULL
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS files_directory ON files(directory);
+            CREATE TABLE IF NOT EXISTS directories (
+                path TEXT PRIMARY KEY,
+                mtime_ns INTEGER,
+                file_count INTEGER NOT NULL,
+                subdirs TEXT NOT NULL
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS registry_meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+        """)
+        self._db = db
+        self._migrate_json_registry()
+        self._migrate_directories_meta()
+        return db
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def _migrate_json_registry(self) -> None:
+        """One-time import of the former file_registry.json"""
+        if not self.legacy_registry_file.exists():
+            return
+        if self._db.execute("SELECT COUNT(*) FROM files").fetchone()[0]:
+            return
+        try:
+            with open(self.legacy_registry_file, 'r', encoding='utf-8') as f:
+                legacy = json.load(f)
+            self._replace_all(legacy)
+            self.legacy_registry_file.rename(self.legacy_registry_file.with_suffix(".json.migrated"))
+            logger.info(f"📦 Registry migrated from JSON: {self._count_files()} files")
+        except Exception as e:
+            logger.warning(f"Error migrating JSON registry: {e}")
+
+    def _migrate_directories_meta(self) -> None:
+        """Fingerprints formerly stored as one '_directories' JSON value in registry_meta"""
+        fingerprints = self._get_meta(_DIRECTORIES_KEY)
+        if fingerprints is None:
+            return
+        with self._db:
+            self._write_directories(fingerprints)
+            self._db.execute("DELETE FROM registry_meta WHERE key = ?", (_DIRECTORIES_KEY,))
+
+    @staticmethod
+    def _row(file_path: str, metadata: Dict[str, Any]):
+        return (
+            file_path,
+            str(Path(file_path).parent),
+            metadata.get("size"),
+            metadata.get("mtime_ns"),
+            metadata.get("modified"),
+            metadata.get("content_hash"),
+            json.dumps(metadata, ensure_ascii=False)
+        )
+
+    def _upsert(self, files: Dict[str, Any]) -> None:
+        self._db.executemany(
+            """
+            INSERT INTO files (path, directory, size, mtime_ns, modified, content_hash, metadata)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(path) DO UPDATE SET
+                directory = excluded.directory, size = excluded.size, mtime_ns = excluded.mtime_ns,
+                modified = excluded.modified, content_hash = excluded.content_hash, metadata = excluded.metadata
+            """,
+            [self._row(file_path, metadata) for file_path, metadata in files.items()]
+        )
+
+    def _set_meta(self, key: str, value: Any) -> None:
+        self._db.execute(
+            "INSERT OR REPLACE INTO registry_meta (key, value) VALUES (?, ?)",
+            (key, json.dumps(value, ensure_ascii=False))
+        )
+
+    def _get_meta(self, key: str) -> Any:
+        row = self._db.execute("SELECT value FROM registry_meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    @staticmethod
+    def _directory_row(directory: str, fingerprint: Dict[str, Any]):
+        return (
+            directory,
+            fingerprint.get("mtime_ns"),
+            fingerprint.get("files", 0),
+            json.dumps(sorted(fingerprint.get("subdirs", [])), ensure_ascii=False)
+        )
+
+    def _read_directories(self) -> Dict[str, Any]:
+        return {
+            path: {"mtime_ns": mtime_ns, "files": file_count, "subdirs": json.loads(subdirs)}
+            for path, mtime_ns, file_count, subdirs in self._db.execute(
+                "SELECT path, mtime_ns, file_count, subdirs FROM directories"
+            )
+        }
+
+    def _write_directories(self, fingerprints: Dict[str, Any]) -> int:
+        """
+        Make the directories table match these fingerprints: only rows that differ are written,
+        directories gone from the scan are deleted. Returns the number of rows changed
+        """
+        stored = {row[0]: row for row in self._db.execute("SELECT path, mtime_ns, file_count, subdirs FROM directories")}
+        rows = [self._directory_row(directory, fingerprint) for directory, fingerprint in fingerprints.items()]
+        changed = [row for row in rows if stored.get(row[0]) != row]
+        removed = [(path,) for path in stored if path not in fingerprints]
+        self._db.executemany("INSERT OR REPLACE INTO directories (path, mtime_ns, file_count, subdirs) VALUES (?, ?, ?, ?)", changed)
+        self._db.executemany("DELETE FROM directories WHERE path = ?", removed)
+        return len(changed) + len(removed)
+
+    def _count_files(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
+    def _touch_metadata(self) -> None:
+        self._set_meta("_metadata", {
+            "last_updated": datetime.now().isoformat(),
+            "total_files": self._count_files(),
+            "cache_strategy": config.FILE_CACHE_STRATEGY,
+            "auto_backup_enabled": self.auto_backup
+        })
+
+    def _replace_all(self, registry_data: Dict[str, Any]) -> None:
+        files = {key: value for key, value in registry_data.items() if not key.startswith(_META_PREFIX)}
+        with self._db:
+            self._db.execute("DELETE FROM files")
+            self._upsert(files)
+            for key, value in registry_data.items():
+                if key == _DIRECTORIES_KEY:
+                    self._write_directories(value)
+                elif key.startswith(_META_PREFIX) and key != "_metadata":
+                    self._set_meta(key, value)
+            self._touch_metadata()
+
+    # ===== READS =====
+
     def get_current_registry(self) -> Dict[str, Any]:
-        """Get current registry content"""
+        """Get current registry content (files + '_' metadata entries)"""
         try:
-            if not self.registry_file.exists():
-                logger.info("Registry file doesn't exist, returning empty registry")
-                return {}
-            
-            with open(self.registry_file, 'r', encoding='utf-8') as f:
-                registry = json.load(f)
-            
+            with self._lock:
+                db = self._open()
+                registry = {path: json.loads(metadata) for path, metadata in db.execute("SELECT path, metadata FROM files")}
+                for key, value in db.execute("SELECT key, value FROM registry_meta"):
+                    registry[key] = json.loads(value)
+                registry[_DIRECTORIES_KEY] = self._read_directories()
+
             logger.debug(f"Registry loaded: {len(registry)} entries")
             return registry
-            
+
         except Exception as e:
             logger.error(f"Error loading registry: {e}")
             return {}
-    
+
+    def get_entries(self, file_paths: Iterable[str]) -> Dict[str, Any]:
+        """Point lookups by path (primary key)"""
+        file_paths = list(file_paths)
+        entries = {}
+        with self._lock:
+            db = self._open()
+            for start in range(0, len(file_paths), 500):
+                batch = file_paths[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                for path, metadata in db.execute(f"SELECT path, metadata FROM files WHERE path IN ({placeholders})", batch):
+                    entries[path] = json.loads(metadata)
+        return entries
+
+    def get_files_in_directories(self, directories: Iterable[str]) -> Dict[str, Any]:
+        """Entries of the files directly in the given directories (directory index)"""
+        directories = list(directories)
+        entries = {}
+        with self._lock:
+            db = self._open()
+            for start in range(0, len(directories), 500):
+                batch = directories[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                for path, metadata in db.execute(f"SELECT path, metadata FROM files WHERE directory IN ({placeholders})", batch):
+                    entries[path] = json.loads(metadata)
+        return entries
+
+    def get_directories(self) -> Dict[str, Any]:
+        """Directory fingerprints of the last scan: path -> {mtime_ns, files, subdirs}"""
+        with self._lock:
+            self._open()
+            return self._read_directories()
+
+    def get_meta(self, key: str) -> Any:
+        with self._lock:
+            self._open()
+            return self._get_meta(key)
+
+    def count(self) -> int:
+        with self._lock:
+            self._open()
+            return self._count_files()
+
+    def diff(self, scanned: Dict[str, Any]) -> Dict[str, List[str]]:
+        """
+        new / modified / deleted paths between a scan (path -> stat metadata) and the registry
+        Done in SQL against a temp table joined on the primary key; modified = size or mtime_ns differ
+        (ISO 'modified' for entries recorded before mtime_ns existed)
+        """
+        with self._lock:
+            db = self._open()
+            with db:
+                db.execute("CREATE TEMP TABLE IF NOT EXISTS scan (path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, modified TEXT) WITHOUT ROWID")
+                db.execute("DELETE FROM scan")
+                db.executemany(
+                    "INSERT INTO scan (path, size, mtime_ns, modified) VALUES (?, ?, ?, ?)",
+                    [
+                        (path, metadata.get("size"), metadata.get("mtime_ns"), metadata.get("modified"))
+                        for path, metadata in scanned.items()
+                    ]
+                )
+                new = [row[0] for row in db.execute(
+                    "SELECT s.path FROM scan s LEFT JOIN files f ON f.path = s.path WHERE f.path IS NULL"
+                )]
+                modified = [row[0] for row in db.execute(
+                    """
+                    SELECT s.path FROM scan s JOIN files f ON f.path = s.path
+                    WHERE s.size IS NOT f.size OR
+                          CASE WHEN f.mtime_ns IS NOT NULL THEN s.mtime_ns IS NOT f.mtime_ns
+                               ELSE s.modified IS NOT f.modified END
+                    """
+                )]
+                deleted = [row[0] for row in db.execute(
+                    "SELECT f.path FROM files f LEFT JOIN scan s ON s.path = f.path WHERE s.path IS NULL"
+                )]
+                db.execute("DELETE FROM scan")
+        return {"new": new, "modified": modified, "deleted": deleted}
+
+    # ===== WRITES =====
+
     def save_registry(self, registry_data: Dict[str, Any]) -> bool:
         """
-        Save registry to file with optional backup
+        Replace the whole registry (one transaction) with optional backup
         """
         try:
-            # Create data directory if it doesn't exist
-            self.data_dir.mkdir(parents=True, exist_ok=True)
-            
             # Backup current registry if enabled
-            if self.auto_backup and self.registry_file.exists():
+            if self.auto_backup:
                 self._create_backup()
-            
-            # Add metadata
-            dict_registry = dict(registry_data)
-            dict_registry["_metadata"] = {
-                "last_updated": datetime.now().isoformat(),
-                "total_files": len(dict_registry) - 1,  # Exclude metadata itself
-                "cache_strategy": config.FILE_CACHE_STRATEGY,
-                "auto_backup_enabled": self.auto_backup
-            }
-            
-            # Save registry
-            with open(self.registry_file, 'w', encoding='utf-8') as f:
-                json.dump(dict_registry, f, indent=2, ensure_ascii=False)
-            
-            logger.info(f"💾 Registry saved: {len(dict_registry)-1} files")
+
+            with self._lock:
+                self._open()
+                self._replace_all(registry_data)
+                total_files = self._count_files()
+
+            logger.info(f"💾 Registry saved: {total_files} files")
             return True
-            
+
         except Exception as e:
             logger.error(f"Error saving registry: {e}")
             return False
-    
+
     def update_registry(self, scan_results: Dict[str, Any]) -> bool:
-        """Update registry with scan results"""
+        """Update registry with scan results (batched upserts and deletes, one transaction)"""
         try:
-            current_registry = self.get_current_registry()
-            
-            # Update with changed files
-            for file_path, metadata in scan_results.get("changed_files", {}).items():
-                current_registry[file_path] = metadata
-            
-            # Remove deleted files
-            for file_path in scan_results.get("deleted_files", []):
-                current_registry.pop(file_path, None)
-            
-            # Save updated registry
-            return self.save_registry(current_registry)
-            
+            # Changed files and touched ones (same content, new mtime)
+            upserts = dict(scan_results.get("changed_files", {}))
+            upserts.update(scan_results.get("touched_files", {}))
+            deleted_files = scan_results.get("deleted_files", [])
+
+            with self._lock:
+                db = self._open()
+                with db:
+                    self._upsert(upserts)
+                    db.executemany("DELETE FROM files WHERE path = ?", [(file_path,) for file_path in deleted_files])
+                    self._set_directories(scan_results)
+                    self._touch_metadata()
+
+            logger.info(f"💾 Registry updated: {len(upserts)} upserted, {len(deleted_files)} deleted")
+            return True
+
         except Exception as e:
             logger.error(f"Error updating registry: {e}")
             return False
-    
+
     def rebuild_registry(self, scan_results: Dict[str, Any]) -> bool:
         """Completely rebuild registry"""
         try:
-            new_registry = scan_results.get("all_files", {})
+            new_registry = dict(scan_results.get("all_files", {}))
+            if "directories" in scan_results:
+                new_registry[_DIRECTORIES_KEY] = scan_results["directories"]
+                new_registry["_scan"] = self._scan_info(scan_results, self.get_meta("_scan"))
             return self.save_registry(new_registry)
-            
+
         except Exception as e:
             logger.error(f"Error rebuilding registry: {e}")
             return False
-    
-    def add_file(self, file_path: str, metadata: Dict[str, Any]) -> bool:
-        """Add single file to registry"""
+
+    @staticmethod
+    def _scan_info(scan_results: Dict[str, Any], previous: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        report = scan_results.get("scan_report") or {}
+        scan_info = dict(previous or {})
+        if not report.get("pruning"):
+            scan_info["full_verified_at"] = scan_results.get("timestamp", datetime.now().isoformat())
+        scan_info["last_report"] = report
+        return scan_info
+
+    def _set_directories(self, scan_results: Dict[str, Any]) -> None:
+        """Store the directory fingerprints used to prune unchanged subtrees on the next scan"""
+        if "directories" not in scan_results:
+            return
+        changed = self._write_directories(scan_results["directories"])
+        self._set_meta("_scan", self._scan_info(scan_results, self._get_meta("_scan")))
+        logger.debug(f"Directory fingerprints updated: {changed} rows")
+
+    def invalidate_directories(self, directories: Iterable[str]) -> int:
+        """
+        Drop the pruning fingerprint of these directories (the watcher saw changes in them):
+        the next change scan lists them again, which catches in-place edits that leave the directory mtime alone
+        """
         try:
-            current_registry = self.get_current_registry()
-            current_registry[file_path] = metadata
-            return self.save_registry(current_registry)
-            
+            with self._lock:
+                db = self._open()
+                with db:
+                    cursor = db.executemany(
+                        "UPDATE directories SET mtime_ns = NULL WHERE path = ? AND mtime_ns IS NOT NULL",
+                        [(directory,) for directory in set(directories)]
+                    )
+            return cursor.rowcount
+
         except Exception as e:
-            logger.error(f"Error adding file to registry: {e}")
+            logger.error(f"Error invalidating registry directories: {e}")
+            return 0
+
+    def add_files(self, files: Dict[str, Any]) -> bool:
+        """Add several files in one transaction"""
+        try:
+            with self._lock:
+                db = self._open()
+                with db:
+                    self._upsert(files)
+                    self._touch_metadata()
+            return True
+
+        except Exception as e:
+            logger.error(f"Error adding files to registry: {e}")
             return False
-    
+
+    def add_file(self, file_path: str, metadata: Dict[str, Any]) -> bool:
+        """Add single file to registry"""
+        return self.add_files({file_path: metadata})
+
     def remove_file(self, file_path: str) -> bool:
         """Remove single file from registry"""
         try:
-            current_registry = self.get_current_registry()
-            if file_path in current_registry:
-                del current_registry[file_path]
-                return self.save_registry(current_registry)
-            return True  # File wasn't in registry anyway
-            
+            with self._lock:
+                db = self._open()
+                with db:
+                    db.execute("DELETE FROM files WHERE path = ?", (file_path,))
+                    self._touch_metadata()
+            return True
+
         except Exception as e:
             logger.error(f"Error removing file from registry: {e}")
             return False
-    
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            if self._db is None and not self.db_path.exists() and not self.legacy_registry_file.exists():
+                # Never written: report it without creating an empty database
+                metadata, total_files = {}, 0
+            else:
+                self._open()
+                metadata = self._get_meta("_metadata") or {}
+                total_files = self._count_files()
+        return {
+            "total_files": total_files,
+            "registry_exists": bool(metadata) or total_files > 0,
+            "registry_size_bytes": self.db_path.stat().st_size if self.db_path.exists() else 0,
+            "last_modified": metadata.get("last_updated")
+        }
+
+    # ===== BACKUPS =====
+
     def _create_backup(self) -> None:
-        """Create backup of current registry"""
+        """Consistent snapshot with the SQLite online backup API (no copy of a half-written file)"""
         try:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            backup_file = self.data_dir / f"file_registry_backup_{timestamp}.json"
-            
-            # Copy current registry to backup
-            import shutil
-            shutil.copy2(self.registry_file, backup_file)
-            
+            backup_file = self.data_dir / f"file_registry_backup_{timestamp}.db"
+
+            with self._lock:
+                db = self._open()
+                if not self._count_files():
+                    return
+                with sqlite3.connect(str(backup_file)) as backup_db:
+                    db.backup(backup_db)
+                backup_db.close()
+
             logger.debug(f"Registry backup created: {backup_file}")
-            
+
             # Clean old backups (keep only last 5)
             self._cleanup_old_backups()
-            
+
         except Exception as e:
             logger.warning(f"Error creating registry backup: {e}")
-    
+
     def _cleanup_old_backups(self) -> None:
         """Keep only the 5 most recent backups"""
         try:
-            backup_files = list(self.data_dir.glob("file_registry_backup_*.json"))
+            backup_files = list(self.data_dir.glob("file_registry_backup_*.db"))
             backup_files.sort(key=lambda x: x.stat().st_mtime, reverse=True)
-            
+
             for old_backup in backup_files[5:]:
                 old_backup.unlink()
                 logger.debug(f"Old backup removed: {old_backup}")
-                
+
         except Exception as e:
-            logger.warning(f"Error cleaning old backups: {e}")
\ No newline at end of file
+            logger.warning(f"Error cleaning old backups: {e}")
+
+# Global instance
+registry_manager = RegistryManager()
@@ -4,59 +4,85 @@ Handles document scanning with centralized configuration
 """
 import logging
 import asyncio
+import os
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from datetime import datetime
-from typing import Dict, Any, List, Set
+from typing import Dict, Any, List, Optional, Set, Tuple
 from pathlib import Path
 from app.core.config import config
+from app.services.documents.content_hash import hash_files
 
 logger = logging.getLogger(__name__)
 
 class FileScanner:
+    # Only these need the file content for their registry metadata
+    CONTENT_EXTENSIONS = ['.txt', '.md', '.json']
+    READ_BLOCK_SIZE = 1024 * 1024
+    # Directories modified this recently are re-listed next scan (coarse mtime on some network filesystems)
+    RACY_WINDOW_NS = 2_000_000_000
+
     def __init__(self):
         self.documents_dir = config.DOCUMENTS_DIR
         self.supported_extensions = config.SUPPORTED_EXTENSIONS
         self.validation_strict = config.METADATA_VALIDATION_STRICT
+        self.workers = max(1, config.SCAN_WORKERS)
+        self.prune_directories = config.SCAN_PRUNE_DIRECTORIES
+        self.full_verify_seconds = config.SCAN_FULL_VERIFY_SECONDS
+        self.content_hash_enabled = config.CONTENT_HASH_ENABLED
+        self._extensions = {extension.lower() for extension in self.supported_extensions}
         logger.debug(f"FileScanner initialized (extensions: {self.supported_extensions})")
     
-    async def scan_for_changes(self) -> Dict[str, Any]:
+    async def scan_for_changes(self, prune: bool = True) -> Dict[str, Any]:
+        """
+        Registry diff of the documents directory
+        prune=False stats every file: in-place edits leave the directory mtime alone, so a pruned scan
+        only sees them in directories the inotify watcher invalidated (or at the next full verification)
+        """
         try:
             logger.info("Scanning for file changes")
             
-            # Get current registry
-            from app.services.documents.registry import RegistryManager
-            registry_manager = RegistryManager()
-            current_registry = registry_manager.get_current_registry()
+            from app.services.documents.registry import registry_manager
             
-            # Scan current files
-            current_files = await self._scan_directory()
+            # Scan current files (unchanged directories are pruned)
+            current_files, directories, scan_report = await self._scan_directory(registry_manager, prune)
             
-            # Compare with registry
-            changed_files = {}
-            deleted_files = []
+            # Compare with registry (indexed join in the registry database)
+            diff = await asyncio.to_thread(registry_manager.diff, current_files)
+            changed_files = {file_path: current_files[file_path] for file_path in diff["new"] + diff["modified"]}
+            deleted_files = diff["deleted"]
             
-            # Check for new or modified files
-            for file_path, metadata in current_files.items():
-                if file_path not in current_registry:
-                    # New file
-                    changed_files[file_path] = metadata
-                elif self._file_modified(metadata, current_registry[file_path]):
-                    # Modified file
-                    changed_files[file_path] = metadata
+            # mtime/size moved: only a different content hash counts as a change (copies, restores, rsync)
+            touched_files = {}
+            if self.content_hash_enabled and changed_files:
+                hashes = await asyncio.to_thread(hash_files, list(changed_files))
+                previous_entries = await asyncio.to_thread(registry_manager.get_entries, diff["modified"])
+                for file_path, file_hash in hashes.items():
+                    changed_files[file_path]["content_hash"] = file_hash
+                    previous = previous_entries.get(file_path)
+                    if file_hash and previous is not None and previous.get("content_hash") == file_hash:
+                        touched_files[file_path] = {**previous, **changed_files.pop(file_path)}
             
-            # Check for deleted files
-            for file_path in current_registry:
-                if file_path not in current_files and not file_path.startswith('_'):
-                    deleted_files.append(file_path)
+            # Only the changed files are read
+            await self._add_content_metadata(changed_files)
             
             result = {
                 "scan_type": "changes",
                 "changed_files": changed_files,
                 "deleted_files": deleted_files,
+                "touched_files": touched_files,
+                "directories": directories,
+                "scan_report": scan_report,
                 "total_current_files": len(current_files),
                 "timestamp": datetime.now().isoformat()
             }
             
-            logger.info(f"Change scan complete: {len(changed_files)} changed, {len(deleted_files)} deleted")
+            logger.info(
+                f"Change scan complete: {len(changed_files)} changed, {len(deleted_files)} deleted, "
+                f"{len(touched_files)} touched with identical content "
+                f"({scan_report['directories_skipped']}/{scan_report['directories_total']} directories skipped)"
+            )
             return result
             
         except Exception as e:
@@ -68,11 +94,19 @@ class FileScanner:
         try:
             logger.info("Performing full directory scan")
             
-            all_files = await self._scan_directory()
+            all_files, directories, scan_report = await self._scan_directory()
+            
+            # Unchanged files keep the content metadata already in the registry
+            from app.services.documents.registry import registry_manager
+            previous_entries = await asyncio.to_thread(registry_manager.get_entries, list(all_files))
+            await self._add_content_metadata(all_files, previous_entries)
+            await self._add_content_hashes(all_files)
             
             result = {
                 "scan_type": "full",
                 "all_files": all_files,
+                "directories": directories,
+                "scan_report": scan_report,
                 "total_files": len(all_files),
                 "timestamp": datetime.now().isoformat()
             }
@@ -89,25 +123,22 @@ class FileScanner:
         try:
             logger.info("Scanning for new files")
             
-            # Get current registry
-            from app.services.documents.registry import RegistryManager
-            registry_manager = RegistryManager()
-            current_registry = registry_manager.get_current_registry()
+            from app.services.documents.registry import registry_manager
             
-            # Scan current files
-            current_files = await self._scan_directory()
+            # Scan current files (new files only appear in directories whose mtime changed)
+            current_files, _, scan_report = await self._scan_directory(registry_manager)
             
             # Find new files
-            new_files = {
-                file_path: metadata 
-                for file_path, metadata in current_files.items()
-                if file_path not in current_registry
-            }
+            diff = await asyncio.to_thread(registry_manager.diff, current_files)
+            new_files = {file_path: current_files[file_path] for file_path in diff["new"]}
+            await self._add_content_metadata(new_files)
+            await self._add_content_hashes(new_files)
             
             result = {
                 "scan_type": "new",
                 "new_files": new_files,
                 "total_new_files": len(new_files),
+                "scan_report": scan_report,
                 "timestamp": datetime.now().isoformat()
             }
             
@@ -118,66 +149,238 @@ class FileScanner:
             logger.error(f"Error scanning for new files: {e}")
             raise
     
-    async def _scan_directory(self) -> Dict[str, Any]:
-        """Scan documents directory for supported files"""
-        files_metadata = {}
-        
+    async def _scan_directory(self, registry_manager=None, prune: bool = True) -> Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any]]:
+        """
+        Stat-only scan of the documents directory (runs off the event loop)
+        Returns (files, directory fingerprints, scan report); with a registry holding directory
+        fingerprints, unchanged directories reuse its entries instead of being listed
+        """
+        empty_report = self._new_report(False)
         if not self.documents_dir.exists():
             logger.warning(f"Documents directory doesn't exist: {self.documents_dir}")
-            return files_metadata
+            return {}, {}, empty_report
         
         try:
-            # Use asyncio to make scanning non-blocking
-            await asyncio.sleep(0)  # Yield control
-            
-            for file_path in self.documents_dir.rglob("*"):
-                if file_path.is_file() and self._is_supported_file(file_path):
-                    try:
-                        metadata = await self._extract_file_metadata(file_path)
-                        if metadata:
-                            files_metadata[str(file_path)] = metadata
-                    except Exception as e:
-                        logger.warning(f"Error processing file {file_path}: {e}")
-                        if not self.validation_strict:
-                            # Add basic metadata even if extraction fails
-                            files_metadata[str(file_path)] = {
-                                "size": file_path.stat().st_size,
-                                "modified": datetime.fromtimestamp(file_path.stat().st_mtime).isoformat(),
-                                "extension": file_path.suffix,
-                                "error": str(e)
-                            }
-            
-            return files_metadata
-            
+            return await asyncio.to_thread(self._walk, registry_manager, prune)
         except Exception as e:
             logger.error(f"Error scanning directory: {e}")
             raise
     
+    def scan_files(self) -> Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any]]:
+        """
+        Complete parallel stat-only scan (no pruning, no registry), for callers already off the event loop
+        Returns (files, directory fingerprints, scan report); the report also counts unsupported files
+        """
+        if not self.documents_dir.exists():
+            logger.warning(f"Documents directory doesn't exist: {self.documents_dir}")
+            return {}, {}, self._new_report(False)
+        return self._walk(None, prune=False)
+    
+    @staticmethod
+    def _new_report(pruning: bool) -> Dict[str, Any]:
+        return {
+            "pruning": pruning,
+            "directories_total": 0,
+            "directories_visited": 0,
+            "directories_skipped": 0,
+            "files_total": 0,
+            "files_visited": 0,
+            "files_skipped": 0,
+            "other_files": 0,
+            "other_size_bytes": 0,
+            "duration_ms": 0.0
+        }
+    
+    def _pruning_baseline(self, registry_manager, prune: bool = True) -> Optional[Dict[str, Any]]:
+        """Directory fingerprints usable for pruning, None when a full verification is due"""
+        if not prune or not self.prune_directories or registry_manager is None:
+            return None
+        directories = registry_manager.get_directories()
+        if not directories:
+            return None
+        # In-place edits do not touch the directory mtime: the inotify watcher invalidates the directories it saw
+        # change, and everything is re-verified periodically (edits made while no watcher was running, poll mode)
+        verified_at = (registry_manager.get_meta("_scan") or {}).get("full_verified_at")
+        if not verified_at or time.time() - datetime.fromisoformat(verified_at).timestamp() > self.full_verify_seconds:
+            logger.info("Full verification scan due - directory pruning disabled for this scan")
+            return None
+        return directories
+    
+    def _walk(self, registry_manager=None, prune: bool = True) -> Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any]]:
+        """
+        Parallel os.scandir walk: each directory is listed and its files stat'ed by a worker thread,
+        subdirectories are submitted as they are discovered (latency-bound on network volumes)
+        A directory whose mtime_ns matches its fingerprint had no entry added, removed or renamed:
+        its files are taken from the registry and only its known subdirectories are stat'ed
+        """
+        started = time.perf_counter()
+        baseline = self._pruning_baseline(registry_manager, prune)
+        report = self._new_report(baseline is not None)
+        
+        pruned_directories = []
+        files_metadata = {}
+        directories = {}
+        scan_timestamp = datetime.now().isoformat()
+        racy_before_ns = time.time_ns() - self.RACY_WINDOW_NS
+        
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="scan") as pool:
+            pending = {pool.submit(self._scan_one_directory, str(self.documents_dir), baseline, racy_before_ns)}
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    directory, fingerprint, files, subdirectories, other = future.result()
+                    if fingerprint is None:
+                        continue  # Vanished or unreadable
+                    directories[directory] = fingerprint
+                    report["directories_total"] += 1
+                    if files is None:
+                        report["directories_skipped"] += 1
+                        pruned_directories.append(directory)
+                    else:
+                        report["directories_visited"] += 1
+                        for path, stat in files:
+                            files_metadata[path] = self._stat_metadata(path, stat, scan_timestamp)
+                        report["files_visited"] += len(files)
+                        report["other_files"] += other[0]
+                        report["other_size_bytes"] += other[1]
+                    pending.update(
+                        pool.submit(self._scan_one_directory, subdirectory, baseline, racy_before_ns)
+                        for subdirectory in subdirectories
+                    )
+        
+        # Entries of the pruned directories come from the registry's directory index
+        if pruned_directories:
+            reused = registry_manager.get_files_in_directories(pruned_directories)
+            # Registry rows that no longer match the fingerprint's file count: list the directory after all
+            counts = Counter(os.path.dirname(path) for path in reused)
+            mismatched = {directory for directory in pruned_directories if counts[directory] != directories[directory].get("files")}
+            for directory in mismatched:
+                _, fingerprint, files, _, _ = self._scan_one_directory(directory, None, racy_before_ns)
+                report["directories_skipped"] -= 1
+                if fingerprint is None:
+                    directories.pop(directory)
+                    report["directories_total"] -= 1
+                    continue
+                directories[directory] = fingerprint
+                report["directories_visited"] += 1
+                for path, stat in files:
+                    files_metadata[path] = self._stat_metadata(path, stat, scan_timestamp)
+                report["files_visited"] += len(files)
+            reused = {path: metadata for path, metadata in reused.items() if os.path.dirname(path) not in mismatched}
+            report["files_skipped"] = len(reused)
+            files_metadata.update(reused)
+        
+        report["files_total"] = len(files_metadata)
+        report["duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        return files_metadata, directories, report
+    
+    def _scan_one_directory(self, directory: str, baseline: Optional[Dict[str, Any]] = None, racy_before_ns: int = 0):
+        """
+        Returns (directory, fingerprint, files, subdirectories, (other files, their size))
+        files is None when the directory is unchanged since its fingerprint (nothing listed)
+        """
+        try:
+            mtime_ns = os.stat(directory).st_mtime_ns
+        except OSError:
+            return directory, None, [], [], (0, 0)
+        
+        previous = (baseline or {}).get(directory)
+        if previous is not None and previous.get("mtime_ns") == mtime_ns:
+            subdirectories = [os.path.join(directory, name) for name in previous.get("subdirs", [])]
+            return directory, previous, None, subdirectories, (0, 0)
+        
+        files = []
+        subdirectories = []
+        other_files = other_size = 0
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirectories.append(entry.path)
+                        elif entry.is_file() and os.path.splitext(entry.name)[1].lower() in self._extensions:
+                            files.append((entry.path, entry.stat()))
+                        elif entry.is_file():
+                            other_files += 1
+                            other_size += entry.stat().st_size
+                    except OSError as e:
+                        logger.warning(f"Error processing file {entry.path}: {e}")
+        except OSError as e:
+            logger.warning(f"Error scanning directory {directory}: {e}")
+        
+        fingerprint = {
+            # Modified within the mtime granularity window: never trusted for pruning (like git's racy index)
+            "mtime_ns": mtime_ns if mtime_ns < racy_before_ns else None,
+            "files": len(files),
+            "subdirs": sorted(os.path.basename(path) for path in subdirectories)
+        }
+        return directory, fingerprint, files, subdirectories, (other_files, other_size)
+    
+    def _stat_metadata(self, path: str, stat: os.stat_result, scan_timestamp: str) -> Dict[str, Any]:
+        """Registry entry built from the stat result only (no file read)"""
+        name = os.path.basename(path)
+        return {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "mtime": stat.st_mtime,
+            "modified": datetime.fromtimestamp(stat.st_mtime).isoformat(),
+            "created": datetime.fromtimestamp(stat.st_ctime).isoformat(),
+            "extension": os.path.splitext(name)[1].lower(),
+            "name": name,
+            "relative_path": os.path.relpath(path, self.documents_dir),
+            "scan_timestamp": scan_timestamp
+        }
+    
     def _is_supported_file(self, file_path: Path) -> bool:
         """Check if file extension is supported"""
         return file_path.suffix.lower() in self.supported_extensions
     
+    async def _add_content_metadata(self, files: Dict[str, Any], previous: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Content-derived metadata (line count, JSON keys...) for the given files, in place
+        Entries unchanged since `previous` reuse its values instead of reading the file again
+        """
+        to_read = []
+        for file_path, metadata in files.items():
+            old = (previous or {}).get(file_path)
+            if isinstance(old, dict) and not self._file_modified(metadata, old):
+                metadata.update({key: value for key, value in old.items() if key not in metadata})
+            elif metadata.get("extension") in self.CONTENT_EXTENSIONS:
+                to_read.append(file_path)
+        
+        if not to_read:
+            return
+        
+        def read_all():
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="scan-content") as pool:
+                return list(pool.map(self._content_metadata, to_read))
+        
+        for file_path, content_metadata in zip(to_read, await asyncio.to_thread(read_all)):
+            files[file_path].update(content_metadata)
+        logger.debug(f"Content metadata extracted for {len(to_read)} files")
+    
+    async def _add_content_hashes(self, files: Dict[str, Any]) -> None:
+        """Hash the entries that have no content_hash yet (unchanged ones reuse the registry value)"""
+        if not self.content_hash_enabled:
+            return
+        to_hash = [file_path for file_path, metadata in files.items() if not metadata.get("content_hash")]
+        for file_path, file_hash in (await asyncio.to_thread(hash_files, to_hash)).items():
+            files[file_path]["content_hash"] = file_hash
+    
+    def _content_metadata(self, file_path: str) -> Dict[str, Any]:
+        extension = os.path.splitext(file_path)[1].lower()
+        if extension in ['.txt', '.md']:
+            return self._extract_text_metadata(Path(file_path))
+        if extension == '.json':
+            return self._extract_json_metadata(Path(file_path))
+        return {}
+    
     async def _extract_file_metadata(self, file_path: Path) -> Dict[str, Any]:
         """Extract metadata from file"""
         try:
-            stat = file_path.stat()
-            
-            metadata = {
-                "size": stat.st_size,
-                "modified": datetime.fromtimestamp(stat.st_mtime).isoformat(),
-                "created": datetime.fromtimestamp(stat.st_ctime).isoformat(),
-                "extension": file_path.suffix.lower(),
-                "name": file_path.name,
-                "relative_path": str(file_path.relative_to(self.documents_dir)),
-                "scan_timestamp": datetime.now().isoformat()
-            }
-            
-            # Add content-specific metadata based on file type
-            if file_path.suffix.lower() in ['.txt', '.md']:
-                metadata.update(await self._extract_text_metadata(file_path))
-            elif file_path.suffix.lower() == '.json':
-                metadata.update(await self._extract_json_metadata(file_path))
-            
+            stat = await asyncio.to_thread(file_path.stat)
+            metadata = self._stat_metadata(str(file_path), stat, datetime.now().isoformat())
+            metadata.update(await asyncio.to_thread(self._content_metadata, str(file_path)))
             return metadata
             
         except Exception as e:
@@ -186,22 +389,26 @@ class FileScanner:
                 raise
             return None
     
-    async def _extract_text_metadata(self, file_path: Path) -> Dict[str, Any]:
-        """Extract metadata from text files"""
+    def _extract_text_metadata(self, file_path: Path) -> Dict[str, Any]:
+        """Extract metadata from text files (streamed, the file is never fully loaded)"""
         try:
+            content_length = 0
+            newlines = 0
             with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
+                for block in iter(lambda: f.read(self.READ_BLOCK_SIZE), ''):
+                    content_length += len(block)
+                    newlines += block.count('\n')
             
             return {
-                "content_length": len(content),
-                "line_count": content.count('\n') + 1,
+                "content_length": content_length,
+                "line_count": newlines + 1,
                 "encoding": "utf-8"
             }
         except Exception as e:
             logger.warning(f"Error reading text file {file_path}: {e}")
             return {"content_error": str(e)}
     
-    async def _extract_json_metadata(self, file_path: Path) -> Dict[str, Any]:
+    def _extract_json_metadata(self, file_path: Path) -> Dict[str, Any]:
         """Extract metadata from JSON files"""
         try:
             import json
@@ -218,12 +425,13 @@ class FileScanner:
             return {"json_error": str(e), "valid_json": False}
     
     def _file_modified(self, current_metadata: Dict[str, Any], registry_metadata: Dict[str, Any]) -> bool:
-        """Check if file has been modified"""
+        """Check if file has been modified (mtime_ns + size, ISO 'modified' for older registry entries)"""
         try:
-            return (
-                current_metadata.get("modified") != registry_metadata.get("modified") or
-                current_metadata.get("size") != registry_metadata.get("size")
-            )
+            if current_metadata.get("size") != registry_metadata.get("size"):
+                return True
+            if "mtime_ns" in registry_metadata:
+                return current_metadata.get("mtime_ns") != registry_metadata["mtime_ns"]
+            return current_metadata.get("modified") != registry_metadata.get("modified")
         except Exception:
             return True  # Assume modified if comparison fails
     
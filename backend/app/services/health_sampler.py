@@ -0,0 +1,122 @@
+"""
+Health Sampler
+Samples CPU, memory, disk and component status in the background into a ring buffer
+/health reads the latest sample instead of measuring on the request path
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+from app.core.config import config
+
+logger = logging.getLogger(__name__)
+
+class HealthSampler:
+    """One sample every interval seconds, the last history_size samples are kept"""
+
+    def __init__(self, interval: int = 10, history_size: int = 360):
+        self.interval = max(1, interval)
+        self.samples: deque = deque(maxlen=max(1, history_size))
+        self.errors = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Start sampling (called from the startup event)"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"🩺 Health sampler started (every {self.interval}s, {self.samples.maxlen} samples kept)")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                self.samples.append(await asyncio.to_thread(self.take_sample))
+            except Exception as e:
+                self.errors += 1
+                logger.warning(f"⚠️ Health sample failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    # ===== SAMPLES =====
+
+    @staticmethod
+    def take_sample(cpu_interval: Optional[float] = None) -> Dict[str, Any]:
+        """
+        cpu_interval=None measures CPU since the previous call (non-blocking, the sampler's case);
+        a number blocks that long for a fresh reading (deep checks, run off the event loop)
+        """
+        import psutil
+
+        memory = psutil.virtual_memory()
+        disk = psutil.disk_usage(str(config.DATA_DIR))
+        process = psutil.Process()
+        return {
+            "timestamp": datetime.now().isoformat(),
+            "monotonic": time.monotonic(),
+            "system_metrics": {
+                "cpu_usage_percent": round(psutil.cpu_percent(interval=cpu_interval), 2),
+                "memory_usage_percent": round(memory.percent, 2),
+                "memory_total_gb": round(memory.total / (1024**3), 2),
+                "memory_available_gb": round(memory.available / (1024**3), 2),
+                "memory_used_gb": round(memory.used / (1024**3), 2),
+                "disk_usage_percent": round((disk.used / disk.total) * 100, 2),
+                "disk_total_gb": round(disk.total / (1024**3), 2),
+                "disk_free_gb": round(disk.free / (1024**3), 2),
+                "disk_used_gb": round(disk.used / (1024**3), 2),
+                "process_rss_mb": round(process.memory_info().rss / (1024**2), 1)
+            },
+            "components": HealthSampler._component_status()
+        }
+
+    @staticmethod
+    def _component_status() -> Dict[str, Any]:
+        """Cheap status flags only (the Ollama probe is TTL-cached by the client)"""
+        from app.services.qa.qa_service import qa_service
+        from app.services.qa.startup import startup_manager
+        from app.services.qa.ollama_client import ollama_client
+        from app.services.qa.document_watcher import document_watcher
+        from app.services.documents.catalog import document_catalog
+
+        ollama = ollama_client.probe()
+        return {
+            "ready": startup_manager.is_ready(),
+            "startup_phase": startup_manager.phase,
+            "qa_chain_ready": qa_service.qa_chain is not None,
+            "index_version": qa_service.index_version,
+            "ollama": ollama.get("status"),
+            "ollama_latency_ms": ollama.get("latency_ms"),
+            "watcher": document_watcher.backend if document_watcher.get_stats()["running"] else None,
+            "catalog_ready": document_catalog.ready,
+            "documents_indexed": document_catalog.indexed_count()
+        }
+
+    def latest(self) -> Optional[Dict[str, Any]]:
+        return self.samples[-1] if self.samples else None
+
+    def history(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        samples = list(self.samples)
+        return samples[-limit:] if limit else samples
+
+    def get_stats(self) -> Dict[str, Any]:
+        latest = self.latest()
+        return {
+            "running": self._task is not None,
+            "interval_seconds": self.interval,
+            "samples": len(self.samples),
+            "max_samples": self.samples.maxlen,
+            "errors": self.errors,
+            "last_sample_age_seconds": round(time.monotonic() - latest["monotonic"], 1) if latest else None
+        }
+
+# Global instance
+health_sampler = HealthSampler(
+    interval=config.HEALTH_SAMPLE_INTERVAL,
+    history_size=config.HEALTH_HISTORY_SIZE
+)
@@ -0,0 +1,280 @@
+"""
+Metrics
+Prometheus text exposition (format 0.0.4) served by GET /metrics, without an extra dependency
+Counters and histograms are updated on the request path, gauges are read from the services' get_stats() at scrape time
+"""
+import logging
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds, from a cached lookup to a long generation on CPU
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+TOKENS_PER_SECOND_BUCKETS = (1, 2, 5, 10, 15, 20, 30, 40, 60, 80, 100, 150, 200)
+
+# (labels, value) pairs of one metric family
+Samples = List[Tuple[Dict[str, Any], float]]
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(labels: Dict[str, Any]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+class _Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key: tuple) -> Dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        for name, labels, value in self.samples():
+            lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return lines
+
+    def samples(self) -> Iterator[Tuple[str, Dict[str, Any], float]]:
+        raise NotImplementedError
+
+class Counter(_Metric):
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[tuple, float] = {}
+        if not self.labelnames:
+            self._values[()] = 0
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for key, value in values.items():
+            yield self.name, self._labels(key), value
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+class Histogram(_Metric):
+    """Cumulative buckets, _sum and _count per label set"""
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._series: Dict[tuple, List] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # [per-bucket counts, sum, count]
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][index] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def samples(self):
+        with self._lock:
+            snapshot = {key: (list(counts), total, count) for key, (counts, total, count) in self._series.items()}
+        for key, (counts, total, count) in snapshot.items():
+            labels = self._labels(key)
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                yield f"{self.name}_bucket", {**labels, "le": _format_value(bound)}, cumulative
+            yield f"{self.name}_sum", labels, total
+            yield f"{self.name}_count", labels, count
+
+class MetricsRegistry:
+    """
+    Metrics owned by the registry plus collectors: callables returning
+    (name, type, help, samples) families built from the services' stats when /metrics is scraped
+    """
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], Iterable[Tuple[str, str, str, Samples]]]] = []
+
+        # ===== RAG REQUEST PATH =====
+        self.stage_seconds = self.histogram(
+            "rag_stage_duration_seconds",
+            "Duration of one RAG stage (retrieval and its query_embedding, vector_search, lexical_search, rerank steps; prompt_assembly; ollama_ttft; generation)",
+            ["stage"]
+        )
+        self.questions = self.counter("rag_questions_total", "Questions answered by endpoint and result", ["endpoint", "result"])
+        self.question_seconds = self.histogram("rag_question_duration_seconds", "End-to-end question latency", ["endpoint"])
+        self.generations_in_flight = self.gauge("rag_generations_in_flight", "Ollama generations currently running")
+
+        # ===== 🤖 OLLAMA =====
+        self.tokens_per_second = self.histogram(
+            "ollama_tokens_per_second", "Generation speed reported by Ollama (eval_count / eval_duration)",
+            buckets=TOKENS_PER_SECOND_BUCKETS
+        )
+        self.prompt_tokens = self.counter("ollama_prompt_tokens_total", "Prompt tokens evaluated by Ollama (prompt_eval_count)")
+        self.completion_tokens = self.counter("ollama_completion_tokens_total", "Tokens generated by Ollama (eval_count)")
+
+        # ===== ⚙️ INGESTION =====
+        self.ingested = self.counter("rag_ingested_total", "Items processed by the ingestion pipeline", ["kind"])
+        self.ingestion_seconds = self.counter("rag_ingestion_seconds_total", "Wall time spent in ingestion pipeline runs")
+
+        # ===== 🌐 HTTP =====
+        self.http_in_flight = self.gauge("http_requests_in_flight", "HTTP requests being handled")
+        self.http_seconds = self.histogram(
+            "http_request_duration_seconds", "Time until the response starts, by route", ["method", "route", "status"]
+        )
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def _register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector: Callable[[], Iterable[Tuple[str, str, str, Samples]]]) -> None:
+        self._collectors.append(collector)
+
+    @contextmanager
+    def stage(self, name: str, timings: Optional[Dict[str, float]] = None):
+        """Time a block into rag_stage_duration_seconds (and add it to timings when given)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - started
+            self.stage_seconds.observe(seconds, stage=name)
+            if timings is not None:
+                timings[name] = timings.get(name, 0.0) + seconds
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            try:
+                families = list(collector())
+            except Exception as e:
+                logger.warning(f"⚠️ Metrics collector {getattr(collector, '__name__', collector)} failed: {e}")
+                continue
+            for name, metric_type, documentation, samples in families:
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {metric_type}")
+                for labels, value in samples:
+                    if value is not None:
+                        lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+# ===== SCRAPE-TIME COLLECTORS =====
+
+def _collect_service_metrics():
+    """Queues, caches, ingestion rates and index size from the services' stats"""
+    from app.services.qa.qa_service import qa_service
+    from app.services.qa.batch_jobs import batch_job_manager
+    from app.services.qa.document_watcher import document_watcher
+    from app.services.documents.catalog import document_catalog
+
+    pending_questions = sum(
+        job["total"] - job["completed"] for job in list(batch_job_manager.jobs.values())
+        if job["status"] in ("queued", "running")
+    )
+    progress = qa_service.pipeline.get_progress()
+    yield "rag_queue_depth", "gauge", "Items waiting in a queue", [
+        ({"queue": "batch_questions"}, pending_questions),
+        ({"queue": "watcher_paths"}, document_watcher.get_stats()["pending_paths"]),
+        ({"queue": "ingestion_embed"}, progress.get("embed_queue_depth", 0)),
+        ({"queue": "ingestion_write"}, progress.get("write_queue_depth", 0))
+    ]
+    yield "rag_batch_jobs_running", "gauge", "Batch jobs currently running", [({}, batch_job_manager.get_stats()["running"])]
+    if qa_service.single_flight is not None:
+        yield "rag_coalescing_in_flight", "gauge", "Distinct questions being generated (single-flight leaders)", [
+            ({}, qa_service.single_flight.get_stats()["in_flight"])
+        ]
+
+    cache_stats = {
+        "embedding": qa_service.embedding_cache.get_stats() if qa_service.embedding_cache else None,
+        "answer": qa_service.answer_cache.get_stats() if qa_service.answer_cache else None,
+        "coalescing": qa_service.single_flight.get_stats() if qa_service.single_flight else None
+    }
+    yield "rag_cache_hit_ratio", "gauge", "Hit ratio since startup (coalescing: share of questions served by an identical in-flight one)", [
+        ({"cache": "embedding"}, cache_stats["embedding"] and cache_stats["embedding"]["hit_ratio"]),
+        ({"cache": "answer"}, cache_stats["answer"] and cache_stats["answer"]["hit_rate"]),
+        ({"cache": "coalescing"}, cache_stats["coalescing"] and cache_stats["coalescing"]["coalesced_ratio"])
+    ]
+    hits: Samples = []
+    misses: Samples = []
+    if cache_stats["embedding"]:
+        hits.append(({"cache": "embedding"}, cache_stats["embedding"]["hits"]))
+        misses.append(({"cache": "embedding"}, cache_stats["embedding"]["misses"]))
+    if cache_stats["answer"]:
+        hits.append(({"cache": "answer"}, cache_stats["answer"]["hits_exact"] + cache_stats["answer"]["hits_semantic"]))
+        misses.append(({"cache": "answer"}, cache_stats["answer"]["misses"]))
+    yield "rag_cache_hits_total", "counter", "Cache hits since startup", hits
+    yield "rag_cache_misses_total", "counter", "Cache misses since startup", misses
+
+    last_run = qa_service.pipeline.last_run
+    yield "rag_ingestion_last_run_per_second", "gauge", "Throughput of the last ingestion pipeline run", [
+        ({"kind": "files"}, last_run.get("files_per_second")),
+        ({"kind": "chunks"}, last_run.get("chunks_per_second")),
+        ({"kind": "embeddings"}, last_run.get("embeddings_per_second"))
+    ]
+    yield "rag_ingestion_running", "gauge", "1 while the ingestion pipeline runs", [({}, bool(progress.get("running")))]
+
+    yield "rag_documents", "gauge", "Supported documents on disk and in the active index", [
+        ({"state": "on_disk"}, document_catalog.file_count()),
+        ({"state": "indexed"}, document_catalog.indexed_count())
+    ]
+    yield "rag_ready", "gauge", "1 when the QA chain is ready", [({}, qa_service.qa_chain is not None)]
+
+# Global instance
+metrics = MetricsRegistry()
+metrics.register_collector(_collect_service_metrics)
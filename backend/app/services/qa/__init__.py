@@ -2,6 +2,12 @@
 QA Services package
 Exports the main qa_service for easy import
 """
-from .qa_service import qa_service
 
-__all__ = ['qa_service']
\ No newline at end of file
+__all__ = ['qa_service']
+
+def __getattr__(name):
+    # Resolved on first access: spawned ingestion workers import this package and must not build a QAService
+    if name == "qa_service":
+        from .qa_service import qa_service
+        return qa_service
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
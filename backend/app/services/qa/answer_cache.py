@@ -0,0 +1,224 @@
+"""
+Answer Cache
+Reuses generated answers for repeated questions (exact or semantically close)
+Entries are scoped to the index version and model, persisted in SQLite
+"""
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Callable
+
+logger = logging.getLogger(__name__)
+
+def normalize_question(question: str) -> str:
+    """Lowercase, collapse whitespace and drop trailing punctuation"""
+    normalized = re.sub(r"\s+", " ", question.strip().lower())
+    return normalized.rstrip(" ?!.;:")
+
+class AnswerCache:
+    """
+    LRU + TTL cache of answers
+    Lookup order: normalized question, then nearest question embedding above the similarity threshold
+    """
+
+    def __init__(
+        self,
+        db_path: Path,
+        embed_fn: Optional[Callable[[str], List[float]]] = None,
+        max_entries: int = 1000,
+        ttl_seconds: int = 86400,
+        similarity_threshold: float = 0.95
+    ):
+        self.db_path = Path(db_path)
+        self.embed_fn = embed_fn
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._scope: Optional[str] = None
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._matrix = None
+        self._matrix_keys: List[str] = []
+        self._embedding_memo: "OrderedDict[str, List[float]]" = OrderedDict()
+        self.stats = {
+            "hits_exact": 0,
+            "hits_semantic": 0,
+            "misses": 0,
+            "bypassed": 0,
+            "stores": 0,
+            "evictions": 0,
+            "expired": 0,
+            "invalidations": 0
+        }
+
+    # ===== STORAGE =====
+
+    def _open(self) -> None:
+        if self._db is not None:
+            return
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS answers ("
+            "scope TEXT NOT NULL, normalized TEXT NOT NULL, embedding TEXT, payload TEXT NOT NULL, "
+            "created REAL NOT NULL, last_used REAL NOT NULL, PRIMARY KEY (scope, normalized))"
+        )
+
+    def _use_scope(self, scope: str) -> None:
+        """Switch to a new scope: entries of any other index version/model are dropped"""
+        self._open()
+        if scope == self._scope:
+            return
+
+        if self._scope is not None:
+            self.stats["invalidations"] += 1
+            logger.info("🗑️ Answer cache invalidated (index version or model changed)")
+        self._db.execute("DELETE FROM answers WHERE scope != ?", (scope,))
+        self._db.commit()
+
+        self._scope = scope
+        self._entries.clear()
+        rows = self._db.execute(
+            "SELECT normalized, embedding, payload, created FROM answers WHERE scope = ? ORDER BY last_used",
+            (scope,)
+        ).fetchall()
+        for normalized, embedding, payload, created in rows:
+            self._entries[normalized] = {
+                "embedding": json.loads(embedding) if embedding else None,
+                "result": json.loads(payload),
+                "created": created
+            }
+        self._matrix = None
+
+    def _remove(self, normalized: str) -> None:
+        self._entries.pop(normalized, None)
+        self._db.execute("DELETE FROM answers WHERE scope = ? AND normalized = ?", (self._scope, normalized))
+        self._matrix = None
+
+    def _expired(self, entry: Dict[str, Any]) -> bool:
+        return self.ttl_seconds > 0 and time.time() - entry["created"] > self.ttl_seconds
+
+    def _touch(self, normalized: str) -> None:
+        self._entries.move_to_end(normalized)
+        self._db.execute(
+            "UPDATE answers SET last_used = ? WHERE scope = ? AND normalized = ?",
+            (time.time(), self._scope, normalized)
+        )
+        self._db.commit()
+
+    # ===== EMBEDDINGS =====
+
+    def _embed(self, normalized: str) -> Optional[List[float]]:
+        if self.embed_fn is None:
+            return None
+        if normalized in self._embedding_memo:
+            self._embedding_memo.move_to_end(normalized)
+            return self._embedding_memo[normalized]
+        embedding = self.embed_fn(normalized)
+        self._embedding_memo[normalized] = embedding
+        if len(self._embedding_memo) > 256:
+            self._embedding_memo.popitem(last=False)
+        return embedding
+
+    def _nearest(self, embedding: List[float]):
+        import numpy as np
+
+        if self._matrix is None:
+            self._matrix_keys = [key for key, entry in self._entries.items() if entry["embedding"]]
+            if not self._matrix_keys:
+                return None, 0.0
+            matrix = np.array([self._entries[key]["embedding"] for key in self._matrix_keys], dtype="float32")
+            self._matrix = matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+
+        query = np.array(embedding, dtype="float32")
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+        similarities = self._matrix @ query
+        best = int(similarities.argmax())
+        return self._matrix_keys[best], float(similarities[best])
+
+    # ===== PUBLIC API =====
+
+    def lookup(self, question: str, scope: str) -> Optional[Dict[str, Any]]:
+        """Return {"result", "match", "similarity"} on a hit, None otherwise"""
+        normalized = normalize_question(question)
+        with self._lock:
+            self._use_scope(scope)
+
+            entry = self._entries.get(normalized)
+            if entry is not None and self._expired(entry):
+                self.stats["expired"] += 1
+                self._remove(normalized)
+                self._db.commit()
+                entry = None
+            if entry is not None:
+                self._touch(normalized)
+                self.stats["hits_exact"] += 1
+                return {"result": entry["result"], "match": "exact", "similarity": 1.0}
+
+            embedding = self._embed(normalized) if self._entries else None
+            if embedding is not None:
+                key, similarity = self._nearest(embedding)
+                if key is not None and similarity >= self.similarity_threshold:
+                    entry = self._entries[key]
+                    if self._expired(entry):
+                        self.stats["expired"] += 1
+                        self._remove(key)
+                        self._db.commit()
+                    else:
+                        self._touch(key)
+                        self.stats["hits_semantic"] += 1
+                        return {"result": entry["result"], "match": "semantic", "similarity": round(similarity, 4)}
+
+            self.stats["misses"] += 1
+            return None
+
+    def store(self, question: str, scope: str, result: Dict[str, Any]) -> None:
+        normalized = normalize_question(question)
+        with self._lock:
+            self._use_scope(scope)
+            embedding = None
+            try:
+                embedding = self._embed(normalized)
+            except Exception as e:
+                logger.warning(f"⚠️ Answer cache: question embedding failed: {e}")
+
+            now = time.time()
+            self._entries[normalized] = {"embedding": embedding, "result": result, "created": now}
+            self._entries.move_to_end(normalized)
+            self._db.execute(
+                "INSERT OR REPLACE INTO answers (scope, normalized, embedding, payload, created, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (scope, normalized, json.dumps(embedding) if embedding else None,
+                 json.dumps(result, ensure_ascii=False, default=str), now, now)
+            )
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.stats["evictions"] += 1
+            self._db.commit()
+            self._matrix = None
+            self.stats["stores"] += 1
+
+    def record_bypass(self) -> None:
+        self.stats["bypassed"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        hits = self.stats["hits_exact"] + self.stats["hits_semantic"]
+        lookups = hits + self.stats["misses"]
+        return {
+            "enabled": True,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "similarity_threshold": self.similarity_threshold,
+            "scope": self._scope,
+            **self.stats,
+            "hit_rate": round(hits / lookups, 4) if lookups else None
+        }
@@ -0,0 +1,153 @@
+"""
+Batch Jobs
+Background answering of question batches, results by polling or callback URL
+"""
+import asyncio
+import logging
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+from app.core.config import config
+
+logger = logging.getLogger(__name__)
+
+class BatchJobManager:
+    """
+    Jobs live in memory (the most recent max_jobs are kept)
+    All jobs share one generation semaphore so batches never flood Ollama
+    """
+
+    def __init__(self, max_concurrency: int = 2, max_jobs: int = 100, callback_timeout: int = 30, callback_retries: int = 3):
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_jobs = max_jobs
+        self.callback_timeout = callback_timeout
+        self.callback_retries = callback_retries
+        self.jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # Created lazily so it binds to the running event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    def submit(self, questions: List[str], use_cache: bool = True, callback_url: Optional[str] = None) -> Dict[str, Any]:
+        """Register a job and start it in the background (must be called from the event loop)"""
+        job_id = uuid.uuid4().hex
+        job = {
+            "job_id": job_id,
+            "status": "queued",
+            "total": len(questions),
+            "completed": 0,
+            "failed": 0,
+            "questions": questions,
+            "results": [None] * len(questions),
+            "use_cache": use_cache,
+            "callback_url": callback_url,
+            "callback": None,
+            "created_at": datetime.now().isoformat(),
+            "started_at": None,
+            "finished_at": None,
+            "error": None
+        }
+        self.jobs[job_id] = job
+        self._evict()
+        self._tasks[job_id] = asyncio.create_task(self._run(job))
+        logger.info(f"********** 📦 BATCH JOB {job_id} QUEUED: {len(questions)} QUESTIONS **********")
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self.jobs.get(job_id)
+
+    def _evict(self) -> None:
+        """Drop the oldest finished jobs beyond max_jobs"""
+        for job_id in list(self.jobs):
+            if len(self.jobs) <= self.max_jobs:
+                break
+            if self.jobs[job_id]["status"] in ("completed", "failed"):
+                del self.jobs[job_id]
+
+    async def _run(self, job: Dict[str, Any]) -> None:
+        from app.services.qa.qa_service import qa_service
+
+        async def on_result(index: int, result: Dict[str, Any]) -> None:
+            job["results"][index] = result
+            job["completed"] += 1
+            if not result.get("success"):
+                job["failed"] += 1
+
+        job["status"] = "running"
+        job["started_at"] = datetime.now().isoformat()
+        try:
+            await qa_service.process_batch(
+                job["questions"],
+                use_cache=job["use_cache"],
+                semaphore=self._get_semaphore(),
+                on_result=on_result
+            )
+            job["status"] = "completed"
+        except Exception as e:
+            logger.error(f"********** ❌ BATCH JOB {job['job_id']} FAILED: {e} **********")
+            job["status"] = "failed"
+            job["error"] = str(e)
+        finally:
+            job["finished_at"] = datetime.now().isoformat()
+            self._tasks.pop(job["job_id"], None)
+
+        logger.info(
+            f"********** ✅ BATCH JOB {job['job_id']} {job['status'].upper()}: "
+            f"{job['completed']}/{job['total']} ANSWERED, {job['failed']} FAILED **********"
+        )
+        if job["callback_url"]:
+            await self._send_callback(job)
+
+    async def _send_callback(self, job: Dict[str, Any]) -> None:
+        """POST the finished job to its callback URL, retrying with backoff"""
+        import httpx
+
+        payload = self.to_response(job, include_results=True)
+        last_error = None
+        for attempt in range(1, self.callback_retries + 1):
+            try:
+                async with httpx.AsyncClient(timeout=self.callback_timeout) as client:
+                    response = await client.post(job["callback_url"], json=payload)
+                if response.status_code < 400:
+                    job["callback"] = {"delivered": True, "status_code": response.status_code, "attempts": attempt}
+                    return
+                last_error = f"HTTP {response.status_code}"
+            except Exception as e:
+                last_error = str(e)
+            logger.warning(f"⚠️ Batch callback attempt {attempt} failed for {job['job_id']}: {last_error}")
+            if attempt < self.callback_retries:
+                await asyncio.sleep(2 ** attempt)
+        job["callback"] = {"delivered": False, "error": last_error, "attempts": self.callback_retries}
+
+    @staticmethod
+    def to_response(job: Dict[str, Any], include_results: bool = True) -> Dict[str, Any]:
+        response = {key: value for key, value in job.items() if key not in ("questions", "results", "use_cache")}
+        if include_results:
+            # Aligned with the submitted questions, None while still pending
+            response["results"] = list(job["results"])
+        return response
+
+    def get_stats(self) -> Dict[str, Any]:
+        statuses: Dict[str, int] = {}
+        for job in self.jobs.values():
+            statuses[job["status"]] = statuses.get(job["status"], 0) + 1
+        return {
+            "jobs": len(self.jobs),
+            "running": len(self._tasks),
+            "by_status": statuses,
+            "max_concurrency": self.max_concurrency
+        }
+
+# Global instance
+batch_job_manager = BatchJobManager(
+    max_concurrency=config.BATCH_MAX_CONCURRENCY,
+    max_jobs=config.BATCH_MAX_JOBS,
+    callback_timeout=config.BATCH_CALLBACK_TIMEOUT,
+    callback_retries=config.BATCH_CALLBACK_RETRIES
+)
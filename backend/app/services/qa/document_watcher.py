@@ -0,0 +1,216 @@
+"""
+Document Watcher
+Picks up changes in DOCUMENTS_DIR and feeds only the touched paths to the incremental indexer
+"""
+import asyncio
+import logging
+import os
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Optional, Set
+
+from app.core.config import config
+
+logger = logging.getLogger(__name__)
+
+class DocumentWatcher:
+    """
+    Modes:
+        auto    -> inotify events (watchfiles), polling only if watchfiles is unavailable or the watch stops
+        inotify -> inotify events only
+        poll    -> polling only (bind mounts / network volumes where inotify events never arrive)
+        off     -> disabled
+    Events are debounced: a burst (copying a folder, an editor saving) becomes one index update
+    A poll is the registry change scan (as /smart_reload) without directory pruning, so in-place edits
+    are seen within one poll interval; only the paths it reports are indexed
+    Directories with events lose their registry fingerprint so the next pruned change scan re-lists them
+    """
+
+    def __init__(self, documents_dir: Path, mode: str = "auto", debounce_ms: int = 1500, poll_interval: int = 300):
+        self.documents_dir = Path(documents_dir)
+        self.mode = mode
+        self.debounce_seconds = debounce_ms / 1000
+        self.poll_interval = poll_interval
+        self.backend: Optional[str] = None
+        self._pending: Set[str] = set()
+        self._dirty_directories: Set[str] = set()
+        self._scanned: Dict[str, Any] = {}
+        self._full_scan_pending = False
+        self._wakeup: Optional[asyncio.Event] = None
+        self._tasks = []
+        self.events = 0
+        self.updates = 0
+        self.polls = 0
+        self.last_update: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+
+    def start(self) -> None:
+        """Start watching (called from the startup event)"""
+        if self._tasks or self.mode == "off":
+            return
+        self._wakeup = asyncio.Event()
+        self._tasks.append(asyncio.create_task(self._flush_loop()))
+
+        if self.mode in ("auto", "inotify"):
+            if self._inotify_available():
+                self.backend = "inotify"
+                self._tasks.append(asyncio.create_task(self._watch_events()))
+            else:
+                logger.warning("⚠️ inotify watcher unavailable (watchfiles not installed or not Linux) - polling only")
+        if self.backend is None:
+            self._start_polling()
+        logger.info(f"********** 👀 DOCUMENT WATCHER STARTED ({self.backend}) ON {self.documents_dir} **********")
+
+    def _start_polling(self) -> None:
+        self.backend = "poll"
+        self._tasks.append(asyncio.create_task(self._poll_loop()))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def reports_edits(self) -> bool:
+        """True while inotify events arrive: in-place edits then invalidate their directory fingerprint"""
+        return self.backend == "inotify" and bool(self._tasks)
+
+    @staticmethod
+    def _inotify_available() -> bool:
+        if not sys.platform.startswith("linux"):
+            return False
+        try:
+            import watchfiles  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    # ===== SOURCES =====
+
+    def _relative(self, path: str) -> Optional[str]:
+        """Relative path worth indexing, None for unsupported files and paths outside the documents dir"""
+        relative_path = os.path.relpath(path, self.documents_dir)
+        if relative_path.startswith(".."):
+            return None
+        suffix = Path(path).suffix.lower()
+        # Directories (created, moved or deleted as a whole) are expanded by the indexer
+        if suffix in config.SUPPORTED_EXTENSIONS or os.path.isdir(path) or (not suffix and not os.path.exists(path)):
+            return relative_path
+        return None
+
+    async def _watch_events(self) -> None:
+        from watchfiles import awatch
+
+        self.documents_dir.mkdir(parents=True, exist_ok=True)
+        try:
+            async for changes in awatch(self.documents_dir, debounce=int(self.debounce_seconds * 1000), recursive=True):
+                for _, path in changes:
+                    relative_path = self._relative(path)
+                    if relative_path is not None:
+                        self.events += 1
+                        self._pending.add(relative_path)
+                        self._dirty_directories.update((path, os.path.dirname(path)))
+                if self._pending:
+                    self._wakeup.set()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # e.g. inotify watch limit reached
+            self.error = str(e)
+            logger.error(f"********** ❌ INOTIFY WATCHER STOPPED: {e} **********")
+            if self.mode == "auto" and self.poll_interval > 0:
+                logger.warning("⚠️ Falling back to polling")
+                self._start_polling()
+
+    async def _poll_loop(self) -> None:
+        from app.core.dependencies import dependencies
+
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            self.polls += 1
+            smart_reload_service = dependencies.get_smart_reload_service()
+            try:
+                scan_results, paths = await smart_reload_service.scan_changes(prune=False)
+            except Exception as e:
+                self.error = str(e)
+                logger.error(f"********** ❌ WATCHER POLL FAILED: {e} **********")
+                continue
+            # The scan's content hashes are reused by the index update
+            self._scanned.update(smart_reload_service.scanned_hashes(scan_results))
+            if paths is None:
+                # Full verification scan: the index compares everything too
+                self._full_scan_pending = True
+            elif paths:
+                self._pending.update(paths)
+            else:
+                continue
+            self._wakeup.set()
+
+    # ===== INDEXING =====
+
+    async def _flush_loop(self) -> None:
+        """Single consumer: index updates never overlap, events arriving meanwhile are batched"""
+        from app.services.qa.qa_service import qa_service
+        from app.services.qa.startup import startup_manager
+        from app.services.documents.registry import registry_manager
+
+        while True:
+            await self._wakeup.wait()
+            # Quiet period: let the rest of the burst arrive
+            await asyncio.sleep(self.debounce_seconds)
+            # The initial indexation covers anything that changed before the backend was ready
+            while not startup_manager.is_ready():
+                await asyncio.sleep(self.debounce_seconds)
+            self._wakeup.clear()
+
+            full_scan = self._full_scan_pending
+            paths = None if full_scan else sorted(self._pending)
+            dirty_directories = self._dirty_directories
+            scanned = self._scanned
+            self._pending = set()
+            self._dirty_directories = set()
+            self._scanned = {}
+            self._full_scan_pending = False
+
+            try:
+                if dirty_directories:
+                    await asyncio.to_thread(registry_manager.invalidate_directories, dirty_directories)
+                result = await asyncio.to_thread(qa_service.update_index, paths, scanned)
+                self.updates += 1
+                self.last_update = {
+                    "paths": len(paths) if paths is not None else "all",
+                    **result
+                }
+                if any(result.get(key) for key in ("files_added", "files_modified", "files_deleted")):
+                    logger.info(
+                        f"********** 👀 WATCHER INDEXED +{result.get('files_added', 0)} "
+                        f"~{result.get('files_modified', 0)} -{result.get('files_deleted', 0)} FILES **********"
+                    )
+            except Exception as e:
+                self.error = str(e)
+                logger.error(f"********** ❌ WATCHER INDEX UPDATE FAILED: {e} **********")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "backend": self.backend,
+            "running": bool(self._tasks),
+            "debounce_seconds": self.debounce_seconds,
+            "poll_interval_seconds": self.poll_interval,
+            "events": self.events,
+            "pending_paths": len(self._pending),
+            "updates": self.updates,
+            "polls": self.polls,
+            "last_update": self.last_update,
+            "error": self.error,
+            "timestamp": datetime.now().isoformat()
+        }
+
+# Global instance
+document_watcher = DocumentWatcher(
+    documents_dir=config.DOCUMENTS_DIR,
+    mode=config.WATCHER_MODE,
+    debounce_ms=config.WATCHER_DEBOUNCE_MS,
+    poll_interval=config.FILE_SCAN_INTERVAL
+)
@@ -0,0 +1,207 @@
+"""
+Embedding Cache
+Persistent content-addressed cache of chunk embeddings
+Vectors live in a memory-mapped array, the key -> slot index in SQLite
+"""
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+class EmbeddingCache:
+    """
+    Maps sha256(model name + chunk text) to its vector
+    Bounded to max_entries; the least recently used entries are evicted first
+    """
+
+    def __init__(self, cache_dir: Path, model_name: str, max_entries: int = 500000, dtype: str = "float16"):
+        self.cache_dir = Path(cache_dir)
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.dtype = dtype
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._vectors = None
+        self._dimension: Optional[int] = None
+        self._count = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def make_key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode("utf-8")).hexdigest()
+
+    # ===== STORAGE =====
+
+    def _open(self) -> None:
+        if self._db is not None:
+            return
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.cache_dir / "index.sqlite"), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, slot INTEGER NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_last_used ON entries(last_used)")
+
+        meta = dict(self._db.execute("SELECT name, value FROM meta").fetchall())
+        if meta and (meta.get("dtype") != self.dtype or int(meta.get("capacity", 0)) != self.max_entries):
+            logger.warning("⚠️ Embedding cache layout changed - resetting cache")
+            self._reset()
+        elif meta.get("dimension"):
+            self._attach_vectors(int(meta["dimension"]))
+        self._count = self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def _reset(self) -> None:
+        self._db.execute("DELETE FROM entries")
+        self._db.execute("DELETE FROM meta")
+        self._db.commit()
+        vectors_file = self.cache_dir / "vectors.bin"
+        if vectors_file.exists():
+            vectors_file.unlink()
+        self._vectors = None
+        self._dimension = None
+        self._count = 0
+
+    def _attach_vectors(self, dimension: int) -> None:
+        import numpy as np
+
+        vectors_file = self.cache_dir / "vectors.bin"
+        mode = "r+" if vectors_file.exists() else "w+"
+        self._vectors = np.memmap(vectors_file, dtype=self.dtype, mode=mode, shape=(self.max_entries, dimension))
+        self._dimension = dimension
+        if mode == "w+":
+            self._db.executemany(
+                "INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)",
+                [("dimension", str(dimension)), ("dtype", self.dtype), ("capacity", str(self.max_entries))]
+            )
+            self._db.commit()
+
+    def _allocate_slots(self, count: int) -> List[int]:
+        """Free slots first, then slots of the least recently used entries"""
+        free = min(count, self.max_entries - self._count)
+        slots = list(range(self._count, self._count + free))
+        self._count += free
+
+        remaining = count - free
+        if remaining > 0:
+            evicted = self._db.execute(
+                "SELECT key, slot FROM entries ORDER BY last_used LIMIT ?", (remaining,)
+            ).fetchall()
+            self._db.executemany("DELETE FROM entries WHERE key = ?", [(key,) for key, _ in evicted])
+            slots.extend(slot for _, slot in evicted)
+            self.evictions += len(evicted)
+        return slots
+
+    def _lookup_slots(self, keys: List[str]) -> Dict[str, int]:
+        slots: Dict[str, int] = {}
+        for start in range(0, len(keys), 500):
+            batch = keys[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            rows = self._db.execute(
+                f"SELECT key, slot FROM entries WHERE key IN ({placeholders})", batch
+            ).fetchall()
+            slots.update(rows)
+        return slots
+
+    # ===== PUBLIC API =====
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        """Return the cached vectors for the keys that are present"""
+        if not keys:
+            return {}
+        with self._lock:
+            self._open()
+            found: Dict[str, List[float]] = {}
+            if self._vectors is not None:
+                for key, slot in self._lookup_slots(keys).items():
+                    found[key] = self._vectors[slot].astype("float32").tolist()
+
+                if found:
+                    now = time.time()
+                    self._db.executemany(
+                        "UPDATE entries SET last_used = ? WHERE key = ?", [(now, key) for key in found]
+                    )
+                    self._db.commit()
+
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+            return found
+
+    def put_many(self, keys: List[str], vectors: List[List[float]]) -> None:
+        if not keys:
+            return
+        with self._lock:
+            self._open()
+            if self._vectors is not None and len(vectors[0]) != self._dimension:
+                # Another embedding model (its keys never match the old entries): start over at the new shape
+                logger.warning(f"⚠️ Embedding dimension changed ({self._dimension} -> {len(vectors[0])}) - resetting cache")
+                self._reset()
+            if self._vectors is None:
+                self._attach_vectors(len(vectors[0]))
+
+            existing = self._lookup_slots(keys)
+            new_items = {key: vector for key, vector in zip(keys, vectors) if key not in existing}
+            if not new_items:
+                return
+
+            slots = self._allocate_slots(len(new_items))
+            now = time.time()
+            rows = []
+            for slot, (key, vector) in zip(slots, new_items.items()):
+                self._vectors[slot] = vector
+                rows.append((key, slot, now))
+            self._vectors.flush()
+            self._db.executemany("INSERT OR REPLACE INTO entries (key, slot, last_used) VALUES (?, ?, ?)", rows)
+            self._db.commit()
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": True,
+            "directory": str(self.cache_dir),
+            "model": self.model_name,
+            "dtype": self.dtype,
+            "dimension": self._dimension,
+            "entries": self._count,
+            "capacity": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            "evictions": self.evictions
+        }
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper: only chunks missing from the cache reach the model"""
+
+    def __init__(self, embeddings, cache: EmbeddingCache):
+        self.embeddings = embeddings
+        self.cache = cache
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [self.cache.make_key(text) for text in texts]
+        cached = self.cache.get_many(keys)
+
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in cached and key not in missing:
+                missing[key] = text
+
+        if missing:
+            vectors = self.embeddings.embed_documents(list(missing.values()))
+            computed = dict(zip(missing.keys(), vectors))
+            self.cache.put_many(list(computed.keys()), list(computed.values()))
+            cached.update(computed)
+
+        return [cached[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embeddings.embed_query(text)
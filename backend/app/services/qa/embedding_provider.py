@@ -0,0 +1,105 @@
+"""
+Embedding Provider
+Process-wide embedding model, loaded once and shared by indexing, validation and retrieval
+"""
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Any, Optional
+from app.core.config import config
+
+logger = logging.getLogger(__name__)
+
+class EmbeddingProvider:
+    """Lazily loads a single HuggingFaceEmbeddings instance and keeps it warm"""
+
+    def __init__(self, model_name: str, device: str = "cpu"):
+        self.model_name = model_name
+        self.device = device
+        self._embeddings: Optional[Any] = None
+        self._lock = threading.Lock()
+        self.loaded_at: Optional[str] = None
+        self.load_seconds: Optional[float] = None
+        self.warmup_seconds: Optional[float] = None
+        self.rss_delta_mb: Optional[float] = None
+        self.parameters_mb: Optional[float] = None
+
+    @staticmethod
+    def _process_rss_mb() -> Optional[float]:
+        try:
+            import psutil
+            return psutil.Process().memory_info().rss / (1024 * 1024)
+        except Exception:
+            return None
+
+    def _measure_parameters(self, embeddings) -> Optional[float]:
+        client = getattr(embeddings, "_client", None) or getattr(embeddings, "client", None)
+        try:
+            size = sum(p.numel() * p.element_size() for p in client.parameters())
+            return round(size / (1024 * 1024), 2)
+        except Exception:
+            return None
+
+    def get_embeddings(self):
+        """Return the shared model, loading it on first use"""
+        if self._embeddings is not None:
+            return self._embeddings
+
+        with self._lock:
+            if self._embeddings is None:
+                from langchain_huggingface import HuggingFaceEmbeddings
+
+                logger.info(f"********** 🧠 LOADING EMBEDDING MODEL {self.model_name} **********")
+                rss_before = self._process_rss_mb()
+                started = time.time()
+
+                embeddings = HuggingFaceEmbeddings(
+                    model_name=self.model_name,
+                    model_kwargs={'device': self.device}
+                )
+
+                self.load_seconds = round(time.time() - started, 3)
+                rss_after = self._process_rss_mb()
+                if rss_before is not None and rss_after is not None:
+                    self.rss_delta_mb = round(rss_after - rss_before, 2)
+                self.parameters_mb = self._measure_parameters(embeddings)
+                self.loaded_at = datetime.now().isoformat()
+                self._embeddings = embeddings
+                logger.info(f"********** ✅ EMBEDDING MODEL LOADED IN {self.load_seconds}s **********")
+
+        return self._embeddings
+
+    def warm_up(self) -> bool:
+        """Load the model and run one forward pass so the first real query pays no init cost"""
+        try:
+            embeddings = self.get_embeddings()
+            started = time.time()
+            embeddings.embed_query("warm-up")
+            self.warmup_seconds = round(time.time() - started, 3)
+            logger.info(f"********** 🔥 EMBEDDING MODEL WARMED UP IN {self.warmup_seconds}s **********")
+            return True
+        except Exception as e:
+            logger.warning(f"********** ⚠️ EMBEDDING WARM-UP FAILED: {e} **********")
+            return False
+
+    def is_loaded(self) -> bool:
+        return self._embeddings is not None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "model": self.model_name,
+            "device": self.device,
+            "loaded": self.is_loaded(),
+            "loaded_at": self.loaded_at,
+            "load_seconds": self.load_seconds,
+            "warmup_seconds": self.warmup_seconds,
+            "rss_delta_mb": self.rss_delta_mb,
+            "parameters_mb": self.parameters_mb
+        }
+
+# Global instance
+embedding_provider = EmbeddingProvider(
+    model_name=config.EMBEDDING_MODEL,
+    device=config.EMBEDDING_DEVICE
+)
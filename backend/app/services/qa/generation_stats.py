@@ -0,0 +1,38 @@
+"""
+Generation Stats
+Ollama's own counters for one generation (prompt/eval token counts and durations),
+read from the final response through the LLM end callback
+"""
+from typing import Any, Dict, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+_NANOSECONDS = 1e9
+
+class GenerationStats(BaseCallbackHandler):
+    """Pass as a callback to OllamaLLM.astream / ainvoke, then read summary()"""
+
+    def __init__(self):
+        self.info: Dict[str, Any] = {}
+
+    def on_llm_end(self, response, **kwargs: Any) -> None:
+        if response.generations and response.generations[0]:
+            self.info = dict(response.generations[0][0].generation_info or {})
+
+    def _seconds(self, key: str) -> Optional[float]:
+        value = self.info.get(key)
+        return round(value / _NANOSECONDS, 4) if value else None
+
+    def summary(self) -> Dict[str, Any]:
+        """Counts and seconds, None for what Ollama did not report"""
+        eval_count = self.info.get("eval_count")
+        eval_seconds = self._seconds("eval_duration")
+        return {
+            "prompt_tokens": self.info.get("prompt_eval_count"),
+            "prompt_eval_seconds": self._seconds("prompt_eval_duration"),
+            "completion_tokens": eval_count,
+            "eval_seconds": eval_seconds,
+            "load_seconds": self._seconds("load_duration"),
+            "total_seconds": self._seconds("total_duration"),
+            "tokens_per_second": round(eval_count / eval_seconds, 2) if eval_count and eval_seconds else None
+        }
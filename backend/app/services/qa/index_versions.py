@@ -0,0 +1,160 @@
+"""
+Index Versions
+Versioned index directories under CHROMA_DB_DIR with an atomically swapped CURRENT pointer
+
+    chroma_db/
+        CURRENT              -> active version id (replaced with os.replace)
+        HISTORY.json         -> activation history, most recent last
+        versions/<id>/       -> ChromaDB files, lexical_index.db, documents_cache.json
+"""
+import json
+import logging
+import os
+import shutil
+import threading
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class IndexVersionStore:
+    """Rebuilds go to a fresh version directory; activation is a single atomic rename"""
+
+    def __init__(self, root: Path, keep_versions: int = 2):
+        self.root = Path(root)
+        self.versions_dir = self.root / "versions"
+        self.keep_versions = max(0, keep_versions)
+        self._building: set = set()
+        self._lock = threading.Lock()
+
+    # ===== LAYOUT =====
+
+    def _current_file(self) -> Path:
+        return self.root / "CURRENT"
+
+    def _history_file(self) -> Path:
+        return self.root / "HISTORY.json"
+
+    def version_dir(self, version_id: str) -> Path:
+        return self.versions_dir / version_id
+
+    def _write_atomic(self, path: Path, content: str) -> None:
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def migrate_legacy_layout(self) -> Optional[str]:
+        """Move an unversioned chroma_db (files directly under root) into versions/<id>"""
+        if self._current_file().exists() or not self.root.exists():
+            return None
+        legacy_entries = [entry for entry in self.root.iterdir() if entry.name not in ("versions", "CURRENT", "HISTORY.json")]
+        if not any(entry.name.startswith("chroma.sqlite") for entry in legacy_entries):
+            return None
+
+        version_id = f"legacy-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+        target = self.version_dir(version_id)
+        target.mkdir(parents=True, exist_ok=True)
+        for entry in legacy_entries:
+            shutil.move(str(entry), str(target / entry.name))
+        self.activate(version_id, {"migrated": True})
+        logger.info(f"********** 📦 LEGACY CHROMADB MOVED TO VERSION {version_id} **********")
+        return version_id
+
+    # ===== VERSIONS =====
+
+    def current_id(self) -> Optional[str]:
+        try:
+            version_id = self._current_file().read_text(encoding="utf-8").strip()
+        except FileNotFoundError:
+            return None
+        return version_id if version_id and self.version_dir(version_id).exists() else None
+
+    def current_dir(self) -> Optional[Path]:
+        version_id = self.current_id()
+        return self.version_dir(version_id) if version_id else None
+
+    def create(self) -> Tuple[str, Path]:
+        """New empty version directory for a shadow build"""
+        version_id = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        directory = self.version_dir(version_id)
+        directory.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            self._building.add(version_id)
+        return version_id, directory
+
+    def discard(self, version_id: str) -> None:
+        """Remove an abandoned shadow build"""
+        with self._lock:
+            self._building.discard(version_id)
+        shutil.rmtree(self.version_dir(version_id), ignore_errors=True)
+
+    def history(self) -> List[Dict[str, Any]]:
+        try:
+            with open(self._history_file(), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return []
+
+    def activate(self, version_id: str, info: Optional[Dict[str, Any]] = None) -> None:
+        """Point CURRENT at version_id (atomic) and record it in the history"""
+        if not self.version_dir(version_id).exists():
+            raise ValueError(f"Unknown index version: {version_id}")
+        with self._lock:
+            self._building.discard(version_id)
+            history = [entry for entry in self.history() if entry["version"] != version_id]
+            history.append({"version": version_id, "activated_at": datetime.now().isoformat(), **(info or {})})
+            self._write_atomic(self._history_file(), json.dumps(history, indent=2, ensure_ascii=False))
+            self._write_atomic(self._current_file(), version_id)
+        logger.info(f"********** 🔀 INDEX VERSION {version_id} IS NOW ACTIVE **********")
+
+    def previous_id(self) -> Optional[str]:
+        """Most recently active version before the current one that still exists"""
+        current = self.current_id()
+        for entry in reversed(self.history()):
+            if entry["version"] != current and self.version_dir(entry["version"]).exists():
+                return entry["version"]
+        return None
+
+    def prune(self) -> List[str]:
+        """Keep the current version and the keep_versions most recent previous ones"""
+        current = self.current_id()
+        kept = {current}
+        for entry in reversed(self.history()):
+            if len(kept) > self.keep_versions:
+                break
+            kept.add(entry["version"])
+
+        removed = []
+        if not self.versions_dir.exists():
+            return removed
+        with self._lock:
+            building = set(self._building)
+        for directory in self.versions_dir.iterdir():
+            if directory.is_dir() and directory.name not in kept and directory.name not in building:
+                shutil.rmtree(directory, ignore_errors=True)
+                removed.append(directory.name)
+        if removed:
+            history = [entry for entry in self.history() if entry["version"] not in removed]
+            self._write_atomic(self._history_file(), json.dumps(history, indent=2, ensure_ascii=False))
+            logger.info(f"********** 🧹 PRUNED INDEX VERSIONS: {removed} **********")
+        return removed
+
+    def list_versions(self) -> List[Dict[str, Any]]:
+        current = self.current_id()
+        entries = {entry["version"]: entry for entry in self.history()}
+        versions = []
+        if self.versions_dir.exists():
+            for directory in sorted(self.versions_dir.iterdir()):
+                if not directory.is_dir():
+                    continue
+                versions.append({
+                    **entries.get(directory.name, {"version": directory.name}),
+                    "active": directory.name == current,
+                    "building": directory.name in self._building
+                })
+        return versions
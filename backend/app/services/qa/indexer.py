@@ -0,0 +1,124 @@
+"""
+Incremental Indexer
+Applies per-file changes to the Chroma collection instead of rebuilding it
+"""
+import logging
+from typing import Dict, Any, List, Callable, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+class IncrementalIndexer:
+    """Diffs document registries and updates the vectorstore file by file (keyed by relative_path)"""
+
+    def __init__(self, delete_batch_size: int = 500):
+        self.delete_batch_size = delete_batch_size
+
+    @staticmethod
+    def compute_changes(
+        current: Dict[str, Any],
+        cached: Dict[str, Any],
+        hasher: Optional[Callable[[Iterable[str]], Dict[str, Optional[str]]]] = None
+    ) -> Dict[str, List[str]]:
+        """
+        Return the added / modified / deleted relative paths between two registries
+        With a hasher, files whose mtime/size changed are hashed: an identical content_hash
+        (copy, restore, rsync) lands in "touched" instead of "modified" and is not re-embedded
+        Hashes are stored in the current registry entries (carried over when the stat is unchanged);
+        entries that already carry one (hashed by the registry scan) are not hashed again
+        """
+        added = []
+        stat_changed = []
+
+        for relative_path, file_info in current.items():
+            previous = cached.get(relative_path)
+            if previous is None:
+                added.append(relative_path)
+            elif (file_info.get('mtime') != previous.get('mtime') or
+                  file_info.get('size') != previous.get('size')):
+                stat_changed.append(relative_path)
+            elif previous.get('content_hash'):
+                file_info['content_hash'] = previous['content_hash']
+
+        modified = stat_changed
+        touched = []
+        if hasher is not None and (added or stat_changed):
+            to_hash = [relative_path for relative_path in added + stat_changed if not current[relative_path].get('content_hash')]
+            hashes = hasher([current[relative_path]['path'] for relative_path in to_hash]) if to_hash else {}
+            for relative_path in to_hash:
+                current[relative_path]['content_hash'] = hashes.get(current[relative_path]['path'])
+            modified = []
+            for relative_path in stat_changed:
+                new_hash = current[relative_path].get('content_hash')
+                if new_hash and new_hash == cached[relative_path].get('content_hash'):
+                    touched.append(relative_path)
+                else:
+                    modified.append(relative_path)
+
+        deleted = [relative_path for relative_path in cached if relative_path not in current]
+
+        return {
+            "added": sorted(added),
+            "modified": sorted(modified),
+            "deleted": sorted(deleted),
+            "touched": sorted(touched)
+        }
+
+    @staticmethod
+    def has_changes(changes: Dict[str, List[str]]) -> bool:
+        return any(changes.get(key) for key in ("added", "modified", "deleted"))
+
+    @staticmethod
+    def chunk_ids(chunks: List) -> List[str]:
+        """Stable chunk ids: '<relative_path>::<chunk number within the file>'"""
+        counters: Dict[str, int] = {}
+        ids = []
+        for chunk in chunks:
+            relative_path = chunk.metadata.get('relative_path') or chunk.metadata.get('source', 'unknown')
+            index = counters.get(relative_path, 0)
+            counters[relative_path] = index + 1
+            ids.append(f"{relative_path}::{index}")
+        return ids
+
+    def delete_files(self, vectorstore, relative_paths: List[str], lexical_index=None) -> None:
+        """Delete every chunk belonging to the given files"""
+        collection = vectorstore._collection
+        for start in range(0, len(relative_paths), self.delete_batch_size):
+            batch = relative_paths[start:start + self.delete_batch_size]
+            collection.delete(where={"relative_path": {"$in": batch}})
+        if lexical_index is not None:
+            lexical_index.delete_files(relative_paths, self.delete_batch_size)
+
+    def apply_changes(
+        self,
+        vectorstore,
+        changes: Dict[str, List[str]],
+        registry: Dict[str, Any],
+        index_files: Callable[[Any, Dict[str, Any]], Dict[str, Any]],
+        lexical_index=None
+    ) -> Dict[str, Any]:
+        """
+        Remove the chunks of every touched file, then re-embed added/modified files only
+        index_files(vectorstore, sub_registry) embeds and writes the given files
+        """
+        to_index = changes["added"] + changes["modified"]
+        # Added files are cleared too, in case a previous update was interrupted half-way
+        to_delete = to_index + changes["deleted"]
+
+        if to_delete:
+            logger.info(f"********** 🗑️ REMOVING CHUNKS OF {len(to_delete)} FILES **********")
+            self.delete_files(vectorstore, to_delete, lexical_index)
+
+        written = 0
+        if to_index:
+            logger.info(f"********** 📖 INDEXING {len(to_index)} CHANGED FILES **********")
+            stats = index_files(vectorstore, {key: registry[key] for key in to_index})
+            written = stats.get("chunks", 0)
+
+        logger.info(f"********** ✅ INCREMENTAL UPDATE: {written} CHUNKS WRITTEN **********")
+
+        return {
+            "files_added": len(changes["added"]),
+            "files_modified": len(changes["modified"]),
+            "files_deleted": len(changes["deleted"]),
+            "chunks_written": written
+        }
@@ -0,0 +1,278 @@
+"""
+Document ingestion
+Parallel loading and chunking of documents with a long-lived process pool
+"""
+import logging
+import multiprocessing
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple, Iterator
+
+logger = logging.getLogger(__name__)
+
+TEXT_EXTENSIONS = ['.txt', '.md', '.py', '.cs', ".js", ".cpp", ".c", ".ts", ".json", ".xml"]
+
+@lru_cache(maxsize=8)
+def _get_text_splitter(chunk_size: int, chunk_overlap: int):
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+    return RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap
+    )
+
+def _extract_pdf_manually(file_path: Path) -> str:
+    try:
+        import fitz
+        content = ""
+        with fitz.open(str(file_path)) as pdf:
+            for page in pdf:
+                content += page.get_text("text") + "\n"
+        return content
+    except Exception as e:
+        logger.warning(f"Manual PDF extraction failed: {e}")
+        return ""
+
+def _extract_word_manually(file_path: Path) -> str:
+    try:
+        from docx import Document
+        doc = Document(file_path)
+        content = ""
+        for paragraph in doc.paragraphs:
+            content += paragraph.text + "\n"
+        return content
+    except Exception as e:
+        logger.warning(f"Manual Word extraction failed: {e}")
+        return ""
+
+def _extract_powerpoint_manually(file_path: Path) -> str:
+    try:
+        from pptx import Presentation
+        prs = Presentation(file_path)
+        content = ""
+
+        for slide_num, slide in enumerate(prs.slides):
+            content += f"\n=== Slide {slide_num + 1} ===\n"
+            for shape in slide.shapes:
+                if hasattr(shape, "text") and shape.text:
+                    content += shape.text + "\n"
+
+        return content
+    except Exception as e:
+        logger.warning(f"Manual PowerPoint extraction failed: {e}")
+        return ""
+
+def _load_pdf(file_path: Path) -> List:
+    from langchain_community.document_loaders import PyPDFLoader, PyMuPDFLoader
+
+    for loader_class in (PyMuPDFLoader, PyPDFLoader):
+        try:
+            logger.info(f"********** 🔄 Trying {loader_class.__name__} for {file_path.name} **********")
+            docs = loader_class(str(file_path)).load()
+
+            total_content = "".join([doc.page_content for doc in docs])
+            if len(total_content.strip()) > 50:
+                logger.info(f"********** ✅ {loader_class.__name__} SUCCESS: {len(docs)} pages, {len(total_content)} chars **********")
+                return docs
+            logger.warning(f"********** ⚠️ {loader_class.__name__}: Content too short ({len(total_content)} chars) **********")
+        except Exception as e:
+            logger.warning(f"********** ⚠️ {loader_class.__name__} failed: {e} **********")
+
+    logger.info(f"********** 🔄 Trying manual PDF extraction for {file_path.name} **********")
+    content = _extract_pdf_manually(file_path)
+    if content and len(content.strip()) > 50:
+        from langchain.schema import Document
+        logger.info(f"********** ✅ Manual extraction SUCCESS: {len(content)} chars **********")
+        return [Document(page_content=content, metadata={"source": str(file_path), "page": 0})]
+
+    return []
+
+def _load_office_document(file_path: Path, loader_class, manual_extractor, doc_type: str) -> List:
+    try:
+        docs = loader_class(str(file_path)).load()
+        total_content = "".join([doc.page_content for doc in docs])
+        if len(total_content.strip()) > 10:
+            logger.info(f"********** ✅ {doc_type} SUCCESS: {len(total_content)} chars **********")
+            return docs
+        logger.warning(f"********** ⚠️ {doc_type}: Content too short ({len(total_content)} chars) **********")
+        return []
+    except Exception as e:
+        logger.warning(f"********** ❌ {doc_type} loading failed: {e} **********")
+
+    content = manual_extractor(file_path)
+    if content and len(content.strip()) > 10:
+        from langchain.schema import Document
+        logger.info(f"********** ✅ {doc_type} manual extraction SUCCESS: {len(content)} chars **********")
+        return [Document(page_content=content, metadata={"source": str(file_path), "type": doc_type.lower()})]
+    return []
+
+def _load_text(file_path: Path) -> List:
+    from langchain_community.document_loaders import TextLoader
+
+    for encoding in ['utf-8', 'latin-1', 'cp1252', 'iso-8859-1']:
+        try:
+            docs = TextLoader(str(file_path), encoding=encoding).load()
+            logger.info(f"********** ✅ Text file loaded with {encoding}: {len(docs[0].page_content) if docs else 0} chars **********")
+            return docs
+        except Exception:
+            continue
+
+    raise ValueError(f"Could not decode text file: {file_path.name}")
+
+def _load_and_chunk(path: Path, documents_dir: str, chunk_size: int, chunk_overlap: int) -> Tuple[List, Optional[str]]:
+    try:
+        from langchain_community.document_loaders import (
+            UnstructuredWordDocumentLoader,
+            UnstructuredPowerPointLoader
+        )
+
+        suffix = path.suffix.lower()
+        if suffix == '.pdf':
+            docs = _load_pdf(path)
+            if not docs:
+                return [], "All PDF extraction methods failed"
+        elif suffix in ['.doc', '.docx']:
+            docs = _load_office_document(path, UnstructuredWordDocumentLoader, _extract_word_manually, "Word")
+        elif suffix in ['.ppt', '.pptx']:
+            docs = _load_office_document(path, UnstructuredPowerPointLoader, _extract_powerpoint_manually, "PowerPoint")
+        elif suffix in TEXT_EXTENSIONS:
+            docs = _load_text(path)
+        else:
+            return [], f"Unsupported extension: {suffix}"
+
+        if not docs:
+            return [], "No content loaded"
+
+        relative_path = str(path.relative_to(Path(documents_dir)))
+        for doc in docs:
+            if 'source' not in doc.metadata:
+                doc.metadata['source'] = str(path)
+            doc.metadata['filename'] = path.name
+            doc.metadata['file_path'] = str(path)
+            doc.metadata['relative_path'] = relative_path
+
+        total_content = "".join([doc.page_content for doc in docs])
+        if len(total_content.strip()) < 10:
+            return [], f"Content too short: {len(total_content)} chars"
+
+        splits = _get_text_splitter(chunk_size, chunk_overlap).split_documents(docs)
+        return splits, None
+
+    except Exception as e:
+        return [], str(e)
+
+def load_and_chunk_file(
+    file_path: str,
+    documents_dir: str,
+    chunk_size: int,
+    chunk_overlap: int,
+    hash_content: bool = False
+) -> Tuple[List, Optional[str], Optional[str]]:
+    """
+    Load one file and split it into chunks
+    Module-level so it can run in a worker process. Returns (chunks, error, content hash)
+    hash_content: hash the file in the worker too, just before it is parsed (baseline of a full build)
+    """
+    path = Path(file_path)
+    file_hash = None
+    if hash_content:
+        from app.services.documents.content_hash import content_hash
+        file_hash = content_hash(file_path)
+    chunks, error = _load_and_chunk(path, documents_dir, chunk_size, chunk_overlap)
+    return chunks, error, file_hash
+
+class ParallelIngestor:
+    """
+    Parses and splits files concurrently, yielding results in a deterministic order
+    The worker processes are spawned on first use and reused by every later update (shutdown() stops them)
+    """
+
+    def __init__(self, documents_dir: str, chunk_size: int, chunk_overlap: int, workers: int = 1, hash_contents: bool = False):
+        self.documents_dir = documents_dir
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.workers = max(1, workers)
+        self.hash_contents = hash_contents
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # Spawned once: each new worker re-imports langchain and the document loaders (seconds)
+        with self._executor_lock:
+            if self._executor is None:
+                # spawn: forking a process that already holds torch threads can deadlock
+                context = multiprocessing.get_context("spawn")
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+            return self._executor
+
+    def _discard_executor(self, executor: ProcessPoolExecutor) -> None:
+        """Drop a broken pool (a worker died), the next call spawns a new one"""
+        with self._executor_lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self) -> None:
+        """Stop the worker processes (application shutdown)"""
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def iter_files(self, registry: Dict[str, Any]) -> Iterator[Tuple[str, List, Optional[str]]]:
+        """
+        Yield (relative_path, chunks, error) sorted by relative path
+        At most workers * 2 files are in flight, so results never pile up in memory
+        With hash_contents, entries without a content_hash get the one computed by the worker (set in place)
+        """
+        items = sorted(registry.items())
+        args = (self.documents_dir, self.chunk_size, self.chunk_overlap)
+
+        def hash_wanted(file_info: Dict[str, Any]) -> bool:
+            return self.hash_contents and not file_info.get('content_hash')
+
+        def finish(file_info: Dict[str, Any], file_hash: Optional[str]) -> None:
+            if file_hash:
+                file_info['content_hash'] = file_hash
+
+        if self.workers == 1 or len(items) <= 1:
+            for relative_path, file_info in items:
+                chunks, error, file_hash = load_and_chunk_file(file_info['path'], *args, hash_wanted(file_info))
+                finish(file_info, file_hash)
+                yield relative_path, chunks, error
+            return
+
+        pending = deque()
+        queue = iter(items)
+
+        def submit_next() -> None:
+            item = next(queue, None)
+            if item is not None:
+                relative_path, file_info = item
+                executor = self._get_executor()
+                future = executor.submit(load_and_chunk_file, file_info['path'], *args, hash_wanted(file_info))
+                pending.append((relative_path, file_info, executor, future))
+
+        try:
+            for _ in range(self.workers * 2):
+                submit_next()
+
+            while pending:
+                relative_path, file_info, executor, future = pending.popleft()
+                try:
+                    chunks, error, file_hash = future.result()
+                    finish(file_info, file_hash)
+                except BrokenProcessPool as e:
+                    self._discard_executor(executor)
+                    chunks, error = [], f"Worker failure: {e}"
+                except Exception as e:
+                    chunks, error = [], f"Worker failure: {e}"
+                submit_next()
+                yield relative_path, chunks, error
+        finally:
+            # Consumer stopped early: the pool outlives this call, so drop the work queued for it
+            for _, _, _, future in pending:
+                future.cancel()
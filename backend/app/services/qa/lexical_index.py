@@ -0,0 +1,190 @@
+"""
+Lexical Index
+BM25 keyword index over the same chunks as Chroma (SQLite FTS5)
+Catches exact tokens dense embeddings miss: error codes, identifiers, ticket IDs
+"""
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+# Terms found in fewer chunks than this are never treated as common, whatever the corpus size
+_MIN_COMMON_DOC_COUNT = 50
+
+def _fold_diacritics(token: str) -> str:
+    """Same folding as the unicode61 tokenizer (remove_diacritics): chunks_vocab holds 'procedure' for 'procédure'"""
+    return "".join(char for char in unicodedata.normalize("NFD", token) if not unicodedata.combining(char))
+
+class LexicalIndex:
+    """
+    chunks table (chunk_id, relative_path, content, metadata) + external-content FTS5 table kept in sync by triggers
+    Queries OR the query terms; common terms (in more than max_doc_freq of the chunks) are dropped,
+    since scoring their long posting lists dominates query time and they barely affect the ranking
+    """
+
+    def __init__(self, db_path: Path, max_query_terms: int = 32, max_doc_freq: float = 0.02):
+        self.db_path = Path(db_path)
+        self.max_query_terms = max_query_terms
+        self.max_doc_freq = max_doc_freq
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._count = 0
+        self._common_terms: Optional[frozenset] = None
+        self.queries = 0
+        self.query_seconds = 0.0
+
+    # ===== STORAGE =====
+
+    def _open(self) -> None:
+        if self._db is not None:
+            return
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS chunks (
+                id INTEGER PRIMARY KEY,
+                chunk_id TEXT UNIQUE NOT NULL,
+                relative_path TEXT,
+                content TEXT NOT NULL,
+                metadata TEXT
+            );
+            CREATE INDEX IF NOT EXISTS chunks_relative_path ON chunks(relative_path);
+            CREATE VIRTUAL TABLE IF NOT EXISTS chunks_fts USING fts5(
+                content, content='chunks', content_rowid='id', tokenize="unicode61 tokenchars '_'"
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS chunks_vocab USING fts5vocab(chunks_fts, 'row');
+            CREATE TRIGGER IF NOT EXISTS chunks_ai AFTER INSERT ON chunks BEGIN
+                INSERT INTO chunks_fts(rowid, content) VALUES (new.id, new.content);
+            END;
+            CREATE TRIGGER IF NOT EXISTS chunks_ad AFTER DELETE ON chunks BEGIN
+                INSERT INTO chunks_fts(chunks_fts, rowid, content) VALUES ('delete', old.id, old.content);
+            END;
+        """)
+        self._count = self._db.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    # ===== WRITES =====
+
+    def add(self, ids: List[str], texts: List[str], metadatas: List[Dict[str, Any]]) -> None:
+        """Insert or replace chunks (same ids as the Chroma collection)"""
+        if not ids:
+            return
+        with self._lock:
+            self._open()
+            self._db.executemany("DELETE FROM chunks WHERE chunk_id = ?", [(chunk_id,) for chunk_id in ids])
+            self._db.executemany(
+                "INSERT INTO chunks (chunk_id, relative_path, content, metadata) VALUES (?, ?, ?, ?)",
+                [
+                    (chunk_id, (metadata or {}).get("relative_path"), text, json.dumps(metadata or {}, ensure_ascii=False))
+                    for chunk_id, text, metadata in zip(ids, texts, metadatas)
+                ]
+            )
+            self._db.commit()
+            self._count = self._db.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def delete_files(self, relative_paths: List[str], batch_size: int = 500) -> None:
+        if not relative_paths:
+            return
+        with self._lock:
+            self._open()
+            for start in range(0, len(relative_paths), batch_size):
+                batch = relative_paths[start:start + batch_size]
+                placeholders = ",".join("?" * len(batch))
+                self._db.execute(f"DELETE FROM chunks WHERE relative_path IN ({placeholders})", batch)
+            self._db.commit()
+            self._count = self._db.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._open()
+            self._db.execute("DELETE FROM chunks")
+            self._db.execute("INSERT INTO chunks_fts(chunks_fts) VALUES ('rebuild')")
+            self._db.commit()
+            self._count = 0
+
+    def rebuild_from_collection(self, collection, batch_size: int = 1000) -> int:
+        """Fill the index from an existing Chroma collection (stores indexed before the lexical index existed)"""
+        self.clear()
+        offset = 0
+        while True:
+            page = collection.get(include=["documents", "metadatas"], limit=batch_size, offset=offset)
+            if not page["ids"]:
+                break
+            self.add(page["ids"], page["documents"], page["metadatas"])
+            offset += len(page["ids"])
+        logger.info(f"********** 🔤 LEXICAL INDEX REBUILT FROM CHROMA: {offset} CHUNKS **********")
+        return offset
+
+    def refresh_common_terms(self) -> int:
+        """Recompute the common-term set (full vocabulary scan); call after bulk index changes"""
+        with self._lock:
+            self._open()
+            self._refresh_common_terms()
+            return len(self._common_terms)
+
+    def _refresh_common_terms(self) -> None:
+        threshold = max(_MIN_COMMON_DOC_COUNT, int(self.max_doc_freq * self._count))
+        rows = self._db.execute("SELECT term FROM chunks_vocab WHERE doc > ?", (threshold,)).fetchall()
+        self._common_terms = frozenset(term for (term,) in rows)
+
+    def count(self) -> int:
+        with self._lock:
+            self._open()
+            return self._count
+
+    # ===== QUERIES =====
+
+    def _query_terms(self, query: str) -> List[str]:
+        terms = []
+        for token in _TOKEN_PATTERN.findall(query.lower()):
+            if (len(token) > 1 or token.isdigit()) and token not in terms:
+                terms.append(token)
+        if self._common_terms is None:
+            self._refresh_common_terms()
+        return [term for term in terms if _fold_diacritics(term) not in self._common_terms][:self.max_query_terms]
+
+    def search(self, query: str, limit: int = 20) -> List[Tuple[str, str, Dict[str, Any], float]]:
+        """Return (chunk_id, content, metadata, bm25) tuples, best first"""
+        started = time.perf_counter()
+        with self._lock:
+            self._open()
+            terms = self._query_terms(query)
+            if not terms:
+                return []
+            expression = " OR ".join(f'"{term}"' for term in terms)
+            rows = self._db.execute(
+                "SELECT c.chunk_id, c.content, c.metadata, chunks_fts.rank "
+                "FROM chunks_fts JOIN chunks c ON c.id = chunks_fts.rowid "
+                "WHERE chunks_fts MATCH ? ORDER BY chunks_fts.rank LIMIT ?",
+                (expression, limit)
+            ).fetchall()
+        self.queries += 1
+        self.query_seconds += time.perf_counter() - started
+        # FTS5 bm25() is negative (lower is better): flip it so higher is better
+        return [(chunk_id, content, json.loads(metadata or "{}"), -rank) for chunk_id, content, metadata, rank in rows]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": True,
+            "path": str(self.db_path),
+            "chunks": self._count,
+            "common_terms": len(self._common_terms) if self._common_terms is not None else None,
+            "queries": self.queries,
+            "avg_query_ms": round(self.query_seconds * 1000 / self.queries, 3) if self.queries else None
+        }
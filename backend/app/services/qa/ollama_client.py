@@ -0,0 +1,142 @@
+"""
+Ollama Client
+Shared keep-alive HTTP session to Ollama with a cached, non-generating health probe
+"""
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+from app.core.config import config
+
+logger = logging.getLogger(__name__)
+
+class OllamaClient:
+    """
+    One pooled requests.Session for every control-plane call (tags, probes, deep tests)
+    probe() hits /api/tags and checks the model is pulled; the result is cached for health_ttl seconds
+    """
+
+    def __init__(self, base_url: str, model: str, connect_timeout: int = 5, health_ttl: int = 15, pool_size: int = 4):
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.connect_timeout = connect_timeout
+        self.health_ttl = health_ttl
+        self.pool_size = pool_size
+        self._session = None
+        self._lock = threading.Lock()
+        self._last_probe: Optional[Dict[str, Any]] = None
+        self._last_probe_at = 0.0
+        self.probes = 0
+        self.probe_cache_hits = 0
+
+    @property
+    def session(self):
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    import requests
+                    from requests.adapters import HTTPAdapter
+
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                    session.mount("http://", adapter)
+                    session.mount("https://", adapter)
+                    self._session = session
+        return self._session
+
+    @staticmethod
+    def _model_present(model: str, names: List[str]) -> bool:
+        """'llama3' matches 'llama3:latest'"""
+        candidates = {model} if ":" in model else {model, f"{model}:latest"}
+        return any(name in candidates for name in names)
+
+    def list_models(self, timeout: Optional[int] = None) -> List[str]:
+        response = self.session.get(f"{self.base_url}/api/tags", timeout=timeout or self.connect_timeout)
+        response.raise_for_status()
+        return [model.get("name") or model.get("model") for model in response.json().get("models", [])]
+
+    def probe(self, force: bool = False) -> Dict[str, Any]:
+        """Cheap health check: Ollama reachable and model pulled, no generation"""
+        now = time.monotonic()
+        if not force and self._last_probe is not None and now - self._last_probe_at < self.health_ttl:
+            self.probe_cache_hits += 1
+            return {**self._last_probe, "cached": True}
+
+        import requests
+
+        self.probes += 1
+        started = time.perf_counter()
+        result: Dict[str, Any] = {"model": self.model, "api_url": self.base_url}
+        try:
+            names = self.list_models()
+            result["latency_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            result["available_models"] = names
+            if self._model_present(self.model, names):
+                result["status"] = "ok"
+            else:
+                result["status"] = "error"
+                result["error"] = f"Model '{self.model}' not found on Ollama"
+                result["suggestion"] = f"Try: docker exec rag-ollama ollama pull {self.model}"
+        except requests.exceptions.ConnectionError:
+            result["status"] = "error"
+            result["error"] = "Connection refused - Ollama service not ready"
+            result["suggestion"] = "Ensure Ollama container is running: docker-compose ps"
+        except Exception as e:
+            result["status"] = "error"
+            result["error"] = f"HTTP test failed: {str(e)}"
+
+        result["checked_at"] = datetime.now().isoformat()
+        if result["status"] != "ok":
+            logger.warning(f"⚠️ Ollama probe failed: {result['error']}")
+        self._last_probe = result
+        self._last_probe_at = now
+        return {**result, "cached": False}
+
+    def deep_test(self, prompt: str = "Hello", timeout: Optional[int] = None) -> Dict[str, Any]:
+        """Run a real (short) generation - only on explicit request, can take seconds on a cold model"""
+        started = time.perf_counter()
+        try:
+            response = self.session.post(
+                f"{self.base_url}/api/generate",
+                json={"model": self.model, "prompt": prompt, "stream": False, "options": {"num_predict": 16}},
+                timeout=(self.connect_timeout, timeout or config.OLLAMA_READ_TIMEOUT)
+            )
+            response.raise_for_status()
+            text = response.json().get("response", "")
+            logger.info(f"✅ Ollama generation test successful: {text[:50]}...")
+            return {
+                "status": "ok",
+                "model": self.model,
+                "response": text[:100],
+                "generation_seconds": round(time.perf_counter() - started, 3),
+                "api_url": self.base_url
+            }
+        except Exception as e:
+            logger.error(f"❌ Ollama generation test failed: {e}")
+            return {
+                "status": "error",
+                "model": self.model,
+                "error": str(e),
+                "api_url": self.base_url,
+                "suggestion": f"Model '{self.model}' might not be downloaded. Try: docker exec rag-ollama ollama pull {self.model}"
+            }
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "api_url": self.base_url,
+            "health_ttl_seconds": self.health_ttl,
+            "pool_size": self.pool_size,
+            "probes": self.probes,
+            "probe_cache_hits": self.probe_cache_hits,
+            "last_probe": self._last_probe
+        }
+
+# Global instance
+ollama_client = OllamaClient(
+    base_url=config.OLLAMA_BASE_URL,
+    model=config.OLLAMA_MODEL,
+    health_ttl=config.OLLAMA_HEALTH_TTL,
+    pool_size=config.OLLAMA_HTTP_POOL_SIZE
+)
@@ -0,0 +1,222 @@
+"""
+Embedding Pipeline
+Streams chunks through batched embedding and batched Chroma writes with bounded memory
+"""
+import logging
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple, Iterable
+
+from .indexer import IncrementalIndexer
+from app.services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+def _sanitize_metadata(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """Chroma only accepts scalar metadata values"""
+    return {
+        key: value for key, value in metadata.items()
+        if isinstance(value, (str, int, float, bool))
+    }
+
+class EmbeddingPipeline:
+    """
+    loader/splitter -> batched embedder -> batched Chroma writer
+    Each stage runs in its own thread, connected by bounded queues
+    """
+
+    def __init__(self, embed_batch_size: int = 64, write_batch_size: int = 1000, queue_size: int = 4):
+        self.embed_batch_size = max(1, embed_batch_size)
+        self.write_batch_size = max(1, write_batch_size)
+        self.queue_size = max(1, queue_size)
+        self.last_run: Dict[str, Any] = {}
+        self.progress: Dict[str, Any] = {"running": False}
+        self.last_errors: Dict[str, str] = {}
+
+    def get_progress(self) -> Dict[str, Any]:
+        """Snapshot of the running pipeline's counters"""
+        progress = dict(self.progress)
+        counters = progress.pop("counters", None)
+        queues = progress.pop("queues", None)
+        if counters:
+            progress.update({
+                "files_done": counters["files"],
+                "chunks_queued": counters["chunks"],
+                "chunks_embedded": counters["embeddings"],
+                "chunks_written": counters["written"]
+            })
+        if queues:
+            progress["embed_queue_depth"] = queues[0].qsize()
+            progress["write_queue_depth"] = queues[1].qsize()
+        return progress
+
+    @staticmethod
+    def _put(target: queue.Queue, item, stop: threading.Event) -> bool:
+        while not stop.is_set():
+            try:
+                target.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    @staticmethod
+    def _get(source: queue.Queue, stop: threading.Event):
+        while not stop.is_set():
+            try:
+                return source.get(timeout=0.5)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def run(
+        self,
+        files: Iterable[Tuple[str, List, Optional[str]]],
+        embeddings,
+        collection,
+        lexical_index=None,
+        files_total: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Consume (relative_path, chunks, error) tuples and write them to the Chroma collection
+        (and to the lexical index when given, with the same chunk ids)
+        Returns the run statistics; raises if the embedding or write stage failed
+        """
+        started = time.time()
+        embed_queue: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        write_queue: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        stop = threading.Event()
+        failures: List[Exception] = []
+        counters = {"files": 0, "chunks": 0, "embeddings": 0, "writes": 0, "written": 0, "embed_seconds": 0.0, "write_seconds": 0.0}
+        errors: Dict[str, str] = {}
+        self.progress = {
+            "running": True,
+            "files_total": files_total,
+            "started_at": datetime.now().isoformat(),
+            "counters": counters,
+            "queues": (embed_queue, write_queue)
+        }
+
+        def embed_stage() -> None:
+            try:
+                while True:
+                    batch = self._get(embed_queue, stop)
+                    if batch is _DONE:
+                        break
+                    ids, texts, metadatas = batch
+                    embed_started = time.time()
+                    vectors = embeddings.embed_documents(texts)
+                    counters["embed_seconds"] += time.time() - embed_started
+                    counters["embeddings"] += len(vectors)
+                    if not self._put(write_queue, (ids, texts, metadatas, vectors), stop):
+                        return
+            except Exception as e:
+                failures.append(e)
+                stop.set()
+            finally:
+                self._put(write_queue, _DONE, stop)
+
+        def write_stage() -> None:
+            buffer: Tuple[List, List, List, List] = ([], [], [], [])
+
+            def flush() -> None:
+                if not buffer[0]:
+                    return
+                write_started = time.time()
+                collection.upsert(
+                    ids=buffer[0],
+                    documents=buffer[1],
+                    metadatas=buffer[2],
+                    embeddings=buffer[3]
+                )
+                if lexical_index is not None:
+                    lexical_index.add(buffer[0], buffer[1], buffer[2])
+                counters["write_seconds"] += time.time() - write_started
+                counters["writes"] += 1
+                counters["written"] += len(buffer[0])
+                for part in buffer:
+                    part.clear()
+
+            try:
+                while True:
+                    batch = self._get(write_queue, stop)
+                    if batch is _DONE:
+                        break
+                    for part, values in zip(buffer, batch):
+                        part.extend(values)
+                    if len(buffer[0]) >= self.write_batch_size:
+                        flush()
+                if not stop.is_set():
+                    flush()
+            except Exception as e:
+                failures.append(e)
+                stop.set()
+
+        embedder = threading.Thread(target=embed_stage, name="embedding-stage", daemon=True)
+        writer = threading.Thread(target=write_stage, name="chroma-write-stage", daemon=True)
+        embedder.start()
+        writer.start()
+
+        pending: Tuple[List, List, List] = ([], [], [])
+        try:
+            for relative_path, chunks, error in files:
+                if stop.is_set():
+                    break
+                counters["files"] += 1
+                if error:
+                    errors[relative_path] = error
+                    logger.warning(f"********** ❌ {relative_path}: {error} **********")
+                    continue
+
+                for chunk_id, chunk in zip(IncrementalIndexer.chunk_ids(chunks), chunks):
+                    pending[0].append(chunk_id)
+                    pending[1].append(chunk.page_content)
+                    pending[2].append(_sanitize_metadata(chunk.metadata))
+                    if len(pending[0]) >= self.embed_batch_size:
+                        self._put(embed_queue, tuple(list(part) for part in pending), stop)
+                        for part in pending:
+                            part.clear()
+                counters["chunks"] += len(chunks)
+                logger.info(f"********** ✅ [{counters['files']}] {relative_path}: {len(chunks)} chunks queued **********")
+
+            if pending[0]:
+                self._put(embed_queue, pending, stop)
+        finally:
+            if hasattr(files, "close"):
+                files.close()
+            self._put(embed_queue, _DONE, stop)
+            embedder.join()
+            writer.join()
+            self.progress = {"running": False}
+
+        duration = time.time() - started
+        self.last_errors = errors
+        for kind in ("files", "chunks", "embeddings"):
+            metrics.ingested.inc(counters[kind], kind=kind)
+        metrics.ingestion_seconds.inc(duration)
+        self.last_run = {
+            "files": counters["files"],
+            "files_failed": len(errors),
+            "chunks": counters["chunks"],
+            "embeddings": counters["embeddings"],
+            "write_batches": counters["writes"],
+            "embed_batch_size": self.embed_batch_size,
+            "write_batch_size": self.write_batch_size,
+            "duration_seconds": round(duration, 2),
+            "embed_seconds": round(counters["embed_seconds"], 2),
+            "write_seconds": round(counters["write_seconds"], 2),
+            "files_per_second": round(counters["files"] / duration, 2) if duration > 0 else None,
+            "chunks_per_second": round(counters["chunks"] / duration, 2) if duration > 0 else None,
+            "embeddings_per_second": round(counters["embeddings"] / duration, 2) if duration > 0 else None,
+            "timestamp": datetime.now().isoformat()
+        }
+
+        if failures:
+            raise failures[0]
+
+        logger.info(f"********** 📊 PIPELINE DONE: {self.last_run} **********")
+        return self.last_run
@@ -4,15 +4,36 @@ Langchain + Ollama + ChromaDB integration
 """
 import os
 import json
+import asyncio
 import logging
 import time
 import gc
+import hashlib
+import threading
 from datetime import datetime
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, AsyncIterator, Awaitable, Callable, Iterable
 from pathlib import Path
 
+from .indexer import IncrementalIndexer
+from .ingestion import ParallelIngestor
+from .pipeline import EmbeddingPipeline
+from .embedding_provider import embedding_provider
+from .ollama_client import ollama_client
+from .retrieval import ScoredRetriever
+from .single_flight import SingleFlight
+from .index_versions import IndexVersionStore
+from .answer_cache import normalize_question
+from .generation_stats import GenerationStats
+from .request_profiler import request_profiler
+from app.core.config import config
+from app.services.metrics import metrics
+from app.services.documents.catalog import document_catalog
+
 logger = logging.getLogger(__name__)
 
+# Files picked up by the indexer (scan and watcher): the list the registry scanner uses too
+SUPPORTED_EXTENSIONS = config.SUPPORTED_EXTENSIONS
+
 class QAService:
     def __init__(self):
         # Basic configuration first
@@ -23,14 +44,56 @@ class QAService:
         self.chunk_size = getattr(config, 'CHUNK_SIZE', 1000)
         self.chunk_overlap = getattr(config, 'CHUNK_OVERLAP', 200)
         self.retrieval_k = getattr(config, 'RETRIEVAL_K', 5)
+        self.score_threshold = getattr(config, 'RETRIEVAL_SCORE_THRESHOLD', 0.0)
+        self.use_mmr = getattr(config, 'RETRIEVAL_USE_MMR', False)
+        self.fetch_k = getattr(config, 'RETRIEVAL_FETCH_K', 20)
+        self.mmr_lambda = getattr(config, 'RETRIEVAL_MMR_LAMBDA', 0.5)
+        self.hybrid_search = getattr(config, 'HYBRID_SEARCH_ENABLED', True)
+        self.rrf_k = getattr(config, 'HYBRID_RRF_K', 60)
+        self.rerank_enabled = getattr(config, 'RERANK_ENABLED', False)
+        self.rerank_candidates = getattr(config, 'RERANK_CANDIDATES', 20)
         self.embedding_model = getattr(config, 'EMBEDDING_MODEL', 'sentence-transformers/all-MiniLM-L6-v2')
         
         # Use the volumes paths from docker-compose
         self.persist_dir = str(config.CHROMA_DB_DIR)
         self.documents_dir = str(config.DOCUMENTS_DIR)
         
+        # Every full build goes to a new version directory, swapped in atomically once validated
+        self.versions = IndexVersionStore(
+            Path(self.persist_dir), keep_versions=getattr(config, 'INDEX_KEEP_VERSIONS', 2)
+        )
+        
         # QA Chain (will be initialized when needed)
         self.qa_chain: Optional[Any] = None
+        self.llm: Optional[Any] = None
+        self.vectorstore: Optional[Any] = None
+        self.indexer = IncrementalIndexer()
+        self.ingestor = ParallelIngestor(
+            documents_dir=self.documents_dir,
+            chunk_size=self.chunk_size,
+            chunk_overlap=self.chunk_overlap,
+            workers=getattr(config, 'INGESTION_WORKERS', 1),
+            hash_contents=getattr(config, 'CONTENT_HASH_ENABLED', True)
+        )
+        self.pipeline = EmbeddingPipeline(
+            embed_batch_size=getattr(config, 'EMBEDDING_BATCH_SIZE', 64),
+            write_batch_size=getattr(config, 'WRITE_BATCH_SIZE', 1000),
+            queue_size=getattr(config, 'PIPELINE_QUEUE_SIZE', 4)
+        )
+        self.embedding_cache: Optional[Any] = None
+        self.lexical_index: Optional[Any] = None
+        self.reranker: Optional[Any] = None
+        self.single_flight = SingleFlight() if getattr(config, 'REQUEST_COALESCING_ENABLED', False) else None
+        self.answer_cache: Optional[Any] = None
+        self.index_version: Optional[str] = None
+        self.init_phase: Optional[str] = None
+        self._index_lock = threading.RLock()
+        self._rebuild_lock = threading.Lock()
+        # update_index() calls made while a full build runs, replayed on the version it produces
+        self._building = False
+        self._deferred_paths: set = set()
+        self._deferred_full = False
+        self._init_lock = asyncio.Lock()
         self.last_initialization = None
         self.langchain_available = False
         
@@ -47,9 +110,13 @@ class QAService:
         logger.info(f"  API: {self.ollama_api}")
         logger.info(f"  Persist dir: {self.persist_dir}")
         logger.info(f"  Documents dir: {self.documents_dir}")
+        logger.info(f"  Ingestion workers: {self.ingestor.workers}")
         logger.info(f"  Langchain available: {self.langchain_available}")
     
     def get_files_registry(self) -> Dict[str, Any]:
+        """Supported files keyed by relative path, from the parallel stat-only FileScanner walk"""
+        from app.services.documents.scanner import FileScanner
+        
         registry = {}
         documents_path = Path(self.documents_dir)
         
@@ -60,33 +127,61 @@ class QAService:
             logger.error(f"❌ Documents directory doesn't exist: {documents_path}")
             return registry
         
+        report = {}
         try:
-            supported_extensions = [
-                '.pdf', '.txt', '.md', 
-                '.cs', '.py', ".js", ".cpp", ".c", ".ts",
-                ".json", ".xml",
-                '.doc', '.docx',            
-                '.ppt', '.pptx'     
-            ]
-            logger.info(f"📂 Supported extensions: {supported_extensions}")
-
-            for filepath in documents_path.rglob("*"):
-                if filepath.is_file() and filepath.suffix.lower() in supported_extensions:
-                    try:
-                        stat = filepath.stat()
-                        relative_path = filepath.relative_to(documents_path)
-                        registry[str(relative_path)] = {
-                            'path': str(filepath),
-                            'size': stat.st_size,
-                            'mtime': stat.st_mtime,
-                            'mtime_readable': datetime.fromtimestamp(stat.st_mtime).isoformat()
-                        }
-                    except Exception as e:
-                        logger.warning(f"Error processing file {filepath}: {e}")
+            logger.info(f"📂 Supported extensions: {SUPPORTED_EXTENSIONS}")
+            files, _, report = FileScanner().scan_files()
+            for path, metadata in files.items():
+                registry[metadata['relative_path']] = {
+                    'path': path,
+                    'size': metadata['size'],
+                    'mtime': metadata['mtime'],
+                    'mtime_readable': metadata['modified']
+                }
         except Exception as e:
             logger.error(f"Error scanning documents directory: {e}")
         
-        logger.info(f"Found {len(registry)} supported files")
+        # Every full walk refreshes the in-memory catalog read by stats/health endpoints
+        document_catalog.replace(registry, report.get("other_files", 0), report.get("other_size_bytes", 0))
+        logger.info(f"Found {len(registry)} supported files ({report.get('duration_ms')} ms)")
+        return registry
+    
+    @staticmethod
+    def _registry_entry(filepath: Path) -> Dict[str, Any]:
+        stat = filepath.stat()
+        return {
+            'path': str(filepath),
+            'size': stat.st_size,
+            'mtime': stat.st_mtime,
+            'mtime_readable': datetime.fromtimestamp(stat.st_mtime).isoformat()
+        }
+    
+    def _registry_with_paths(self, cached: Dict[str, Any], relative_paths: Iterable[str]) -> Dict[str, Any]:
+        """
+        Cached registry with only the given paths re-read from disk (no full rglob)
+        A path can be a file or a directory (created, moved or deleted as a whole)
+        """
+        registry = dict(cached)
+        documents_path = Path(self.documents_dir)
+        
+        for relative_path in relative_paths:
+            prefix = relative_path.rstrip("/") + "/"
+            for key in [key for key in registry if key == relative_path or key.startswith(prefix)]:
+                del registry[key]
+            
+            filepath = documents_path / relative_path
+            if filepath.is_dir():
+                candidates = filepath.rglob("*")
+            elif filepath.is_file():
+                candidates = [filepath]
+            else:
+                continue  # Deleted
+            for candidate in candidates:
+                if candidate.is_file() and candidate.suffix.lower() in SUPPORTED_EXTENSIONS:
+                    try:
+                        registry[str(candidate.relative_to(documents_path))] = self._registry_entry(candidate)
+                    except OSError as e:
+                        logger.warning(f"Error processing file {candidate}: {e}")
         return registry
     
     def initialize_qa_chain(self, force_rebuild: bool = False) -> bool:
@@ -103,7 +198,6 @@ class QAService:
                 from langchain_community.document_loaders import PyPDFLoader, TextLoader
                 from langchain.text_splitter import RecursiveCharacterTextSplitter
                 from langchain.chains import RetrievalQA
-                from langchain_huggingface import HuggingFaceEmbeddings
                 from langchain_chroma import Chroma
                 from langchain_ollama import OllamaLLM
                 import os
@@ -121,6 +215,7 @@ class QAService:
             logger.info(f"********** ⏱️ Using timeouts - Connect: {connect_timeout}s, Read: {read_timeout}s **********")
             
             # Test Ollama connection
+            self.init_phase = "checking_ollama"
             logger.info("********** 🔗 TESTING OLLAMA CONNECTION **********")
             ollama_test = self.test_ollama_connection()
             
@@ -133,10 +228,10 @@ class QAService:
             logger.info("********** 📁 SETTING UP CHROMADB DIRECTORY **********")
             persist_dir_path = Path(self.persist_dir)
             persist_dir_path.mkdir(parents=True, exist_ok=True)
+            self.versions.migrate_legacy_layout()
+            index_dir = self.versions.current_dir()
             
-            # ✅ FICHIERS DE CACHE
-            cache_metadata_file = persist_dir_path / "documents_cache.json"
-            
+            self.init_phase = "scanning_documents"
             logger.info("********** 📄 SCANNING DOCUMENTS **********")
             current_registry = self.get_files_registry()
             if not current_registry:
@@ -149,33 +244,37 @@ class QAService:
                     # num_predict=100 
                     )
                 self.qa_chain = llm
+                self.llm = llm
+                self.vectorstore = None
+                self.index_version = "no-documents"
                 self.last_initialization = datetime.now().isoformat()
                 logger.info("********** ✅ BASIC LLM INITIALIZED **********")
+                self.init_phase = "initialized"
                 return True
             
             logger.info(f"********** 📄 FOUND {len(current_registry)} DOCUMENTS **********")
             
             needs_rebuild = force_rebuild
-            cached_registry = {}
+            changes = None
             
-            if cache_metadata_file.exists() and not force_rebuild:
+            if index_dir is not None and self._documents_cache_path(index_dir).exists() and not force_rebuild:
                 try:
-                    logger.info("********** 📋 CHECKING DOCUMENT CACHE **********")
-                    with open(cache_metadata_file, 'r', encoding='utf-8') as f:
-                        cached_registry = json.load(f)
+                    logger.info(f"********** 📋 CHECKING DOCUMENT CACHE (INDEX VERSION {self.versions.current_id()}) **********")
+                    cached_registry = self._load_documents_cache()
+                    changes = self.indexer.compute_changes(current_registry, cached_registry, self._get_hasher())
                     
-                    if self._compare_registries(current_registry, cached_registry):
-                        logger.info("********** ✅ DOCUMENTS UNCHANGED - CHECKING CHROMADB **********")
-                        
-                        if self._is_chromadb_valid(persist_dir_path):
-                            logger.info("********** ✅ CHROMADB VALID - SKIPPING INDEXATION **********")
-                            needs_rebuild = False
-                        else:
-                            logger.info("********** ⚠️ CHROMADB INVALID - REBUILD NEEDED **********")
-                            needs_rebuild = True
-                    else:
-                        logger.info("********** 📝 DOCUMENTS CHANGED - REBUILD NEEDED **********")
+                    if not self._is_chromadb_valid(index_dir):
+                        logger.info("********** ⚠️ CHROMADB INVALID - REBUILD NEEDED **********")
                         needs_rebuild = True
+                    elif self.indexer.has_changes(changes):
+                        logger.info(
+                            f"********** 📝 DOCUMENTS CHANGED - INCREMENTAL UPDATE "
+                            f"(+{len(changes['added'])} ~{len(changes['modified'])} -{len(changes['deleted'])}) **********"
+                        )
+                    else:
+                        logger.info("********** ✅ CHROMADB VALID - SKIPPING INDEXATION **********")
+                    if changes["touched"]:
+                        logger.info(f"********** 🔏 {len(changes['touched'])} FILES TOUCHED WITH IDENTICAL CONTENT - NOT RE-EMBEDDED **********")
                         
                 except Exception as e:
                     logger.warning(f"********** ⚠️ CACHE READ ERROR: {e} - REBUILDING **********")
@@ -184,50 +283,51 @@ class QAService:
                 logger.info("********** 📝 NO CACHE FOUND - FULL BUILD NEEDED **********")
                 needs_rebuild = True
             
-            logger.info("********** 🧠 LOADING EMBEDDING MODEL **********")
-            embeddings = HuggingFaceEmbeddings(
-                model_name=self.embedding_model,
-                model_kwargs={'device': 'cpu'}
-            )
+            self.init_phase = "loading_embedding_model"
+            logger.info("********** 🧠 GETTING SHARED EMBEDDING MODEL **********")
+            embeddings = self._get_embeddings()
             
             if needs_rebuild:
+                self.init_phase = "indexing"
                 logger.info("********** 🔄 REBUILDING DOCUMENT INDEX **********")
-                
-                if force_rebuild and persist_dir_path.exists():
-                    import shutil
-                    shutil.rmtree(persist_dir_path)
-                    persist_dir_path.mkdir(parents=True, exist_ok=True)
-                    logger.info("********** 🔄 CHROMADB RESET FOR REBUILD **********")
-                
-                documents = self._load_and_chunk_documents(current_registry)
-                
-                if not documents:
-                    logger.error("********** ❌ NO DOCUMENTS COULD BE LOADED **********")
+                if not self._rebuild_lock.acquire(blocking=False):
+                    logger.warning("********** ⚠️ AN INDEX BUILD IS ALREADY RUNNING **********")
                     return False
-                
-                logger.info(f"********** 📊 CREATING VECTORSTORE WITH {len(documents)} CHUNKS **********")
-                vectorstore = Chroma.from_documents(
-                    documents=documents,
-                    embedding=embeddings,
-                    persist_directory=str(persist_dir_path)
-                )
-                
-                logger.info("********** 💾 SAVING DOCUMENTS CACHE **********")
+                with self._index_lock:
+                    self._building = True
                 try:
-                    with open(cache_metadata_file, 'w', encoding='utf-8') as f:
-                        json.dump(current_registry, f, indent=2, ensure_ascii=False)
-                    logger.info("********** ✅ CACHE SAVED **********")
-                except Exception as e:
-                    logger.warning(f"********** ⚠️ CACHE SAVE ERROR: {e} **********")
-                
+                    built = self._build_shadow_version(embeddings, current_registry)
+                finally:
+                    self._rebuild_lock.release()
+                if built is None:
+                    self._replay_deferred_updates()
+                    return False
+                vectorstore, lexical_index, version_id, build_info = built
             else:
-                logger.info("********** ⚡ LOADING EXISTING CHROMADB **********")
-                vectorstore = Chroma(
-                    embedding_function=embeddings,
-                    persist_directory=str(persist_dir_path)
-                )
-                logger.info("********** ✅ EXISTING VECTORSTORE LOADED **********")
+                with self._index_lock:
+                    self.init_phase = "loading_index"
+                    logger.info("********** ⚡ LOADING EXISTING CHROMADB **********")
+                    vectorstore = Chroma(
+                        embedding_function=embeddings,
+                        persist_directory=str(index_dir)
+                    )
+                    logger.info("********** ✅ EXISTING VECTORSTORE LOADED **********")
+                    
+                    lexical_index = self._get_lexical_index()
+                    if lexical_index is not None and lexical_index.count() != vectorstore._collection.count():
+                        logger.info("********** 🔤 LEXICAL INDEX OUT OF SYNC - REBUILDING FROM CHROMADB **********")
+                        lexical_index.rebuild_from_collection(vectorstore._collection)
+                    
+                    if changes and self.indexer.has_changes(changes):
+                        self.init_phase = "updating_index"
+                        self.indexer.apply_changes(
+                            vectorstore, changes, current_registry, self._index_files, lexical_index
+                        )
+                    if changes and (self.indexer.has_changes(changes) or changes["touched"]):
+                        self._save_documents_cache(current_registry)
+                        document_catalog.apply_changes(current_registry, changes)
             
+            self.init_phase = "building_chain"
             logger.info("********** 🤖 CREATING OLLAMA LLM **********")
             llm = OllamaLLM(
                 model=self.ollama_model,
@@ -236,17 +336,21 @@ class QAService:
                 keep_alive=600         # 10 min
             )
             
-            logger.info("********** 🔗 CREATING RETRIEVAL QA CHAIN **********")
-            retriever = vectorstore.as_retriever(
-                search_kwargs={"k": self.retrieval_k}
-            )
+            reranker = self._get_reranker()
+            if reranker is not None:
+                reranker.warm_up()
             
-            self.qa_chain = RetrievalQA.from_chain_type(
-                llm=llm,
-                chain_type="stuff",
-                retriever=retriever,
-                return_source_documents=True
-            )
+            logger.info("********** 🔗 CREATING RETRIEVAL QA CHAIN **********")
+            with self._index_lock:
+                self.llm = llm
+                if needs_rebuild:
+                    # Atomic swap: the previous chain served questions until this point
+                    self.versions.activate(version_id, build_info)
+                self._activate_index(vectorstore, lexical_index, current_registry)
+            if needs_rebuild:
+                self.versions.prune()
+                # Changes seen while the new version was built from its start-time snapshot
+                self._replay_deferred_updates()
             
             self.last_initialization = datetime.now().isoformat()
             
@@ -254,14 +358,16 @@ class QAService:
             logger.info(f"********** ✅ RAG CHAIN {status_msg} SUCCESSFULLY! **********")
             logger.info(f"********** 📄 Documents: {len(current_registry)} **********")
             logger.info(f"********** 🤖 Model: {self.ollama_model} **********")
-            logger.info(f"********** 🔍 Retrieval K: {self.retrieval_k} **********")
+            logger.info(f"********** 🔍 Retrieval K: {self.retrieval_k} (min score {self.score_threshold}, MMR {self.use_mmr}, hybrid {self.hybrid_search}, rerank {self.rerank_enabled}) **********")
             logger.info("********** 🎯 RAG SYSTEM READY FOR QUESTIONS **********")
+            self.init_phase = "initialized"
             
             return True
             
         except Exception as e:
+            # A chain that was already serving (e.g. during a rebuild) is kept as is
             logger.error(f"********** ❌ RAG INITIALIZATION FAILED: {e} **********")
-            self.qa_chain = None
+            self._replay_deferred_updates()
             return False
         
     def _compare_registries(self, current: Dict, cached: Dict) -> bool:
@@ -269,13 +375,259 @@ class QAService:
         if set(current.keys()) != set(cached.keys()):
             return False
         
-        for key in current.keys():
-            if key not in cached:
-                return False
-            if (current[key].get('mtime') != cached[key].get('mtime') or
-                current[key].get('size') != cached[key].get('size')):
-                return False
-        return True
+        changes = self.indexer.compute_changes(dict(current), cached, self._get_hasher())
+        return not self.indexer.has_changes(changes)
+    
+    @staticmethod
+    def _get_hasher():
+        """Content hasher for change detection, None when CONTENT_HASH_ENABLED is off (mtime/size only)"""
+        from app.core.config import config
+        
+        if not getattr(config, 'CONTENT_HASH_ENABLED', True):
+            return None
+        from app.services.documents.content_hash import hash_files
+        return hash_files
+
+    def _build_shadow_version(self, embeddings, registry: Dict[str, Any]):
+        """
+        Index every file into a new version directory while the current chain keeps serving
+        Returns (vectorstore, lexical_index, version_id, info) once validated, None on failure
+        """
+        from langchain_chroma import Chroma
+        
+        version_id, directory = self.versions.create()
+        logger.info(f"********** 🏗️ BUILDING INDEX VERSION {version_id} - CURRENT VERSION KEEPS SERVING **********")
+        lexical_index = None
+        try:
+            vectorstore = Chroma(
+                embedding_function=embeddings,
+                persist_directory=str(directory)
+            )
+            lexical_index = self._open_lexical_index(directory)
+            stats = self._index_files(vectorstore, registry, lexical_index)
+            
+            chunks = vectorstore._collection.count()
+            if not stats["chunks"] or not chunks:
+                raise RuntimeError("no documents could be loaded")
+            if lexical_index is not None and lexical_index.count() != chunks:
+                raise RuntimeError(f"lexical index has {lexical_index.count()} chunks, ChromaDB {chunks}")
+            
+            # content_hash baseline (later mtime-only changes are not re-embedded) was set by the ingestion workers
+            self._save_documents_cache(registry, directory)
+            logger.info(f"********** 📊 INDEX VERSION {version_id} BUILT WITH {chunks} CHUNKS **********")
+            return vectorstore, lexical_index, version_id, {"files": len(registry), "chunks": chunks}
+        except Exception as e:
+            logger.error(f"********** ❌ INDEX VERSION {version_id} FAILED: {e} - KEEPING CURRENT VERSION **********")
+            if lexical_index is not None:
+                lexical_index.close()
+            self.versions.discard(version_id)
+            return None
+    
+    def _activate_index(self, vectorstore, lexical_index, registry: Dict[str, Any]) -> None:
+        """Point the serving chain at this vectorstore (caller holds _index_lock)"""
+        from langchain.chains import RetrievalQA
+        
+        previous_lexical_index = self.lexical_index
+        self.lexical_index = lexical_index
+        if lexical_index is not None:
+            lexical_index.refresh_common_terms()
+        
+        retriever = ScoredRetriever(
+            vectorstore=vectorstore,
+            k=self.retrieval_k,
+            score_threshold=self.score_threshold,
+            use_mmr=self.use_mmr,
+            fetch_k=self.fetch_k,
+            lambda_mult=self.mmr_lambda,
+            lexical_index=lexical_index,
+            rrf_k=self.rrf_k,
+            reranker=self._get_reranker(),
+            rerank_candidates=self.rerank_candidates
+        )
+        self.vectorstore = vectorstore
+        self.qa_chain = RetrievalQA.from_chain_type(
+            llm=self.llm,
+            chain_type="stuff",
+            retriever=retriever,
+            return_source_documents=True
+        )
+        self.index_version = self._compute_index_version(registry)
+        document_catalog.set_indexed(registry)
+        
+        # Requests still running on the previous chain reopen it on demand (its version is kept)
+        if previous_lexical_index is not None and previous_lexical_index is not lexical_index:
+            previous_lexical_index.close()
+    
+    def rollback_index(self, version_id: Optional[str] = None) -> Dict[str, Any]:
+        """Serve a previous index version again (default: the one active before the current) - nothing is re-embedded"""
+        target = version_id or self.versions.previous_id()
+        if not target or not self.versions.version_dir(target).exists():
+            return {"success": False, "error": f"No index version to roll back to ({target})", "timestamp": datetime.now().isoformat()}
+        if self.llm is None:
+            return {"success": False, "error": "QA chain not initialized", "timestamp": datetime.now().isoformat()}
+        
+        try:
+            from langchain_chroma import Chroma
+            
+            directory = self.versions.version_dir(target)
+            with self._index_lock:
+                vectorstore = Chroma(
+                    embedding_function=self._get_embeddings(),
+                    persist_directory=str(directory)
+                )
+                lexical_index = self._open_lexical_index(directory)
+                if lexical_index is not None and lexical_index.count() != vectorstore._collection.count():
+                    lexical_index.rebuild_from_collection(vectorstore._collection)
+                
+                previous = self.versions.current_id()
+                self.versions.activate(target, {"rollback_from": previous})
+                self._activate_index(vectorstore, lexical_index, self._load_documents_cache(directory))
+            
+            logger.info(f"********** ⏪ ROLLED BACK INDEX {previous} -> {target} **********")
+            return {
+                "success": True,
+                "previous_version": previous,
+                "current_version": target,
+                "timestamp": datetime.now().isoformat()
+            }
+        except Exception as e:
+            logger.error(f"********** ❌ INDEX ROLLBACK FAILED: {e} **********")
+            return {"success": False, "error": str(e), "timestamp": datetime.now().isoformat()}
+    
+    def _compute_index_version(self, registry: Dict[str, Any]) -> str:
+        """Fingerprint of the active version, indexed files and indexing settings - changes on every reindex"""
+        digest = hashlib.sha256(
+            f"{self.versions.current_id()}|{self.embedding_model}|{self.chunk_size}|{self.chunk_overlap}".encode("utf-8")
+        )
+        for relative_path in sorted(registry):
+            file_info = registry[relative_path]
+            digest.update(f"\n{relative_path}|{file_info.get('mtime')}|{file_info.get('size')}".encode("utf-8"))
+        return digest.hexdigest()[:16]
+    
+    @staticmethod
+    def _documents_cache_path(directory: Path) -> Path:
+        return Path(directory) / "documents_cache.json"
+    
+    def _load_documents_cache(self, directory: Optional[Path] = None) -> Dict[str, Any]:
+        """Registry snapshot of the files indexed in an index version (default: the active one)"""
+        directory = directory or self.versions.current_dir()
+        if directory is None or not self._documents_cache_path(directory).exists():
+            return {}
+        with open(self._documents_cache_path(directory), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _save_documents_cache(self, registry: Dict[str, Any], directory: Optional[Path] = None) -> None:
+        logger.info("********** 💾 SAVING DOCUMENTS CACHE **********")
+        try:
+            directory = directory or self.versions.current_dir()
+            with open(self._documents_cache_path(directory), 'w', encoding='utf-8') as f:
+                json.dump(registry, f, indent=2, ensure_ascii=False)
+            logger.info("********** ✅ CACHE SAVED **********")
+        except Exception as e:
+            logger.warning(f"********** ⚠️ CACHE SAVE ERROR: {e} **********")
+
+    def update_index(self, paths: Optional[Iterable[str]] = None, scanned: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Incremental index update: only added/modified/deleted files are touched
+        paths (relative to the documents dir) restricts the scan to those files/directories
+        scanned: registry scan entries (absolute path -> size, mtime, content_hash) whose hashes are reused
+        Falls back to a full initialization when no vectorstore is loaded yet
+        While a full build runs the update is deferred, then applied to the new version once it is swapped in
+        """
+        with self._index_lock:
+            if self._building:
+                self._defer_update(paths)
+                return {
+                    "mode": "deferred",
+                    "success": True,
+                    "timestamp": datetime.now().isoformat()
+                }
+        
+        if self.vectorstore is None:
+            logger.info("********** ⚠️ NO LIVE VECTORSTORE - RUNNING FULL INITIALIZATION **********")
+            success = self.initialize_qa_chain()
+            return {
+                "mode": "initialize",
+                "success": success,
+                "timestamp": datetime.now().isoformat()
+            }
+
+        try:
+            with self._index_lock:
+                cached_registry = self._load_documents_cache()
+                if paths is None:
+                    current_registry = self.get_files_registry()
+                else:
+                    current_registry = self._registry_with_paths(cached_registry, paths)
+                self._reuse_content_hashes(current_registry, scanned)
+                changes = self.indexer.compute_changes(current_registry, cached_registry, self._get_hasher())
+
+                if not self.indexer.has_changes(changes):
+                    logger.info("********** ✅ INDEX UP TO DATE **********")
+                    summary = {"files_added": 0, "files_modified": 0, "files_deleted": 0, "chunks_written": 0}
+                    if changes["touched"]:
+                        # Only the stat changed: remember it so the files are not hashed again
+                        self._save_documents_cache(current_registry)
+                        document_catalog.apply_changes(current_registry, changes)
+                else:
+                    summary = self.indexer.apply_changes(
+                        self.vectorstore, changes, current_registry, self._index_files, self._get_lexical_index()
+                    )
+                    self._save_documents_cache(current_registry)
+                    document_catalog.apply_changes(current_registry, changes)
+                    if self.lexical_index is not None:
+                        self.lexical_index.refresh_common_terms()
+                    self.index_version = self._compute_index_version(current_registry)
+
+            return {
+                "mode": "incremental" if paths is None else "paths",
+                "success": True,
+                **summary,
+                "files_touched_unchanged": len(changes["touched"]),
+                "timestamp": datetime.now().isoformat()
+            }
+        except Exception as e:
+            logger.error(f"********** ❌ INCREMENTAL INDEX UPDATE FAILED: {e} **********")
+            return {
+                "mode": "incremental",
+                "success": False,
+                "error": str(e),
+                "timestamp": datetime.now().isoformat()
+            }
+
+    @staticmethod
+    def _reuse_content_hashes(registry: Dict[str, Any], scanned: Optional[Dict[str, Any]]) -> None:
+        """Hashes computed by the registry scan, kept only when the file stat is still the one that was hashed"""
+        if not scanned:
+            return
+        for file_info in registry.values():
+            known = scanned.get(file_info['path'])
+            if (known and known.get('content_hash') and known.get('size') == file_info.get('size')
+                    and known.get('mtime') == file_info.get('mtime')):
+                file_info['content_hash'] = known['content_hash']
+    
+    def _defer_update(self, paths: Optional[Iterable[str]]) -> None:
+        """Remember an update requested during a build (caller holds _index_lock)"""
+        if paths is None:
+            self._deferred_full = True
+        else:
+            self._deferred_paths.update(paths)
+        logger.info("********** ⏸️ INDEX BUILD RUNNING - UPDATE DEFERRED UNTIL THE SWAP **********")
+    
+    def _replay_deferred_updates(self) -> Optional[Dict[str, Any]]:
+        """End of a build: apply the deferred updates to the version now serving (new one, or the old one on failure)"""
+        with self._index_lock:
+            if not self._building:
+                return None
+            self._building = False
+            paths = None if self._deferred_full else sorted(self._deferred_paths)
+            self._deferred_paths = set()
+            self._deferred_full = False
+        if paths == [] or self.vectorstore is None:
+            # Nothing deferred, or no index serving yet (the next initialization scans everything)
+            return None
+        logger.info(f"********** ▶️ REPLAYING UPDATES DEFERRED DURING THE BUILD ({len(paths) if paths is not None else 'all'} PATHS) **********")
+        return self.update_index(paths)
     
     def _is_chromadb_valid(self, persist_dir_path: Path) -> bool:
         """Check if ChromaDB directory is valid"""
@@ -288,15 +640,9 @@ class QAService:
                 return False
             
             from langchain_chroma import Chroma
-            from langchain_huggingface import HuggingFaceEmbeddings
-            
-            embeddings = HuggingFaceEmbeddings(
-                model_name=self.embedding_model,
-                model_kwargs={'device': 'cpu'}
-            )
             
             vectorstore = Chroma(
-                embedding_function=embeddings,
+                embedding_function=self._get_embeddings(),
                 persist_directory=str(persist_dir_path)
             )
             
@@ -311,374 +657,460 @@ class QAService:
             logger.warning(f"********** ⚠️ CHROMADB VALIDATION FAILED: {e} **********")
             return False
     
-    def _load_and_chunk_documents(self, registry: Dict) -> List:
-        """Load and chunk documents"""
-        from langchain_community.document_loaders import (
-            PyPDFLoader, PyMuPDFLoader,
-            TextLoader,
-            UnstructuredWordDocumentLoader,
-            UnstructuredPowerPointLoader
+    def _get_embeddings(self):
+        """Shared embedding model (loaded once per process), behind the embedding cache"""
+        return self._with_embedding_cache(embedding_provider.get_embeddings())
+    
+    def _with_embedding_cache(self, embeddings):
+        """Wrap the embedding model so that already-seen chunk texts are never re-embedded"""
+        from app.core.config import config
+        
+        if not getattr(config, 'EMBEDDING_CACHE_ENABLED', False):
+            return embeddings
+        
+        from .embedding_cache import EmbeddingCache, CachedEmbeddings
+        
+        if self.embedding_cache is None:
+            self.embedding_cache = EmbeddingCache(
+                cache_dir=config.EMBEDDING_CACHE_DIR,
+                model_name=self.embedding_model,
+                max_entries=config.EMBEDDING_CACHE_MAX_ENTRIES,
+                dtype=config.EMBEDDING_CACHE_DTYPE
+            )
+        return CachedEmbeddings(embeddings, self.embedding_cache)
+    
+    def warm_up_retrieval(self) -> Dict[str, Any]:
+        """Run one throwaway retrieval so index pages, FTS tables and the reranker are loaded before serving"""
+        retriever = getattr(self.qa_chain, 'retriever', None)
+        if retriever is None:
+            return {"warmed": False, "reason": "no retriever"}
+        started = time.perf_counter()
+        retriever.search_with_scores("warm-up")
+        seconds = round(time.perf_counter() - started, 3)
+        logger.info(f"********** 🔥 RETRIEVAL PATH WARMED UP IN {seconds}s **********")
+        return {"warmed": True, "seconds": seconds}
+    
+    def _open_lexical_index(self, directory: Path):
+        """BM25 index stored next to ChromaDB in an index version, None when hybrid search is disabled"""
+        from app.core.config import config
+        
+        if not self.hybrid_search:
+            return None
+        from .lexical_index import LexicalIndex
+        
+        return LexicalIndex(
+            db_path=Path(directory) / "lexical_index.db",
+            max_doc_freq=getattr(config, 'LEXICAL_MAX_DOC_FREQ', 0.02)
         )
-        from langchain.text_splitter import RecursiveCharacterTextSplitter
+    
+    def _get_lexical_index(self):
+        """Lexical index of the active index version"""
+        if self.lexical_index is None:
+            index_dir = self.versions.current_dir()
+            if index_dir is not None:
+                self.lexical_index = self._open_lexical_index(index_dir)
+        return self.lexical_index
+    
+    def _get_reranker(self):
+        """Cross-encoder rerank stage, None when disabled"""
+        from app.core.config import config
         
-        documents = []
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=self.chunk_size,
-            chunk_overlap=self.chunk_overlap
+        if not self.rerank_enabled:
+            return None
+        if self.reranker is None:
+            from .reranker import CrossEncoderReranker
+            
+            self.reranker = CrossEncoderReranker(
+                model_name=config.RERANK_MODEL,
+                batch_size=config.RERANK_BATCH_SIZE,
+                time_budget_ms=config.RERANK_TIME_BUDGET_MS,
+                device=getattr(config, 'EMBEDDING_DEVICE', 'cpu')
+            )
+        return self.reranker
+    
+    def _get_answer_cache(self):
+        from app.core.config import config
+        
+        if not getattr(config, 'ANSWER_CACHE_ENABLED', False):
+            return None
+        if self.answer_cache is None:
+            from .answer_cache import AnswerCache
+            
+            self.answer_cache = AnswerCache(
+                db_path=config.ANSWER_CACHE_FILE,
+                embed_fn=lambda text: embedding_provider.get_embeddings().embed_query(text),
+                max_entries=config.ANSWER_CACHE_MAX_ENTRIES,
+                ttl_seconds=config.ANSWER_CACHE_TTL,
+                similarity_threshold=config.ANSWER_CACHE_SIMILARITY
+            )
+        return self.answer_cache
+    
+    def _answer_cache_scope(self) -> str:
+        return (
+            f"{self.index_version}|{self.ollama_model}|{self.retrieval_k}|"
+            f"{self.score_threshold}|{self.use_mmr}|{self.fetch_k}|{self.mmr_lambda}|{self.hybrid_search}|{self.rerank_enabled}"
+        )
+    
+    async def _lookup_answer(self, question: str, use_cache: bool) -> Optional[Dict[str, Any]]:
+        """Cached answer for this question in the current index version, if any"""
+        answer_cache = self._get_answer_cache()
+        if answer_cache is None:
+            return None
+        if not use_cache:
+            answer_cache.record_bypass()
+            return None
+        try:
+            return await asyncio.to_thread(answer_cache.lookup, question, self._answer_cache_scope())
+        except Exception as e:
+            logger.warning(f"********** ⚠️ ANSWER CACHE LOOKUP FAILED: {e} **********")
+            return None
+    
+    async def _store_answer(self, question: str, result: Dict[str, Any]) -> None:
+        answer_cache = self._get_answer_cache()
+        if answer_cache is None or not result.get("success"):
+            return
+        try:
+            await asyncio.to_thread(answer_cache.store, question, self._answer_cache_scope(), result)
+        except Exception as e:
+            logger.warning(f"********** ⚠️ ANSWER CACHE STORE FAILED: {e} **********")
+    
+    def _index_files(self, vectorstore, registry: Dict, lexical_index=None) -> Dict[str, Any]:
+        """Parse, chunk, embed and write the given files as a streaming pipeline"""
+        logger.info(f"********** ⚙️ INDEXING {len(registry)} FILES WITH {self.ingestor.workers} WORKERS **********")
+        return self.pipeline.run(
+            self.ingestor.iter_files(registry),
+            vectorstore.embeddings,
+            vectorstore._collection,
+            lexical_index if lexical_index is not None else self._get_lexical_index(),
+            files_total=len(registry)
         )
         
-        processed_count = 0
-        for file_info in registry.values():
+    def test_ollama_connection(self, deep: bool = False, force: bool = False) -> Dict[str, Any]:
+        """
+        Cached probe (/api/tags + model pulled), no generation
+        deep=True additionally runs a short generation (explicit requests only)
+        """
+        probe = ollama_client.probe(force=force or deep)
+        if probe["status"] != "ok" or not deep:
+            return probe
+        return {**ollama_client.deep_test(), "probe": probe}
+    
+    def _format_sources(self, source_docs: List) -> List[Dict[str, Any]]:
+        """Convert retrieved documents into Source dicts"""
+        sources = []
+        for i, doc in enumerate(source_docs):
             try:
-                file_path = Path(file_info['path'])
-                processed_count += 1
-                logger.info(f"********** 📖 [{processed_count}/{len(registry)}] Loading: {file_path.name} **********")
+                doc_name = "unknown_document"
+                doc_metadata = {}
                 
-                docs = []
-
-                if file_path.suffix.lower() == '.pdf':
-                    pdf_loaded = False
-                    
-                    try:
-                        logger.info(f"********** 🔄 Trying PyMuPDFLoader for {file_path.name} **********")
-                        loader = PyMuPDFLoader(str(file_path))
-                        docs = loader.load()
-                        
-                        total_content = "".join([doc.page_content for doc in docs])
-                        if len(total_content.strip()) > 50:  
-                            logger.info(f"********** ✅ PyMuPDFLoader SUCCESS: {len(docs)} pages, {len(total_content)} chars **********")
-                            pdf_loaded = True
-                        else:
-                            logger.warning(f"********** ⚠️ PyMuPDFLoader: Content too short ({len(total_content)} chars) **********")
-                            docs = []
-                    except Exception as e:
-                        logger.warning(f"********** ⚠️ PyMuPDFLoader failed: {e} **********")
-                    
-                    if not pdf_loaded:
-                        try:
-                            logger.info(f"********** 🔄 Trying PyPDFLoader for {file_path.name} **********")
-                            loader = PyPDFLoader(str(file_path))
-                            docs = loader.load()
-                            
-                            total_content = "".join([doc.page_content for doc in docs])
-                            if len(total_content.strip()) > 50:
-                                logger.info(f"********** ✅ PyPDFLoader SUCCESS: {len(docs)} pages, {len(total_content)} chars **********")
-                                pdf_loaded = True
-                            else:
-                                logger.warning(f"********** ⚠️ PyPDFLoader: Content too short ({len(total_content)} chars) **********")
-                                docs = []
-                        except Exception as e:
-                            logger.warning(f"********** ⚠️ PyPDFLoader failed: {e} **********")
-                    
-                    if not pdf_loaded:
-                        try:
-                            logger.info(f"********** 🔄 Trying manual PDF extraction for {file_path.name} **********")
-                            content = self._extract_pdf_manually(file_path)
-                            if content and len(content.strip()) > 50:
-                                from langchain.schema import Document
-                                docs = [Document(
-                                    page_content=content,
-                                    metadata={"source": str(file_path), "page": 0}
-                                )]
-                                logger.info(f"********** ✅ Manual extraction SUCCESS: {len(content)} chars **********")
-                                pdf_loaded = True
-                        except Exception as e:
-                            logger.warning(f"********** ⚠️ Manual extraction failed: {e} **********")
+                if hasattr(doc, 'metadata') and doc.metadata:
+                    doc_metadata = doc.metadata
+                    doc_name = (
+                        doc.metadata.get('source') or
+                        doc.metadata.get('file') or 
+                        doc.metadata.get('filename') or
+                        doc.metadata.get('path') or
+                        'unknown_document'
+                    )
                     
-                    if not pdf_loaded:
-                        logger.error(f"********** ❌ ALL PDF METHODS FAILED for {file_path.name} **********")
-                        continue
-
-                elif file_path.suffix.lower() in ['.doc', '.docx']:
-                    try:
-                        logger.info(f"********** 📄 Loading Word document: {file_path.name} **********")
-                        loader = UnstructuredWordDocumentLoader(str(file_path))
-                        docs = loader.load()
-                        
-                        total_content = "".join([doc.page_content for doc in docs])
-                        if len(total_content.strip()) > 10:
-                            logger.info(f"********** ✅ Word document SUCCESS: {len(total_content)} chars **********")
-                        else:
-                            logger.warning(f"********** ⚠️ Word document: Content too short ({len(total_content)} chars) **********")
-                            continue
-                            
-                    except Exception as e:
-                        logger.warning(f"********** ❌ Word document loading failed: {e} **********")
-                        try:
-                            content = self._extract_word_manually(file_path)
-                            if content and len(content.strip()) > 10:
-                                from langchain.schema import Document
-                                docs = [Document(
-                                    page_content=content,
-                                    metadata={"source": str(file_path), "type": "word"}
-                                )]
-                                logger.info(f"********** ✅ Word manual extraction SUCCESS: {len(content)} chars **********")
-                            else:
-                                continue
-                        except Exception as e2:
-                            logger.error(f"********** ❌ Word manual extraction failed: {e2} **********")
-                            continue
-
-                elif file_path.suffix.lower() in ['.ppt', '.pptx']:
-                    try:
-                        logger.info(f"********** 🎯 Loading PowerPoint: {file_path.name} **********")
-                        loader = UnstructuredPowerPointLoader(str(file_path))
-                        docs = loader.load()
-                        
-                        total_content = "".join([doc.page_content for doc in docs])
-                        if len(total_content.strip()) > 10:
-                            logger.info(f"********** ✅ PowerPoint SUCCESS: {len(total_content)} chars **********")
-                        else:
-                            logger.warning(f"********** ⚠️ PowerPoint: Content too short ({len(total_content)} chars) **********")
-                            continue
-                            
-                    except Exception as e:
-                        logger.warning(f"********** ❌ PowerPoint loading failed: {e} **********")
-                        try:
-                            content = self._extract_powerpoint_manually(file_path)
-                            if content and len(content.strip()) > 10:
-                                from langchain.schema import Document
-                                docs = [Document(
-                                    page_content=content,
-                                    metadata={"source": str(file_path), "type": "powerpoint"}
-                                )]
-                                logger.info(f"********** ✅ PowerPoint manual extraction SUCCESS: {len(content)} chars **********")
-                            else:
-                                continue
-                        except Exception as e2:
-                            logger.error(f"********** ❌ PowerPoint manual extraction failed: {e2} **********")
-                            continue
-
-
-                elif file_path.suffix.lower() in ['.txt', '.md', '.py', '.cs', ".js", ".cpp", ".c", ".ts", ".json", ".xml"]:
-                    try:
-                        loader = TextLoader(str(file_path), encoding='utf-8')
-                        docs = loader.load()
-                        logger.info(f"********** ✅ Text file loaded: {len(docs[0].page_content) if docs else 0} chars **********")
-                    except UnicodeDecodeError:
-                        for encoding in ['latin-1', 'cp1252', 'iso-8859-1']:
-                            try:
-                                loader = TextLoader(str(file_path), encoding=encoding)
-                                docs = loader.load()
-                                logger.info(f"********** ✅ Text file loaded with {encoding}: {len(docs[0].page_content) if docs else 0} chars **********")
-                                break
-                            except:
-                                continue
-                        else:
-                            logger.error(f"********** ❌ Could not decode text file: {file_path.name} **********")
-                            continue
-            
-                else:
-                    logger.warning(f"********** ⏭️ SKIPPING UNSUPPORTED: {file_path.name} **********")
-                    continue
+                    if isinstance(doc_name, str) and ('/' in doc_name or '\\' in doc_name):
+                        doc_name = Path(doc_name).name
                 
-                if not docs:
-                    logger.warning(f"********** ⚠️ NO CONTENT LOADED for {file_path.name} **********")
-                    continue
+                content = doc.page_content if hasattr(doc, 'page_content') else str(doc)
+                excerpt = content[:300] + "..." if len(content) > 300 else content
                 
-                for doc in docs:
-                    if hasattr(doc, 'metadata'):
-                        if 'source' not in doc.metadata:
-                            doc.metadata['source'] = str(file_path)
-                        doc.metadata['filename'] = file_path.name
-                        doc.metadata['file_path'] = str(file_path)
-                        doc.metadata['relative_path'] = str(file_path.relative_to(Path(self.documents_dir)))
+                # Relevance computed by ScoredRetriever from the vector distance
+                score = doc_metadata.get('score', 0.0) if isinstance(doc_metadata, dict) else 0.0
                 
-                total_content = "".join([doc.page_content for doc in docs])
-                if len(total_content.strip()) < 10:
-                    logger.warning(f"********** ⚠️ CONTENT TOO SHORT for {file_path.name}: {len(total_content)} chars **********")
-                    continue
-
-                splits = text_splitter.split_documents(docs)
-                documents.extend(splits)
-                logger.info(f"********** ✅ {file_path.name}: {len(splits)} chunks created **********")
+                source_info = {
+                    "document": str(doc_name),           # str requis
+                    "score": float(score),               # float requis
+                    "excerpt": str(excerpt),             # str requis
+                    "metadata": doc_metadata             # Optional[Dict[str, Any]]
+                }
+                sources.append(source_info)
                 
             except Exception as e:
-                logger.warning(f"********** ❌ ERROR LOADING {file_path}: {e} **********")
-                continue
+                logger.warning(f"********** ⚠️ ERROR PROCESSING SOURCE {i}: {e} **********")
+                sources.append({
+                    "document": f"document_{i+1}",
+                    "score": 0.0,
+                    "excerpt": "Content extraction failed",
+                    "metadata": {"error": str(e)}
+                })
+        return sources
+    
+    async def _ensure_initialized(self) -> bool:
+        """Lazy initialization, run in a worker thread so the event loop keeps serving"""
+        if self.qa_chain is not None:
+            return True
+        async with self._init_lock:
+            if self.qa_chain is None:
+                logger.info("********** QA CHAIN NOT INITIALIZED - ATTEMPTING INITIALIZATION **********")
+                return await asyncio.to_thread(self.initialize_qa_chain)
+            return True
+    
+    async def process_question(self, question: str, use_cache: bool = True, profile: bool = False) -> Dict[str, Any]:
+        """
+        Answer a question without blocking the event loop
+        Served from the answer cache when possible, unless use_cache is False
+        profile=True runs it under cProfile and adds the hot functions to service_context["profile"]
+        """
+        if profile:
+            result, report = await request_profiler.run(lambda: self.process_question(question, use_cache))
+            return {**result, "service_context": {**result.get("service_context", {}), "profile": report}}
         
-        return documents
+        started = time.perf_counter()
+        # Ensure QA chain is initialized
+        if not await self._ensure_initialized():
+            return self._record_question("ask", self._not_ready_result(question), started)
+        
+        cached = await self._lookup_answer(question, use_cache)
+        if cached:
+            return self._record_question("ask", self._cached_result(question, cached), started)
+        
+        async def generate() -> Dict[str, Any]:
+            result = await self._generate_answer(question)
+            await self._store_answer(question, result)
+            return result
+        
+        return self._record_question("ask", await self._coalesced(question, generate), started)
     
-    def _extract_word_manually(self, file_path: Path) -> str:
-        try:
-            from docx import Document
-            doc = Document(file_path)
-            content = ""
-            for paragraph in doc.paragraphs:
-                content += paragraph.text + "\n"
-            return content
-        except Exception as e:
-            logger.warning(f"Manual Word extraction failed: {e}")
-            return ""
+    @staticmethod
+    def _record_question(endpoint: str, result: Dict[str, Any], started: float) -> Dict[str, Any]:
+        """Count the question in /metrics and set its processing_time (seconds)"""
+        seconds = time.perf_counter() - started
+        context = result.get("service_context", {})
+        if not result.get("success"):
+            outcome = "error"
+        elif context.get("answer_cache", {}).get("hit"):
+            outcome = "cached"
+        elif context.get("coalesced"):
+            outcome = "coalesced"
+        else:
+            outcome = "generated"
+        metrics.questions.inc(endpoint=endpoint, result=outcome)
+        metrics.question_seconds.observe(seconds, endpoint=endpoint)
+        return {**result, "processing_time": round(seconds, 3)}
     
-    def _extract_powerpoint_manually(self, file_path: Path) -> str:
-        try:
-            from pptx import Presentation
-            prs = Presentation(file_path)
-            content = ""
-            
-            for slide_num, slide in enumerate(prs.slides):
-                content += f"\n=== Slide {slide_num + 1} ===\n"
-                for shape in slide.shapes:
-                    if hasattr(shape, "text") and shape.text:
-                        content += shape.text + "\n"
-            
-            return content
-        except Exception as e:
-            logger.warning(f"Manual PowerPoint extraction failed: {e}")
-            return ""
+    async def _coalesced(
+        self, question: str, factory: Callable[[], Awaitable[Dict[str, Any]]]
+    ) -> Dict[str, Any]:
+        """
+        Single-flight: concurrent questions with the same normalized text and retrieval scope
+        await one shared generation
+        """
+        if self.single_flight is None:
+            return await factory()
         
-    def test_ollama_connection(self) -> Dict[str, Any]:
-        """Test Ollama connection avec retry"""
-        import time
-        import requests
+        key = f"{self._answer_cache_scope()}|{normalize_question(question)}"
+        result, shared = await self.single_flight.do(key, factory)
+        if not shared:
+            return result
         
-        try:
-            health_url = f"{self.ollama_api}/api/tags"
-            logger.info(f"🌐 Testing HTTP connection to: {health_url}")
-            
-            response = requests.get(health_url, timeout=5)
-            if response.status_code == 200:
-                logger.info("✅ Ollama HTTP endpoint is reachable")
-            else:
-                logger.warning(f"⚠️ Ollama HTTP returned status: {response.status_code}")
-                return {
-                    "status": "error",
-                    "model": self.ollama_model,
-                    "error": f"HTTP status {response.status_code}",
-                    "api_url": self.ollama_api
-                }
-        except requests.exceptions.ConnectionError:
-            logger.error("❌ Cannot reach Ollama HTTP endpoint")
-            return {
-                "status": "error",
-                "model": self.ollama_model,
-                "error": "Connection refused - Ollama service not ready",
-                "api_url": self.ollama_api,
-                "suggestion": "Ensure Ollama container is running: docker-compose ps"
-            }
-        except Exception as e:
-            logger.error(f"❌ HTTP test failed: {e}")
-            return {
-                "status": "error",
+        logger.info("********** 🔗 COALESCED WITH AN IN-FLIGHT IDENTICAL QUESTION **********")
+        result = dict(result)
+        result["question"] = question
+        result["service_context"] = {**result.get("service_context", {}), "coalesced": True}
+        return result
+    
+    def _not_ready_result(self, question: str) -> Dict[str, Any]:
+        return {
+            "success": False,
+            "question": question,
+            "answer": "❌ RAG system not ready. Please check Ollama connection and document indexing.",
+            "sources": [],
+            "timestamp": datetime.now().isoformat(),
+            "service_context": {
+                "error": "RAG chain initialization failed",
                 "model": self.ollama_model,
-                "error": f"HTTP test failed: {str(e)}",
-                "api_url": self.ollama_api
-            }
-        
-        try:
-            if not self.langchain_available:
-                return {
-                    "status": "error",
-                    "model": self.ollama_model,
-                    "error": "Langchain not available",
-                    "api_url": self.ollama_api
-                }
-            
-            from langchain_ollama import OllamaLLM
-            
-            logger.info(f"🤖 Testing Langchain connection with model: {self.ollama_model}")
-            llm = OllamaLLM(
-                model=self.ollama_model,
-                base_url=self.ollama_api,
-                timeout=10  
-            )
-            
-            response = llm.invoke("Hello")
-            logger.info(f"✅ Langchain test successful: {response[:50]}...")
-            return {
-                "status": "ok", 
-                "model": self.ollama_model, 
-                "response": response[:100],  
                 "api_url": self.ollama_api
             }
-        except Exception as e:
-            logger.error(f"❌ Langchain test failed: {e}")
-            return {
-                "status": "error", 
-                "model": self.ollama_model, 
-                "error": str(e),
-                "api_url": self.ollama_api,
-                "suggestion": f"Model '{self.ollama_model}' might not be downloaded. Try: docker exec rag-ollama ollama pull {self.ollama_model}"
-            }
+        }
     
-    def process_question(self, question: str) -> Dict[str, Any]:
+    def _cached_result(self, question: str, cached: Dict[str, Any]) -> Dict[str, Any]:
+        logger.info(f"********** ⚡ ANSWER CACHE HIT ({cached['match']}, {cached['similarity']}) **********")
+        result = dict(cached["result"])
+        result["question"] = question
+        result["timestamp"] = datetime.now().isoformat()
+        # Timings of the original generation would be misleading here
+        context = {key: value for key, value in result.get("service_context", {}).items() if key != "timings"}
+        result["service_context"] = {
+            **context,
+            "answer_cache": {"hit": True, "match": cached["match"], "similarity": cached["similarity"]}
+        }
+        return result
+    
+    @staticmethod
+    def _build_prompt(question: str, source_docs: List, timings: Optional[Dict[str, Any]] = None) -> str:
+        """Same "stuff" prompt as the RetrievalQA chain"""
+        from langchain.chains.question_answering.stuff_prompt import PROMPT
+        with metrics.stage("prompt_assembly", timings):
+            context = "\n\n".join(doc.page_content for doc in source_docs)
+            return PROMPT.format(context=context, question=question)
+    
+    async def _llm_stream(self, prompt: str, timings: Optional[Dict[str, Any]] = None) -> AsyncIterator[str]:
+        """
+        Stream the answer from Ollama, timing the first token and the whole generation
+        Ollama's token counts (tokens/sec) go to /metrics, and everything to timings when given
+        """
+        stats = GenerationStats()
+        started = time.perf_counter()
+        first_token_at = None
+        metrics.generations_in_flight.inc()
         try:
-            from datetime import datetime
-            from pathlib import Path
-            
-            # Ensure QA chain is initialized
-            if self.qa_chain is None:
-                logger.info("********** QA CHAIN NOT INITIALIZED - ATTEMPTING INITIALIZATION **********")
-                if not self.initialize_qa_chain():
-                    return {
+            async for token in self.llm.astream(prompt, config={"callbacks": [stats]}):
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                    metrics.stage_seconds.observe(first_token_at - started, stage="ollama_ttft")
+                yield token
+        finally:
+            metrics.generations_in_flight.dec()
+        
+        finished = time.perf_counter()
+        metrics.stage_seconds.observe(finished - started, stage="generation")
+        ollama = stats.summary()
+        if ollama["prompt_tokens"]:
+            metrics.prompt_tokens.inc(ollama["prompt_tokens"])
+        if ollama["completion_tokens"]:
+            metrics.completion_tokens.inc(ollama["completion_tokens"])
+        if ollama["tokens_per_second"]:
+            metrics.tokens_per_second.observe(ollama["tokens_per_second"])
+        if timings is not None:
+            timings["ollama_ttft"] = first_token_at - started if first_token_at else None
+            timings["generation"] = finished - started
+            timings["ollama"] = ollama
+    
+    async def _llm_answer(self, prompt: str, timings: Optional[Dict[str, Any]] = None) -> str:
+        return "".join([token async for token in self._llm_stream(prompt, timings)])
+    
+    async def process_batch(
+        self,
+        questions: List[str],
+        use_cache: bool = True,
+        semaphore: Optional[asyncio.Semaphore] = None,
+        on_result: Optional[Callable[[int, Dict[str, Any]], Awaitable[None]]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Answer several questions: answer cache first, then one shared embedding + retrieval pass
+        for the misses, then generations (at most `semaphore` running at a time)
+        on_result(index, result) is awaited as soon as each answer is ready
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(questions)
+        
+        async def finish(index: int, result: Dict[str, Any]) -> None:
+            results[index] = result
+            if on_result is not None:
+                await on_result(index, result)
+        
+        if not await self._ensure_initialized():
+            for index, question in enumerate(questions):
+                await finish(index, self._not_ready_result(question))
+            return results
+        
+        pending = []
+        for index, question in enumerate(questions):
+            cached = await self._lookup_answer(question, use_cache)
+            if cached:
+                await finish(index, self._cached_result(question, cached))
+            else:
+                pending.append(index)
+        if not pending:
+            return results
+        
+        logger.info(f"********** 📦 BATCH: {len(pending)} QUESTIONS TO ANSWER ({len(questions) - len(pending)} CACHED) **********")
+        retriever = getattr(self.qa_chain, 'retriever', None)
+        retrieved: Dict[str, List] = {}
+        retrieval_started = time.perf_counter()
+        if retriever is not None:
+            unique_questions = list(dict.fromkeys(questions[index] for index in pending))
+            try:
+                scored = await asyncio.to_thread(retriever.batch_search_with_scores, unique_questions)
+                retrieved = {question: [doc for doc, _ in hits] for question, hits in zip(unique_questions, scored)}
+            except Exception as e:
+                logger.error(f"********** ❌ BATCH RETRIEVAL FAILED: {e} **********")
+                for index in pending:
+                    await finish(index, {
                         "success": False,
-                        "question": question,
-                        "answer": "❌ RAG system not ready. Please check Ollama connection and document indexing.",
+                        "question": questions[index],
+                        "answer": f"❌ An error occurred while processing your question: {str(e)}",
                         "sources": [],
                         "timestamp": datetime.now().isoformat(),
+                        "service_context": {"error": str(e), "model": self.ollama_model}
+                    })
+                return results
+        retrieval_seconds = round(time.perf_counter() - retrieval_started, 3)
+        
+        semaphore = semaphore or asyncio.Semaphore(1)
+        mode = "full_rag" if retriever is not None else "llm_only"
+        
+        async def generate_one(question: str) -> Dict[str, Any]:
+            source_docs = retrieved.get(question, [])
+            prompt = self._build_prompt(question, source_docs) if retriever is not None else question
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    answer = await self._llm_answer(prompt)
+                    result = {
+                        "success": True,
+                        "question": question,
+                        "answer": answer,
+                        "sources": self._format_sources(source_docs),
+                        "timestamp": datetime.now().isoformat(),
                         "service_context": {
-                            "error": "RAG chain initialization failed",
                             "model": self.ollama_model,
+                            "retrieval_k": len(source_docs),
+                            "processing_mode": mode,
+                            "batch_retrieval_seconds": retrieval_seconds,
+                            "generation_seconds": round(time.perf_counter() - started, 3),
                             "api_url": self.ollama_api
                         }
                     }
-            
+                except Exception as e:
+                    logger.error(f"********** ❌ BATCH GENERATION FAILED: {e} **********")
+                    result = {
+                        "success": False,
+                        "question": question,
+                        "answer": f"❌ An error occurred while processing your question: {str(e)}",
+                        "sources": [],
+                        "timestamp": datetime.now().isoformat(),
+                        "service_context": {"error": str(e), "model": self.ollama_model}
+                    }
+            await self._store_answer(question, result)
+            return result
+        
+        async def generate(index: int) -> None:
+            question = questions[index]
+            await finish(index, await self._coalesced(question, lambda: generate_one(question)))
+        
+        await asyncio.gather(*(generate(index) for index in pending))
+        return results
+    
+    async def _generate_answer(self, question: str) -> Dict[str, Any]:
+        """
+        Retrieve (in the executor), build the "stuff" prompt and stream the answer from Ollama over async HTTP,
+        each stage timed into /metrics
+        """
+        try:
             logger.info(f"********** ❓ PROCESSING QUESTION: {question} **********")
             
             if hasattr(self.qa_chain, 'invoke') and hasattr(self.qa_chain, 'retriever'):
                 logger.info("********** 🔍 USING FULL RAG WITH RETRIEVAL **********")
                 
-                # Full RAG avec RetrievalQA
-                result = self.qa_chain.invoke({"query": question})
+                # Full RAG: same retriever and prompt as the RetrievalQA chain
+                timings: Dict[str, Any] = {}
+                with metrics.stage("retrieval", timings):
+                    source_docs = await self._retrieve(question, timings)
+                prompt = self._build_prompt(question, source_docs, timings)
+                answer = await self._llm_answer(prompt, timings) or "No answer generated"
                 
-                answer = result.get("result", "No answer generated")
-                source_docs = result.get("source_documents", [])
-                
-                sources = []
-                for i, doc in enumerate(source_docs):
-                    try:
-                        doc_name = "unknown_document"
-                        doc_metadata = {}
-                        
-                        if hasattr(doc, 'metadata') and doc.metadata:
-                            doc_metadata = doc.metadata
-                            doc_name = (
-                                doc.metadata.get('source') or
-                                doc.metadata.get('file') or 
-                                doc.metadata.get('filename') or
-                                doc.metadata.get('path') or
-                                'unknown_document'
-                            )
-                            
-                            if isinstance(doc_name, str) and ('/' in doc_name or '\\' in doc_name):
-                                doc_name = Path(doc_name).name
-                        
-                        content = doc.page_content if hasattr(doc, 'page_content') else str(doc)
-                        excerpt = content[:300] + "..." if len(content) > 300 else content
-                        
-                        score = max(0.9 - (i * 0.15), 0.1)  # De 0.9 à 0.1
-                        
-                        source_info = {
-                            "document": str(doc_name),           # str requis
-                            "score": float(score),               # float requis
-                            "excerpt": str(excerpt),             # str requis
-                            "metadata": doc_metadata             # Optional[Dict[str, Any]]
-                        }
-                        sources.append(source_info)
-                        
-                    except Exception as e:
-                        logger.warning(f"********** ⚠️ ERROR PROCESSING SOURCE {i}: {e} **********")
-                        sources.append({
-                            "document": f"document_{i+1}",
-                            "score": 0.5,
-                            "excerpt": "Content extraction failed",
-                            "metadata": {"error": str(e)}
-                        })
+                serialization_started = time.perf_counter()
+                sources = self._format_sources(source_docs)
                 
                 logger.info(f"********** ✅ RAG ANSWER GENERATED WITH {len(sources)} SOURCES **********")
+                documents_indexed = document_catalog.indexed_count()
                 
-                return {
+                result = {
                     "success": True,
                     "question": question,
                     "answer": answer,
@@ -688,15 +1120,20 @@ class QAService:
                         "model": self.ollama_model,
                         "retrieval_k": len(sources),
                         "processing_mode": "full_rag",
-                        "documents_indexed": len(self.get_files_registry()),
-                        "api_url": self.ollama_api
+                        "documents_indexed": documents_indexed,
+                        "api_url": self.ollama_api,
+                        "prompt": self._prompt_stats(prompt, source_docs, timings)
                     }
                 }
+                timings["serialization"] = time.perf_counter() - serialization_started
+                result["service_context"]["timings"] = self._timing_breakdown(timings)
+                return result
                 
             elif hasattr(self.qa_chain, 'invoke'):
                 logger.info("********** 🤖 USING SIMPLE LLM (NO RAG) **********")
                 
-                response = self.qa_chain.invoke(question)
+                timings = {}
+                response = await self._llm_answer(question, timings)
                 
                 return {
                     "success": True,
@@ -708,7 +1145,9 @@ class QAService:
                         "model": self.ollama_model,
                         "processing_mode": "llm_only",
                         "note": "No RAG - documents not indexed or accessible",
-                        "api_url": self.ollama_api
+                        "api_url": self.ollama_api,
+                        "prompt": self._prompt_stats(question, [], timings),
+                        "timings": self._timing_breakdown(timings)
                     }
                 }
             else:
@@ -740,10 +1179,146 @@ class QAService:
                 }
             }
     
+    async def _retrieve(self, question: str, timings: Dict[str, Any]) -> List:
+        """Retrieval in a worker thread (profiled there when the request is profiled)"""
+        hits = await request_profiler.run_in_thread(self.qa_chain.retriever.search_with_scores, question, timings)
+        return [document for document, _ in hits]
+    
+    @staticmethod
+    def _timing_breakdown(timings: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Seconds per stage of one answer; retrieve_seconds excludes reranking (reported apart)
+        llm_prompt_eval/llm_generation are Ollama's own timings, llm_total_seconds is measured here
+        """
+        ollama = timings.get("ollama", {})
+        rerank = timings.get("rerank", 0.0)
+        breakdown = {
+            "retrieve_seconds": timings["retrieval"] - rerank if "retrieval" in timings else None,
+            "query_embedding_seconds": timings.get("query_embedding"),
+            "vector_search_seconds": timings.get("vector_search"),
+            "lexical_search_seconds": timings.get("lexical_search"),
+            "rerank_seconds": rerank if "rerank" in timings else None,
+            "prompt_assembly_seconds": timings.get("prompt_assembly"),
+            "llm_time_to_first_token_seconds": timings.get("ollama_ttft"),
+            "llm_load_seconds": ollama.get("load_seconds"),
+            "llm_prompt_eval_seconds": ollama.get("prompt_eval_seconds"),
+            "llm_generation_seconds": ollama.get("eval_seconds"),
+            "llm_total_seconds": timings.get("generation"),
+            "serialization_seconds": timings.get("serialization")
+        }
+        return {key: round(value, 4) if value is not None else None for key, value in breakdown.items()}
+    
+    @staticmethod
+    def _prompt_stats(prompt: str, source_docs: List, timings: Dict[str, Any]) -> Dict[str, Any]:
+        ollama = timings.get("ollama", {})
+        return {
+            "prompt_tokens": ollama.get("prompt_tokens"),
+            "completion_tokens": ollama.get("completion_tokens"),
+            "tokens_per_second": ollama.get("tokens_per_second"),
+            "prompt_chars": len(prompt),
+            "context_chars": sum(len(doc.page_content) for doc in source_docs),
+            "context_chunks": len(source_docs)
+        }
+    
+    async def stream_question(self, question: str, use_cache: bool = True) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Answer a question as a stream of events:
+        "sources" (retrieved documents), "token" (generated text), then "done" (timings) or "error"
+        """
+        started = time.perf_counter()
+        try:
+            if not await self._ensure_initialized():
+                metrics.questions.inc(endpoint="stream", result="error")
+                yield {"event": "error", "data": {"error": "RAG chain initialization failed", "model": self.ollama_model}}
+                return
+
+            logger.info(f"********** ❓ STREAMING QUESTION: {question} **********")
+            
+            cached = await self._lookup_answer(question, use_cache)
+            if cached:
+                metrics.questions.inc(endpoint="stream", result="cached")
+                metrics.question_seconds.observe(time.perf_counter() - started, endpoint="stream")
+                yield {"event": "sources", "data": cached["result"].get("sources", [])}
+                yield {"event": "token", "data": cached["result"].get("answer", "")}
+                yield {
+                    "event": "done",
+                    "data": {
+                        "model": self.ollama_model,
+                        "answer_cache": {"hit": True, "match": cached["match"], "similarity": cached["similarity"]},
+                        "total_seconds": round(time.perf_counter() - started, 3),
+                        "timestamp": datetime.now().isoformat()
+                    }
+                }
+                return
+
+            retriever = getattr(self.qa_chain, 'retriever', None)
+            source_docs = []
+            if retriever is not None:
+                with metrics.stage("retrieval"):
+                    source_docs = await retriever.ainvoke(question)
+            retrieval_seconds = time.perf_counter() - started
+
+            yield {"event": "sources", "data": self._format_sources(source_docs)}
+
+            prompt = self._build_prompt(question, source_docs) if retriever is not None else question
+
+            first_token_at = None
+            token_count = 0
+            answer = ""
+            generation: Dict[str, Any] = {}
+            async for token in self._llm_stream(prompt, generation):
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                token_count += 1
+                answer += token
+                yield {"event": "token", "data": token}
+
+            finished = time.perf_counter()
+            metrics.questions.inc(endpoint="stream", result="generated")
+            metrics.question_seconds.observe(finished - started, endpoint="stream")
+            await self._store_answer(question, {
+                "success": True,
+                "question": question,
+                "answer": answer,
+                "sources": self._format_sources(source_docs),
+                "service_context": {
+                    "model": self.ollama_model,
+                    "processing_mode": "full_rag" if retriever is not None else "llm_only",
+                    "api_url": self.ollama_api
+                }
+            })
+            yield {
+                "event": "done",
+                "data": {
+                    "model": self.ollama_model,
+                    "processing_mode": "full_rag" if retriever is not None else "llm_only",
+                    "retrieval_seconds": round(retrieval_seconds, 3),
+                    "time_to_first_token_seconds": round(first_token_at - started, 3) if first_token_at else None,
+                    "generation_seconds": round(finished - (first_token_at or finished), 3),
+                    "total_seconds": round(finished - started, 3),
+                    "chunks_streamed": token_count,
+                    "tokens_per_second": generation.get("ollama", {}).get("tokens_per_second"),
+                    "timestamp": datetime.now().isoformat()
+                }
+            }
+
+        except Exception as e:
+            logger.error(f"********** ❌ ERROR STREAMING QUESTION: {e} **********")
+            metrics.questions.inc(endpoint="stream", result="error")
+            yield {"event": "error", "data": {"error": str(e), "model": self.ollama_model}}
+
+    @staticmethod
+    def _get_batch_stats() -> Dict[str, Any]:
+        from .batch_jobs import batch_job_manager
+        return batch_job_manager.get_stats()
+    
+    @staticmethod
+    def _get_watcher_stats() -> Dict[str, Any]:
+        from .document_watcher import document_watcher
+        return document_watcher.get_stats()
+    
     def get_qa_status(self) -> Dict[str, Any]:
         """Get QA service status"""
-        registry = self.get_files_registry()
-        
         return {
             "qa_chain_ready": self.qa_chain is not None,
             "langchain_available": self.langchain_available,
@@ -752,11 +1327,39 @@ class QAService:
             "api_url": self.ollama_api,
             "persist_dir_exists": Path(self.persist_dir).exists(),
             "documents_dir_exists": Path(self.documents_dir).exists(),
-            "documents_count": len(registry),
+            "documents_count": document_catalog.file_count(),
+            "documents_indexed": document_catalog.indexed_count(),
+            "last_ingestion": {
+                **self.pipeline.last_run,
+                "workers": self.ingestor.workers,
+                "errors": self.pipeline.last_errors
+            },
+            "embedding_model": embedding_provider.get_stats(),
+            "embedding_cache": self.embedding_cache.get_stats() if self.embedding_cache else {"enabled": False},
+            "answer_cache": self.answer_cache.get_stats() if self.answer_cache else {"enabled": False},
+            "lexical_index": self.lexical_index.get_stats() if self.lexical_index else {"enabled": False},
+            "reranker": self.reranker.get_stats() if self.reranker else {"enabled": False},
+            "batch_jobs": self._get_batch_stats(),
+            "watcher": self._get_watcher_stats(),
+            "ollama_client": ollama_client.get_stats(),
+            "coalescing": self.single_flight.get_stats() if self.single_flight else {"enabled": False},
+            "profiling": request_profiler.get_stats(),
+            "index_version": self.index_version,
+            "index_versions": {
+                "current": self.versions.current_id(),
+                "keep_previous": self.versions.keep_versions,
+                "versions": self.versions.list_versions()
+            },
             "config": {
                 "chunk_size": self.chunk_size,
                 "chunk_overlap": self.chunk_overlap,
                 "retrieval_k": self.retrieval_k,
+                "retrieval_score_threshold": self.score_threshold,
+                "retrieval_use_mmr": self.use_mmr,
+                "retrieval_fetch_k": self.fetch_k,
+                "hybrid_search": self.hybrid_search,
+                "rerank_enabled": self.rerank_enabled,
+                "rerank_candidates": self.rerank_candidates,
                 "embedding_model": self.embedding_model
             }
         }
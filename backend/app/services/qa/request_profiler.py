@@ -0,0 +1,145 @@
+"""
+Request Profiler
+Opt-in cProfile capture of one question (profile flag or X-Debug-Profile header on /ask, only with PROFILING_ENABLED)
+The top functions by own time are returned with the answer and the full .prof file is kept under DATA_DIR/profiles
+"""
+import asyncio
+import contextvars
+import cProfile
+import logging
+import pstats
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Awaitable, Callable, List, Optional, Tuple
+
+from app.core.config import config
+
+logger = logging.getLogger(__name__)
+
+# Profilers of the request being profiled: the event loop one first, then one per worker-thread call
+_profilers: contextvars.ContextVar[Optional[List[cProfile.Profile]]] = contextvars.ContextVar("request_profilers", default=None)
+
+class RequestProfiler:
+    """
+    cProfile only sees the thread it was enabled in: blocking work of a profiled request goes through
+    run_in_thread(), which profiles it in the worker thread and merges it into the report
+    Other coroutines running meanwhile show up in the event loop profile, so one profile runs at a time
+    """
+
+    def __init__(self, directory: Path, top_n: int = 25, keep: int = 20, enabled: bool = False):
+        self.directory = Path(directory)
+        self.top_n = top_n
+        self.keep = keep
+        self.enabled = enabled
+        self.profiles = 0
+        self.skipped = 0
+        self._lock: Optional[asyncio.Lock] = None
+
+    @staticmethod
+    async def run_in_thread(func: Callable, *args) -> Any:
+        """asyncio.to_thread(func, *args), profiled in the worker thread when the current request is profiled"""
+        profilers = _profilers.get()
+        if profilers is None:
+            return await asyncio.to_thread(func, *args)
+
+        worker = cProfile.Profile()
+
+        def call():
+            worker.enable()
+            try:
+                return func(*args)
+            finally:
+                worker.disable()
+
+        # One active profiler at a time (required by sys.monitoring-based cProfile, Python 3.12+)
+        profilers[0].disable()
+        try:
+            return await asyncio.to_thread(call)
+        finally:
+            profilers.append(worker)
+            profilers[0].enable()
+
+    def _get_lock(self) -> asyncio.Lock:
+        # Created lazily so it binds to the running event loop
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    async def run(self, factory: Callable[[], Awaitable[Any]]) -> Tuple[Any, Dict[str, Any]]:
+        """Await factory() under cProfile, returns (result, report)"""
+        if not self.enabled:
+            return await factory(), {"enabled": False}
+        lock = self._get_lock()
+        if lock.locked():
+            self.skipped += 1
+            return await factory(), {"enabled": True, "skipped": "another request is being profiled"}
+
+        async with lock:
+            profilers = [cProfile.Profile()]
+            token = _profilers.set(profilers)
+            profilers[0].enable()
+            try:
+                result = await factory()
+            finally:
+                profilers[0].disable()
+                _profilers.reset(token)
+            self.profiles += 1
+            return result, self._report(profilers)
+
+    def _report(self, profilers: List[cProfile.Profile]) -> Dict[str, Any]:
+        stats = pstats.Stats(*profilers)
+        report = {
+            "enabled": True,
+            "total_calls": stats.total_calls,
+            "total_seconds": round(stats.total_tt, 4),
+            "worker_thread_calls": len(profilers) - 1,
+            "top_functions": self._top_functions(stats),
+            "file": None
+        }
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            path = self.directory / f"profile_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}.prof"
+            stats.dump_stats(str(path))
+            report["file"] = path.name
+            self._prune()
+        except OSError as e:
+            logger.warning(f"⚠️ Could not store profile: {e}")
+        return report
+
+    def _top_functions(self, stats: pstats.Stats) -> List[Dict[str, Any]]:
+        """Hottest functions by own time (tottime)"""
+        rows = sorted(stats.stats.items(), key=lambda item: item[1][2], reverse=True)[:self.top_n]
+        return [
+            {
+                "function": f"{filename}:{line}({name})" if line else name,
+                "calls": calls,
+                "own_seconds": round(own_time, 4),
+                "cumulative_seconds": round(cumulative_time, 4)
+            }
+            for (filename, line, name), (_, calls, own_time, cumulative_time, _) in rows
+        ]
+
+    def _prune(self) -> None:
+        """Keep the most recent `keep` profile files"""
+        files = sorted(self.directory.glob("profile_*.prof"), key=lambda path: path.stat().st_mtime, reverse=True)
+        for path in files[self.keep:]:
+            path.unlink(missing_ok=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "profiles": self.profiles,
+            "skipped": self.skipped,
+            "directory": str(self.directory),
+            "top_functions": self.top_n,
+            "keep": self.keep
+        }
+
+# Global instance
+request_profiler = RequestProfiler(
+    directory=config.PROFILES_DIR,
+    top_n=config.PROFILE_TOP_FUNCTIONS,
+    keep=config.PROFILE_KEEP,
+    enabled=config.PROFILING_ENABLED
+)
@@ -0,0 +1,117 @@
+"""
+Cross-Encoder Reranker
+Rescores over-fetched retrieval candidates with a small CPU cross-encoder,
+within a latency budget (falls back to retrieval order when exceeded)
+"""
+import logging
+import threading
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class CrossEncoderReranker:
+    """Lazily loaded sentence-transformers CrossEncoder, scored in batches"""
+
+    def __init__(
+        self,
+        model_name: str,
+        batch_size: int = 16,
+        time_budget_ms: int = 300,
+        device: str = "cpu",
+        max_length: int = 512
+    ):
+        self.model_name = model_name
+        self.batch_size = max(1, batch_size)
+        self.time_budget_ms = time_budget_ms
+        self.device = device
+        self.max_length = max_length
+        self._model = None
+        self._load_failed = False
+        self._lock = threading.Lock()
+        self.load_seconds: Optional[float] = None
+        self.stats = {"calls": 0, "reranked": 0, "fallbacks_budget": 0, "fallbacks_error": 0, "total_ms": 0.0}
+
+    def _get_model(self):
+        if self._model is not None or self._load_failed:
+            return self._model
+        with self._lock:
+            if self._model is None and not self._load_failed:
+                try:
+                    from sentence_transformers import CrossEncoder
+
+                    logger.info(f"********** 🧮 LOADING RERANKER {self.model_name} **********")
+                    started = time.time()
+                    self._model = CrossEncoder(self.model_name, device=self.device, max_length=self.max_length)
+                    self.load_seconds = round(time.time() - started, 3)
+                    logger.info(f"********** ✅ RERANKER LOADED IN {self.load_seconds}s **********")
+                except Exception as e:
+                    self._load_failed = True
+                    logger.warning(f"********** ⚠️ RERANKER UNAVAILABLE - USING RETRIEVAL ORDER: {e} **********")
+        return self._model
+
+    def warm_up(self) -> bool:
+        """Load the model and score one pair so the first query pays no init cost"""
+        model = self._get_model()
+        if model is None:
+            return False
+        model.predict([("warm-up", "warm-up")], batch_size=1, show_progress_bar=False)
+        return True
+
+    def rerank(self, query: str, candidates: List[Tuple[Any, float]], top_n: int) -> List[Tuple[Any, float]]:
+        """
+        Reorder (document, score) candidates by cross-encoder score and keep top_n
+        The cross-encoder score is added to each kept document's metadata["rerank_score"]
+        """
+        if len(candidates) <= 1:
+            return candidates[:top_n]
+        model = self._get_model()
+        if model is None:
+            return candidates[:top_n]
+
+        self.stats["calls"] += 1
+        started = time.perf_counter()
+        budget = self.time_budget_ms / 1000 if self.time_budget_ms > 0 else None
+        pairs = [(query, document.page_content) for document, _ in candidates]
+        scores: List[float] = []
+
+        try:
+            for start in range(0, len(pairs), self.batch_size):
+                if budget is not None and time.perf_counter() - started > budget:
+                    self.stats["fallbacks_budget"] += 1
+                    logger.warning(
+                        f"⚠️ Rerank budget of {self.time_budget_ms}ms exceeded after {len(scores)}/{len(pairs)} "
+                        f"candidates - using retrieval order"
+                    )
+                    return candidates[:top_n]
+                batch = pairs[start:start + self.batch_size]
+                scores.extend(float(score) for score in model.predict(batch, batch_size=len(batch), show_progress_bar=False))
+        except Exception as e:
+            self.stats["fallbacks_error"] += 1
+            logger.warning(f"⚠️ Rerank failed - using retrieval order: {e}")
+            return candidates[:top_n]
+        finally:
+            self.stats["total_ms"] += (time.perf_counter() - started) * 1000
+
+        ranked = sorted(zip(candidates, scores), key=lambda item: item[1], reverse=True)[:top_n]
+        self.stats["reranked"] += 1
+        for (document, _), rerank_score in ranked:
+            document.metadata["rerank_score"] = round(rerank_score, 4)
+        return [candidate for candidate, _ in ranked]
+
+    def get_stats(self) -> Dict[str, Any]:
+        calls = self.stats["calls"]
+        return {
+            "enabled": True,
+            "model": self.model_name,
+            "loaded": self._model is not None,
+            "load_failed": self._load_failed,
+            "load_seconds": self.load_seconds,
+            "batch_size": self.batch_size,
+            "time_budget_ms": self.time_budget_ms,
+            "calls": calls,
+            "reranked": self.stats["reranked"],
+            "fallbacks_budget": self.stats["fallbacks_budget"],
+            "fallbacks_error": self.stats["fallbacks_error"],
+            "avg_ms": round(self.stats["total_ms"] / calls, 2) if calls else None
+        }
@@ -0,0 +1,204 @@
+"""
+Scored Retriever
+Vector retrieval with real relevance scores, optional score cutoff, MMR diversification,
+hybrid lexical + vector search fused with reciprocal-rank fusion and optional cross-encoder reranking
+"""
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from app.services.metrics import metrics
+from .embedding_cache import CachedEmbeddings
+
+logger = logging.getLogger(__name__)
+
+class ScoredRetriever(BaseRetriever):
+    """
+    Queries the Chroma collection once, converts distances to relevance scores (0..1),
+    drops chunks under score_threshold and optionally re-orders with MMR
+    With a lexical_index, BM25 hits are fused in by reciprocal rank (normalized fused rank in metadata["rrf_score"])
+    With a reranker, rerank_candidates chunks are retrieved and the reranker keeps the best k
+    The vector relevance is stored in each returned document's metadata["score"] and score_threshold applies to every hit
+    """
+
+    vectorstore: Any
+    k: int = 5
+    score_threshold: float = 0.0
+    use_mmr: bool = False
+    fetch_k: int = 20
+    lambda_mult: float = 0.5
+    lexical_index: Any = None
+    rrf_k: int = 60
+    reranker: Any = None
+    rerank_candidates: int = 20
+
+    def search_with_scores(self, query: str, timings: Optional[Dict[str, float]] = None) -> List[Tuple[Document, float]]:
+        return self.batch_search_with_scores([query], timings)[0]
+
+    def batch_search_with_scores(
+        self, queries: List[str], timings: Optional[Dict[str, float]] = None
+    ) -> List[List[Tuple[Document, float]]]:
+        """
+        Retrieve for several queries at once: one embedding forward pass and one Chroma query
+        Lexical search and reranking still run per query
+        Stage seconds are added to timings when given
+        """
+        if not queries:
+            return []
+        limit = max(self.k, self.rerank_candidates) if self.reranker is not None else self.k
+
+        embeddings = self.vectorstore.embeddings
+        if isinstance(embeddings, CachedEmbeddings):
+            # Questions stay out of the chunk embedding cache (embed_query already bypasses it)
+            embeddings = embeddings.embeddings
+        with metrics.stage("query_embedding", timings):
+            if len(queries) == 1:
+                query_embeddings = [embeddings.embed_query(queries[0])]
+            else:
+                query_embeddings = embeddings.embed_documents(queries)
+
+        over_fetch = self.use_mmr or self.lexical_index is not None
+        include = ["documents", "metadatas", "distances"]
+        if self.use_mmr:
+            include.append("embeddings")
+        with metrics.stage("vector_search", timings):
+            results = self.vectorstore._collection.query(
+                query_embeddings=query_embeddings,
+                n_results=max(limit, self.fetch_k) if over_fetch else limit,
+                include=include
+            )
+
+        batch_results = []
+        for index, (query, query_embedding) in enumerate(zip(queries, query_embeddings)):
+            candidates = self._retrieve(query, query_embedding, results, index, limit, timings)
+            if self.reranker is not None:
+                with metrics.stage("rerank", timings):
+                    candidates = self.reranker.rerank(query, candidates, self.k)
+            batch_results.append(candidates)
+        return batch_results
+
+    def _retrieve(
+        self, query: str, query_embedding: List[float], results: Dict[str, Any], index: int, limit: int,
+        timings: Optional[Dict[str, float]] = None
+    ) -> List[Tuple[Document, float]]:
+        vector_hits = self._vector_hits(query_embedding, results, index, limit)
+
+        if self.lexical_index is None:
+            return [(document, score) for _, document, score in vector_hits[:limit]]
+
+        try:
+            with metrics.stage("lexical_search", timings):
+                lexical_hits = self.lexical_index.search(query, limit=max(limit, self.fetch_k))
+        except Exception as e:
+            logger.warning(f"⚠️ Lexical search failed, using vector results only: {e}")
+            return [(document, score) for _, document, score in vector_hits[:limit]]
+        return self._fuse(query_embedding, vector_hits, lexical_hits, limit)
+
+    def _vector_hits(
+        self, query_embedding: List[float], results: Dict[str, Any], index: int, limit: int
+    ) -> List[Tuple[str, Document, float]]:
+        """Return (chunk_id, document, relevance) tuples for the index-th query, best first"""
+        if not results["ids"] or not results["ids"][index]:
+            return []
+
+        relevance_fn = self.vectorstore._select_relevance_score_fn()
+        candidates = []
+        for position, (chunk_id, text, metadata, distance) in enumerate(zip(
+            results["ids"][index], results["documents"][index], results["metadatas"][index], results["distances"][index]
+        )):
+            score = float(relevance_fn(distance))
+            if score < self.score_threshold:
+                continue
+            document = Document(page_content=text, metadata={**(metadata or {}), "score": round(score, 4)})
+            candidates.append((position, chunk_id, document, score))
+
+        if self.use_mmr and len(candidates) > 1:
+            import numpy as np
+            from langchain_core.vectorstores.utils import maximal_marginal_relevance
+
+            embeddings = [results["embeddings"][index][position] for position, _, _, _ in candidates]
+            selected = maximal_marginal_relevance(
+                np.array(query_embedding, dtype="float32"), embeddings, lambda_mult=self.lambda_mult, k=limit
+            )
+            candidates = [candidates[index] for index in selected]
+
+        if self.score_threshold > 0 and len(candidates) < len(results["ids"][index]):
+            logger.debug(f"🔍 Retrieval kept {len(candidates)} chunks with score >= {self.score_threshold}")
+
+        return [(chunk_id, document, score) for _, chunk_id, document, score in candidates]
+
+    def _fuse(
+        self,
+        query_embedding: List[float],
+        vector_hits: List[Tuple[str, Document, float]],
+        lexical_hits: List[Tuple[str, str, Dict[str, Any], float]],
+        limit: int
+    ) -> List[Tuple[Document, float]]:
+        """
+        Reciprocal-rank fusion: sum of 1 / (rrf_k + rank) over both result lists sets the order
+        Lexical-only hits are scored against their stored embedding and dropped under score_threshold
+        (or when they cannot be scored), so metadata["score"] is always the vector relevance
+        """
+        fused: Dict[str, float] = {}
+        documents: Dict[str, Document] = {}
+
+        for rank, (chunk_id, document, score) in enumerate(vector_hits, start=1):
+            fused[chunk_id] = fused.get(chunk_id, 0.0) + 1.0 / (self.rrf_k + rank)
+            documents[chunk_id] = document
+
+        relevance = self._relevance_of(
+            query_embedding, [chunk_id for chunk_id, _, _, _ in lexical_hits if chunk_id not in documents]
+        )
+        for rank, (chunk_id, text, metadata, bm25) in enumerate(lexical_hits, start=1):
+            if chunk_id not in documents:
+                score = relevance.get(chunk_id)
+                if score is None or score < self.score_threshold:
+                    continue
+                documents[chunk_id] = Document(page_content=text, metadata={**metadata, "score": round(score, 4)})
+            fused[chunk_id] = fused.get(chunk_id, 0.0) + 1.0 / (self.rrf_k + rank)
+            documents[chunk_id].metadata["lexical_rank"] = rank
+            documents[chunk_id].metadata["bm25"] = round(bm25, 4)
+
+        # 1.0 = ranked first by both searches
+        best_possible = 2.0 / (self.rrf_k + 1)
+        ranked = sorted(fused.items(), key=lambda item: item[1], reverse=True)[:limit]
+        results = []
+        for chunk_id, value in ranked:
+            document = documents[chunk_id]
+            document.metadata["rrf_score"] = round(value / best_possible, 4)
+            results.append((document, document.metadata["score"]))
+        return results
+
+    def _relevance_of(self, query_embedding: List[float], chunk_ids: List[str]) -> Dict[str, float]:
+        """Relevance (0..1) of chunks the vector search did not return, from their embeddings stored in Chroma"""
+        if not chunk_ids:
+            return {}
+        import numpy as np
+
+        try:
+            stored = self.vectorstore._collection.get(ids=chunk_ids, include=["embeddings"])
+            if stored.get("embeddings") is None or len(stored["embeddings"]) == 0:
+                return {}
+            vectors = np.asarray(stored["embeddings"], dtype="float32")
+            query = np.asarray(query_embedding, dtype="float32")
+            # Same distances as the collection's HNSW space
+            space = (self.vectorstore._collection.metadata or {}).get("hnsw:space", "l2")
+            if space == "cosine":
+                distances = 1.0 - vectors @ query / (np.linalg.norm(vectors, axis=1) * np.linalg.norm(query) + 1e-12)
+            elif space == "ip":
+                distances = 1.0 - vectors @ query
+            else:
+                distances = ((vectors - query) ** 2).sum(axis=1)
+            relevance_fn = self.vectorstore._select_relevance_score_fn()
+            return {chunk_id: float(relevance_fn(float(distance))) for chunk_id, distance in zip(stored["ids"], distances)}
+        except Exception as e:
+            logger.warning(f"⚠️ Could not score lexical-only hits, dropping them: {e}")
+            return {}
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        return [document for document, _ in self.search_with_scores(query)]
@@ -0,0 +1,47 @@
+"""
+Single Flight
+Concurrent calls with the same key share one execution and its result
+"""
+import asyncio
+import logging
+from typing import Dict, Any, Awaitable, Callable, Tuple
+
+logger = logging.getLogger(__name__)
+
+class SingleFlight:
+    """
+    The first caller for a key (leader) starts the work as a task; later callers await the same task
+    The task is shielded, so a disconnected caller never cancels the work the others are waiting for
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, asyncio.Task] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Return (result, shared): shared is True when the result came from another caller's execution"""
+        task = self._calls.get(key)
+        shared = task is not None
+        if shared:
+            self.coalesced += 1
+        else:
+            self.leaders += 1
+            task = asyncio.ensure_future(factory())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(task), shared
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+
+    def get_stats(self) -> Dict[str, Any]:
+        calls = self.leaders + self.coalesced
+        return {
+            "enabled": True,
+            "in_flight": len(self._calls),
+            "executions": self.leaders,
+            "coalesced": self.coalesced,
+            "coalesced_ratio": round(self.coalesced / calls, 4) if calls else None
+        }
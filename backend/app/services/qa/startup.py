@@ -0,0 +1,107 @@
+"""
+Startup Manager
+Runs QA initialization in the background and reports its phase and progress for /ready
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+from app.core.config import config
+
+logger = logging.getLogger(__name__)
+
+class StartupManager:
+    """
+    Phases: pending -> warming_embedding_model -> initializing (QAService.init_phase) -> warming_retrieval -> ready
+    A failed attempt is retried every retry_seconds (typically Ollama not up yet)
+    """
+
+    def __init__(self, retry_seconds: int = 30):
+        self.retry_seconds = retry_seconds
+        self.phase = "pending"
+        self.attempts = 0
+        self.error: Optional[str] = None
+        self.started_at: Optional[str] = None
+        self.ready_at: Optional[str] = None
+        self.startup_seconds: Optional[float] = None
+        self.warmup: Dict[str, Any] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Schedule the background initialization (called from the startup event)"""
+        if self._task is None:
+            self.started_at = datetime.now().isoformat()
+            self._task = asyncio.create_task(self._run())
+
+    def is_ready(self) -> bool:
+        return self.phase == "ready"
+
+    async def _run(self) -> None:
+        from app.services.qa.embedding_provider import embedding_provider
+        from app.services.qa.qa_service import qa_service
+
+        started = time.perf_counter()
+
+        self.phase = "warming_embedding_model"
+        await asyncio.to_thread(embedding_provider.warm_up)
+
+        while True:
+            self.attempts += 1
+            self.phase = "initializing"
+            try:
+                async with qa_service._init_lock:
+                    success = qa_service.qa_chain is not None or await asyncio.to_thread(qa_service.initialize_qa_chain)
+                if success:
+                    self.phase = "warming_retrieval"
+                    try:
+                        self.warmup = await asyncio.to_thread(qa_service.warm_up_retrieval)
+                    except Exception as e:
+                        logger.warning(f"********** ⚠️ RETRIEVAL WARM-UP FAILED: {e} **********")
+                        self.warmup = {"warmed": False, "error": str(e)}
+                    break
+                self.error = f"QA initialization failed during phase '{qa_service.init_phase}'"
+            except Exception as e:
+                self.error = str(e)
+
+            # The catalog is normally filled by the initialization scan: fill it anyway for stats/health
+            from app.services.documents.catalog import document_catalog
+            if not document_catalog.ready:
+                await asyncio.to_thread(document_catalog.rebuild)
+            
+            self.phase = "retrying"
+            logger.warning(
+                f"********** ⚠️ STARTUP ATTEMPT {self.attempts} FAILED: {self.error} - "
+                f"RETRYING IN {self.retry_seconds}s **********"
+            )
+            await asyncio.sleep(self.retry_seconds)
+
+        self.error = None
+        self.phase = "ready"
+        self.ready_at = datetime.now().isoformat()
+        self.startup_seconds = round(time.perf_counter() - started, 2)
+        logger.info(f"********** ✅ BACKEND READY IN {self.startup_seconds}s **********")
+
+    def get_status(self) -> Dict[str, Any]:
+        from app.services.qa.qa_service import qa_service
+
+        status = {
+            "ready": self.is_ready(),
+            "phase": self.phase,
+            "attempts": self.attempts,
+            "started_at": self.started_at,
+            "ready_at": self.ready_at,
+            "startup_seconds": self.startup_seconds,
+            "error": self.error,
+            "timestamp": datetime.now().isoformat()
+        }
+        if self.phase in ("initializing", "retrying"):
+            status["init_phase"] = qa_service.init_phase
+            status["indexing_progress"] = qa_service.pipeline.get_progress()
+        if self.warmup:
+            status["warmup"] = self.warmup
+        return status
+
+# Global instance
+startup_manager = StartupManager(retry_seconds=config.STARTUP_RETRY_SECONDS)
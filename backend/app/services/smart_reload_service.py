@@ -4,8 +4,9 @@ Handles intelligent document reloading with change detection
 """
 import logging
 import asyncio
+import os
 from datetime import datetime
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Tuple
 from app.core.config import config
 
 logger = logging.getLogger(__name__)
@@ -41,35 +42,68 @@ class SmartReloadService:
             logger.error(f"Smart reload failed: {e}")
             raise
     
+    async def scan_changes(self, prune: Optional[bool] = None) -> Tuple[Dict[str, Any], Optional[List[str]]]:
+        """
+        Change scan recorded in the registry
+        prune: skip directories whose mtime is unchanged - by default only while the inotify watcher runs,
+        since in-place edits are only seen there through the directories it invalidates
+        Returns (scan results, paths for qa_service.update_index): the changed, deleted and touched paths
+        relative to DOCUMENTS_DIR, or None after a periodic full verification (the index then compares everything)
+        """
+        from app.services.documents.registry import registry_manager
+        from app.services.documents.scanner import FileScanner
+        from app.services.qa.document_watcher import document_watcher
+        
+        if prune is None:
+            prune = document_watcher.reports_edits()
+        scan_results = await FileScanner().scan_for_changes(prune=prune)
+        changed_files = scan_results.get("changed_files", {})
+        deleted_files = scan_results.get("deleted_files", [])
+        touched_files = scan_results.get("touched_files", {})
+        pruning = scan_results.get("scan_report", {}).get("pruning")
+        
+        # Update registry (directory fingerprints: only the rows that moved are written)
+        await asyncio.to_thread(registry_manager.update_registry, scan_results)
+        
+        if prune and not pruning:
+            return scan_results, None
+        return scan_results, [
+            os.path.relpath(file_path, config.DOCUMENTS_DIR)
+            for file_path in [*changed_files, *deleted_files, *touched_files]
+        ]
+    
+    @staticmethod
+    def scanned_hashes(scan_results: Dict[str, Any]) -> Dict[str, Any]:
+        """Content hashes the change scan computed (absolute path -> size, mtime, content_hash), for update_index"""
+        entries = {**scan_results.get("changed_files", {}), **scan_results.get("touched_files", {})}
+        return {
+            file_path: {key: metadata.get(key) for key in ("size", "mtime", "content_hash")}
+            for file_path, metadata in entries.items()
+            if metadata.get("content_hash")
+        }
+    
     async def _smart_strategy_reload(self) -> Dict[str, Any]:
         """Smart strategy: Only reload changed files"""
         try:
-            from app.services.documents.registry import RegistryManager
-            from app.services.documents.scanner import FileScanner
-            
-            registry_manager = RegistryManager()
-            file_scanner = FileScanner()
-            
-            # Get current registry
-            current_registry = registry_manager.get_current_registry()
-            
-            # Scan for changes
-            scan_results = await file_scanner.scan_for_changes()
+            from app.services.documents.registry import registry_manager
             
-            # Process only changed files
+            scan_results, paths = await self.scan_changes()
             changed_files = scan_results.get("changed_files", {})
             deleted_files = scan_results.get("deleted_files", [])
             
-            # Update registry
-            if changed_files or deleted_files:
-                registry_manager.update_registry(scan_results)
+            # Apply the scan's diff to the vector store: only these paths are re-read (no second walk)
+            from app.services.qa.qa_service import qa_service
+            index_update = await asyncio.to_thread(qa_service.update_index, paths, self.scanned_hashes(scan_results))
             
             return {
                 "strategy": "smart",
                 "files_processed": len(changed_files),
                 "files_changed": list(changed_files.keys()),
                 "files_deleted": deleted_files,
-                "total_files_in_registry": len(current_registry),
+                "files_touched_unchanged": list(scan_results.get("touched_files", {}).keys()),
+                "total_files_in_registry": registry_manager.count(),
+                "scan_report": scan_results.get("scan_report"),
+                "index_update": index_update,
                 "timestamp": datetime.now().isoformat(),
                 "cache_strategy_config": self.cache_strategy
             }
@@ -80,10 +114,9 @@ class SmartReloadService:
     async def _full_strategy_reload(self) -> Dict[str, Any]:
         """Full strategy: Reload all files"""
         try:
-            from app.services.documents.registry import RegistryManager
+            from app.services.documents.registry import registry_manager
             from app.services.documents.scanner import FileScanner
             
-            registry_manager = RegistryManager()
             file_scanner = FileScanner()
             
             # Full scan
@@ -96,6 +129,7 @@ class SmartReloadService:
                 "strategy": "full",
                 "files_processed": len(scan_results.get("all_files", {})),
                 "registry_rebuilt": True,
+                "scan_report": scan_results.get("scan_report"),
                 "timestamp": datetime.now().isoformat(),
                 "cache_strategy_config": self.cache_strategy
             }
@@ -106,19 +140,18 @@ class SmartReloadService:
     async def _incremental_strategy_reload(self) -> Dict[str, Any]:
         """Incremental strategy: Add only new files"""
         try:
-            from app.services.documents.registry import RegistryManager
+            from app.services.documents.registry import registry_manager
             from app.services.documents.scanner import FileScanner
             
-            registry_manager = RegistryManager()
             file_scanner = FileScanner()
             
             # Scan for new files only
             scan_results = await file_scanner.scan_new_files()
             
-            # Add new files to registry
+            # Add new files to registry (one transaction)
             new_files = scan_results.get("new_files", {})
-            for file_path, metadata in new_files.items():
-                registry_manager.add_file(file_path, metadata)
+            if new_files:
+                registry_manager.add_files(new_files)
             
             return {
                 "strategy": "incremental",
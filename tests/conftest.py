@@ -0,0 +1,45 @@
+"""
+Test setup
+Puts backend/ on the import path and redirects the data paths of the config to a temporary directory
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from app.core.config import config  # noqa: E402
+
+# Manual script against a running n8n instance (prompts for a question)
+collect_ignore = ["test_n8n.py"]
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """DATA_DIR, DOCUMENTS_DIR and the registry/cache paths under tmp_path (never /app/shared_data)"""
+    documents_dir = tmp_path / "documents"
+    documents_dir.mkdir()
+    paths = {
+        "DATA_DIR": tmp_path,
+        "DOCUMENTS_DIR": documents_dir,
+        "CHROMA_DB_DIR": tmp_path / "chroma_db",
+        "REGISTRY_FILE": tmp_path / "file_registry.json",
+        "REGISTRY_DB": tmp_path / "file_registry.db",
+        "PROFILES_DIR": tmp_path / "profiles",
+        "EMBEDDING_CACHE_DIR": tmp_path / "embedding_cache",
+        "ANSWER_CACHE_FILE": tmp_path / "answer_cache.sqlite",
+    }
+    for name, value in paths.items():
+        monkeypatch.setattr(config, name, value)
+    monkeypatch.setattr(config, "REGISTRY_AUTO_BACKUP", False)
+    return tmp_path
+
+@pytest.fixture
+def registry(data_dir, monkeypatch):
+    """Fresh RegistryManager on the temporary data dir, installed as the shared registry_manager"""
+    from app.services.documents import registry as registry_module
+
+    manager = registry_module.RegistryManager()
+    monkeypatch.setattr(registry_module, "registry_manager", manager)
+    yield manager
+    manager.close()
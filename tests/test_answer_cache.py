@@ -0,0 +1,90 @@
+"""
+Answer Cache tests
+Exact and semantic lookups, LRU eviction, TTL expiry and index-version scope
+"""
+import pytest
+
+from app.services.qa import answer_cache
+from app.services.qa.answer_cache import AnswerCache, normalize_question
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(answer_cache.time, "time", fake)
+    return fake
+
+def _embed(question):
+    """Questions about the same topic word share a direction"""
+    return [1.0, 0.0] if "mot de passe" in question else [0.0, 1.0]
+
+def _cache(tmp_path, **kwargs):
+    return AnswerCache(tmp_path / "answer_cache.sqlite", **kwargs)
+
+def test_normalize_question():
+    assert normalize_question("  Comment   RESET le mot de passe ?! ") == "comment reset le mot de passe"
+
+def test_exact_hit_after_normalization(tmp_path, clock):
+    cache = _cache(tmp_path)
+    assert cache.lookup("Quelle heure ?", "v1") is None
+
+    cache.store("Quelle heure ?", "v1", {"answer": "midi"})
+    hit = cache.lookup("  quelle   HEURE", "v1")
+
+    assert hit == {"result": {"answer": "midi"}, "match": "exact", "similarity": 1.0}
+    assert cache.get_stats()["hits_exact"] == 1
+    assert cache.get_stats()["misses"] == 1
+
+def test_semantic_hit_above_threshold(tmp_path, clock):
+    cache = _cache(tmp_path, embed_fn=_embed, similarity_threshold=0.9)
+    cache.store("Comment changer mon mot de passe", "v1", {"answer": "Paramètres"})
+
+    hit = cache.lookup("mot de passe oublié", "v1")
+    miss = cache.lookup("horaires du support", "v1")
+
+    assert hit["match"] == "semantic" and hit["result"] == {"answer": "Paramètres"}
+    assert miss is None
+
+def test_least_recently_used_entry_is_evicted(tmp_path, clock):
+    cache = _cache(tmp_path, max_entries=2)
+    cache.store("a", "v1", {"answer": "A"})
+    cache.store("b", "v1", {"answer": "B"})
+    cache.lookup("a", "v1")  # b is now the least recently used
+
+    cache.store("c", "v1", {"answer": "C"})
+
+    assert cache.lookup("b", "v1") is None
+    assert cache.lookup("a", "v1") is not None
+    assert cache.lookup("c", "v1") is not None
+    assert cache.stats["evictions"] == 1
+
+def test_expired_entries_are_dropped(tmp_path, clock):
+    cache = _cache(tmp_path, ttl_seconds=60)
+    cache.store("a", "v1", {"answer": "A"})
+
+    clock.now += 59
+    assert cache.lookup("a", "v1") is not None
+    clock.now += 2
+    assert cache.lookup("a", "v1") is None
+    assert cache.stats["expired"] == 1
+    assert cache.get_stats()["entries"] == 0
+
+def test_new_scope_invalidates_previous_entries(tmp_path, clock):
+    cache = _cache(tmp_path)
+    cache.store("a", "index-v1|llama", {"answer": "A"})
+
+    assert cache.lookup("a", "index-v2|llama") is None
+    assert cache.stats["invalidations"] == 1
+    # The old scope's rows were deleted, not just hidden
+    assert cache.lookup("a", "index-v1|llama") is None
+
+def test_entries_survive_a_restart(tmp_path, clock):
+    _cache(tmp_path).store("a", "v1", {"answer": "A", "sources": ["x.txt"]})
+    hit = _cache(tmp_path).lookup("a", "v1")
+    assert hit["result"] == {"answer": "A", "sources": ["x.txt"]}
@@ -0,0 +1,22 @@
+"""
+Content Hash tests
+"""
+from app.services.documents.content_hash import content_hash, hash_files
+
+def test_hash_depends_on_content_only(tmp_path):
+    first = tmp_path / "a.txt"
+    second = tmp_path / "b.txt"
+    first.write_bytes(b"x" * 100_000)
+    second.write_bytes(b"x" * 100_000)
+
+    assert content_hash(str(first), block_size=4096) == content_hash(str(second))
+    second.write_bytes(b"x" * 99_999 + b"y")
+    assert content_hash(str(first)) != content_hash(str(second))
+
+def test_unreadable_files_hash_to_none(tmp_path):
+    present = tmp_path / "a.txt"
+    present.write_text("a")
+    hashes = hash_files([str(present), str(tmp_path / "missing.txt")], workers=2)
+    assert hashes[str(present)] == content_hash(str(present))
+    assert hashes[str(tmp_path / "missing.txt")] is None
+    assert hash_files([]) == {}
@@ -0,0 +1,91 @@
+"""
+Embedding Cache tests
+Slot reuse, LRU eviction, dimension reset and the CachedEmbeddings wrapper
+"""
+import itertools
+
+import pytest
+
+from app.services.qa import embedding_cache
+from app.services.qa.embedding_cache import CachedEmbeddings, EmbeddingCache
+
+@pytest.fixture(autouse=True)
+def fake_clock(monkeypatch):
+    """Strictly increasing time.time() so last_used never ties"""
+    ticks = itertools.count(1000)
+    monkeypatch.setattr(embedding_cache.time, "time", lambda: float(next(ticks)))
+
+def _cache(tmp_path, max_entries=3, dtype="float32"):
+    return EmbeddingCache(tmp_path / "embedding_cache", "test-model", max_entries=max_entries, dtype=dtype)
+
+def test_put_then_get_and_persist(tmp_path):
+    cache = _cache(tmp_path)
+    cache.put_many(["a", "b"], [[1.0, 2.0], [3.0, 4.0]])
+
+    assert cache.get_many(["a", "b", "c"]) == {"a": [1.0, 2.0], "b": [3.0, 4.0]}
+    assert (cache.hits, cache.misses) == (2, 1)
+
+    reopened = _cache(tmp_path)
+    assert reopened.get_many(["b"]) == {"b": [3.0, 4.0]}
+    assert reopened.get_stats()["entries"] == 2
+
+def test_existing_keys_are_not_rewritten(tmp_path):
+    cache = _cache(tmp_path)
+    cache.put_many(["a"], [[1.0, 2.0]])
+    cache.put_many(["a"], [[9.0, 9.0]])
+    assert cache.get_many(["a"]) == {"a": [1.0, 2.0]}
+    assert cache.get_stats()["entries"] == 1
+
+def test_least_recently_used_slot_is_evicted(tmp_path):
+    cache = _cache(tmp_path, max_entries=3)
+    cache.put_many(["a", "b", "c"], [[1.0, 0.0], [2.0, 0.0], [3.0, 0.0]])
+    cache.get_many(["a"])  # b is now the least recently used
+
+    cache.put_many(["d"], [[4.0, 0.0]])
+
+    assert set(cache.get_many(["a", "b", "c", "d"])) == {"a", "c", "d"}
+    assert cache.get_many(["d"]) == {"d": [4.0, 0.0]}
+    assert cache.evictions == 1
+    assert cache.get_stats()["entries"] == 3
+
+def test_dimension_change_resets_the_cache(tmp_path):
+    cache = _cache(tmp_path)
+    cache.put_many(["a"], [[1.0, 2.0]])
+
+    cache.put_many(["b"], [[1.0, 2.0, 3.0]])
+
+    assert cache.get_many(["a", "b"]) == {"b": [1.0, 2.0, 3.0]}
+    assert cache.get_stats()["dimension"] == 3
+    assert _cache(tmp_path).get_many(["b"]) == {"b": [1.0, 2.0, 3.0]}
+
+def test_layout_change_resets_the_cache(tmp_path):
+    _cache(tmp_path, max_entries=3).put_many(["a"], [[1.0, 2.0]])
+    resized = _cache(tmp_path, max_entries=5)
+    assert resized.get_many(["a"]) == {}
+
+def test_keys_depend_on_the_model(tmp_path):
+    cache = _cache(tmp_path)
+    other = EmbeddingCache(tmp_path / "other", "other-model")
+    assert cache.make_key("text") != other.make_key("text")
+
+class CountingEmbeddings:
+    def __init__(self):
+        self.calls = []
+
+    def embed_documents(self, texts):
+        self.calls.append(list(texts))
+        return [[float(len(text)), 1.0] for text in texts]
+
+    def embed_query(self, text):
+        return [float(len(text)), 0.0]
+
+def test_cached_embeddings_only_embed_missing_texts(tmp_path):
+    model = CountingEmbeddings()
+    embeddings = CachedEmbeddings(model, _cache(tmp_path, max_entries=10))
+
+    first = embeddings.embed_documents(["aa", "bbb", "aa"])
+    second = embeddings.embed_documents(["bbb", "cccc"])
+
+    assert first == [[2.0, 1.0], [3.0, 1.0], [2.0, 1.0]]
+    assert second == [[3.0, 1.0], [4.0, 1.0]]
+    assert model.calls == [["aa", "bbb"], ["cccc"]]
@@ -0,0 +1,132 @@
+"""
+Incremental Indexer tests
+Registry diff and per-file application to the vectorstore
+"""
+from types import SimpleNamespace
+
+from langchain_core.documents import Document
+
+from app.services.qa.indexer import IncrementalIndexer
+
+def _entry(size, mtime, path=None):
+    return {"path": path or f"/docs/{size}-{mtime}", "size": size, "mtime": mtime}
+
+class FakeCollection:
+    def __init__(self):
+        self.deleted = []
+
+    def delete(self, where):
+        self.deleted.append(where["relative_path"]["$in"])
+
+class FakeLexicalIndex:
+    def __init__(self):
+        self.deleted = []
+
+    def delete_files(self, relative_paths, batch_size):
+        self.deleted.extend(relative_paths)
+
+def test_compute_changes_added_modified_deleted():
+    cached = {"same.txt": _entry(10, 1.0), "edited.txt": _entry(10, 1.0), "gone.txt": _entry(5, 1.0)}
+    current = {"same.txt": _entry(10, 1.0), "edited.txt": _entry(12, 2.0), "new.txt": _entry(3, 3.0)}
+
+    changes = IncrementalIndexer.compute_changes(current, cached)
+
+    assert changes == {"added": ["new.txt"], "modified": ["edited.txt"], "deleted": ["gone.txt"], "touched": []}
+    assert IncrementalIndexer.has_changes(changes)
+
+def test_compute_changes_size_only_change_is_modified():
+    changes = IncrementalIndexer.compute_changes({"a.txt": _entry(11, 1.0)}, {"a.txt": _entry(10, 1.0)})
+    assert changes["modified"] == ["a.txt"]
+
+def test_compute_changes_nothing_changed():
+    registry = {"a.txt": _entry(10, 1.0)}
+    changes = IncrementalIndexer.compute_changes(dict(registry), registry)
+    assert not IncrementalIndexer.has_changes(changes)
+
+def test_chunk_ids_are_numbered_per_file():
+    chunks = [
+        Document(page_content="a0", metadata={"relative_path": "a.txt"}),
+        Document(page_content="b0", metadata={"relative_path": "b.txt"}),
+        Document(page_content="a1", metadata={"relative_path": "a.txt"}),
+        Document(page_content="x", metadata={"source": "/docs/x.txt"}),
+    ]
+    assert IncrementalIndexer.chunk_ids(chunks) == ["a.txt::0", "b.txt::0", "a.txt::1", "/docs/x.txt::0"]
+
+def test_apply_changes_deletes_then_indexes_changed_files_only():
+    collection = FakeCollection()
+    vectorstore = SimpleNamespace(_collection=collection)
+    lexical_index = FakeLexicalIndex()
+    registry = {"new.txt": _entry(1, 1.0), "edited.txt": _entry(2, 2.0), "same.txt": _entry(3, 3.0)}
+    indexed = []
+
+    def index_files(store, sub_registry):
+        assert store is vectorstore
+        indexed.append(sub_registry)
+        return {"chunks": 7}
+
+    changes = {"added": ["new.txt"], "modified": ["edited.txt"], "deleted": ["gone.txt"], "touched": []}
+    stats = IncrementalIndexer().apply_changes(vectorstore, changes, registry, index_files, lexical_index)
+
+    assert collection.deleted == [["new.txt", "edited.txt", "gone.txt"]]
+    assert lexical_index.deleted == ["new.txt", "edited.txt", "gone.txt"]
+    assert indexed == [{"new.txt": registry["new.txt"], "edited.txt": registry["edited.txt"]}]
+    assert stats == {"files_added": 1, "files_modified": 1, "files_deleted": 1, "chunks_written": 7}
+
+def test_apply_changes_batches_deletes():
+    collection = FakeCollection()
+    changes = {"added": [], "modified": [], "deleted": [f"{index}.txt" for index in range(5)], "touched": []}
+
+    stats = IncrementalIndexer(delete_batch_size=2).apply_changes(
+        SimpleNamespace(_collection=collection), changes, {}, lambda store, sub_registry: {"chunks": 0}
+    )
+
+    assert [len(batch) for batch in collection.deleted] == [2, 2, 1]
+    assert stats["chunks_written"] == 0
+
+# ===== CONTENT HASHES =====
+
+class FakeHasher:
+    """path -> hash, records which paths were hashed"""
+
+    def __init__(self, hashes):
+        self.hashes = hashes
+        self.hashed = []
+
+    def __call__(self, paths):
+        paths = list(paths)
+        self.hashed.extend(paths)
+        return {path: self.hashes.get(path) for path in paths}
+
+def test_compute_changes_same_content_is_touched_not_modified():
+    cached = {"copy.txt": {**_entry(10, 1.0, "/docs/copy.txt"), "content_hash": "h1"},
+              "edit.txt": {**_entry(10, 1.0, "/docs/edit.txt"), "content_hash": "h2"}}
+    current = {"copy.txt": _entry(10, 5.0, "/docs/copy.txt"), "edit.txt": _entry(10, 5.0, "/docs/edit.txt")}
+    hasher = FakeHasher({"/docs/copy.txt": "h1", "/docs/edit.txt": "h3"})
+
+    changes = IncrementalIndexer.compute_changes(current, cached, hasher)
+
+    assert changes["touched"] == ["copy.txt"]
+    assert changes["modified"] == ["edit.txt"]
+    assert not IncrementalIndexer.has_changes({**changes, "modified": []})
+    assert current["edit.txt"]["content_hash"] == "h3"
+
+def test_compute_changes_hashes_each_changed_file_once():
+    cached = {"same.txt": {**_entry(1, 1.0, "/docs/same.txt"), "content_hash": "h0"},
+              "scanned.txt": {**_entry(2, 1.0, "/docs/scanned.txt"), "content_hash": "h1"}}
+    current = {"same.txt": _entry(1, 1.0, "/docs/same.txt"),
+               "scanned.txt": {**_entry(2, 2.0, "/docs/scanned.txt"), "content_hash": "h1"},
+               "new.txt": _entry(3, 3.0, "/docs/new.txt")}
+    hasher = FakeHasher({"/docs/new.txt": "h2"})
+
+    changes = IncrementalIndexer.compute_changes(current, cached, hasher)
+
+    # Unchanged stat: hash carried over; already hashed by the registry scan: not read again
+    assert hasher.hashed == ["/docs/new.txt"]
+    assert current["same.txt"]["content_hash"] == "h0"
+    assert changes == {"added": ["new.txt"], "modified": [], "deleted": [], "touched": ["scanned.txt"]}
+
+def test_compute_changes_unreadable_file_counts_as_modified():
+    cached = {"a.txt": {**_entry(1, 1.0, "/docs/a.txt"), "content_hash": None}}
+    current = {"a.txt": _entry(1, 2.0, "/docs/a.txt")}
+    changes = IncrementalIndexer.compute_changes(current, cached, FakeHasher({}))
+    assert changes["modified"] == ["a.txt"]
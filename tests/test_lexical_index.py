@@ -0,0 +1,86 @@
+"""
+Lexical Index tests
+FTS5 search, replace, per-file delete and common-term pruning
+"""
+import pytest
+
+from app.services.qa.lexical_index import LexicalIndex
+
+@pytest.fixture
+def index(tmp_path):
+    lexical_index = LexicalIndex(tmp_path / "lexical.sqlite")
+    yield lexical_index
+    lexical_index.close()
+
+def _add(index, chunks):
+    """chunks: {chunk_id: (relative_path, text)}"""
+    index.add(
+        list(chunks),
+        [text for _, text in chunks.values()],
+        [{"relative_path": relative_path, "source": f"/docs/{relative_path}"} for relative_path, _ in chunks.values()]
+    )
+
+def test_search_finds_exact_tokens(index):
+    _add(index, {
+        "a.txt::0": ("a.txt", "Erreur ERR_4012 lors de la synchronisation"),
+        "b.txt::0": ("b.txt", "Procédure de synchronisation des comptes"),
+    })
+
+    hits = index.search("ERR_4012")
+
+    assert [chunk_id for chunk_id, _, _, _ in hits] == ["a.txt::0"]
+    chunk_id, content, metadata, bm25 = hits[0]
+    assert content.startswith("Erreur ERR_4012")
+    assert metadata == {"relative_path": "a.txt", "source": "/docs/a.txt"}
+    assert bm25 > 0
+
+def test_search_ors_terms_best_first(index):
+    _add(index, {
+        "a.txt::0": ("a.txt", "ticket freshdesk"),
+        "b.txt::0": ("b.txt", "ticket freshdesk priorité haute"),
+        "c.txt::0": ("c.txt", "sans rapport"),
+    })
+
+    hits = [chunk_id for chunk_id, _, _, _ in index.search("priorité freshdesk")]
+
+    assert hits[0] == "b.txt::0"
+    assert set(hits) == {"a.txt::0", "b.txt::0"}
+
+def test_search_without_usable_terms(index):
+    _add(index, {"a.txt::0": ("a.txt", "texte")})
+    assert index.search("? a !") == []
+
+def test_add_replaces_chunks_with_the_same_id(index):
+    _add(index, {"a.txt::0": ("a.txt", "ancienne version")})
+    _add(index, {"a.txt::0": ("a.txt", "nouvelle version")})
+
+    assert index.count() == 1
+    assert index.search("ancienne") == []
+    assert [hit[0] for hit in index.search("nouvelle")] == ["a.txt::0"]
+
+def test_delete_files_removes_every_chunk_of_the_file(index):
+    _add(index, {
+        "a.txt::0": ("a.txt", "clé alpha"),
+        "a.txt::1": ("a.txt", "clé beta"),
+        "b.txt::0": ("b.txt", "clé gamma"),
+    })
+
+    index.delete_files(["a.txt"], batch_size=1)
+
+    assert index.count() == 1
+    assert [hit[0] for hit in index.search("clé")] == ["b.txt::0"]
+
+def test_clear(index):
+    _add(index, {"a.txt::0": ("a.txt", "texte")})
+    index.clear()
+    assert index.count() == 0
+    assert index.search("texte") == []
+
+def test_common_terms_are_dropped_from_queries(index):
+    chunks = {f"doc{number}.txt::0": (f"doc{number}.txt", f"procédure standard {number}") for number in range(60)}
+    chunks["rare.txt::0"] = ("rare.txt", "procédure standard ERR_42")
+    _add(index, chunks)
+
+    assert index.refresh_common_terms() == 2
+    assert [hit[0] for hit in index.search("procédure ERR_42")] == ["rare.txt::0"]
+    assert index.search("procédure standard") == []
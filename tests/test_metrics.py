@@ -0,0 +1,81 @@
+"""
+Metrics tests
+Prometheus text exposition of counters, gauges, histograms and collectors
+"""
+import math
+
+import pytest
+
+from app.services.metrics import Counter, Gauge, Histogram, MetricsRegistry, _format_value
+
+def test_format_value():
+    assert [_format_value(value) for value in (3, 2.0, 0.25, True, False, math.inf)] == ["3", "2", "0.25", "1", "0", "+Inf"]
+
+def test_counter_without_labels_starts_at_zero():
+    counter = Counter("jobs_total", "Jobs done")
+    assert counter.render() == ["# HELP jobs_total Jobs done", "# TYPE jobs_total counter", "jobs_total 0"]
+    counter.inc()
+    counter.inc(2)
+    assert counter.render()[-1] == "jobs_total 3"
+
+def test_labels_are_escaped_and_checked():
+    counter = Counter("questions_total", "Questions", ["endpoint", "result"])
+    counter.inc(endpoint="/ask", result='said "hi"\\\n')
+    assert counter.render()[-1] == 'questions_total{endpoint="/ask",result="said \\"hi\\"\\\\\\n"} 1'
+    with pytest.raises(ValueError):
+        counter.inc(endpoint="/ask")
+
+def test_gauge_set_inc_dec():
+    gauge = Gauge("in_flight", "Requests in flight")
+    gauge.inc()
+    gauge.inc()
+    gauge.dec()
+    assert gauge.render()[1:] == ["# TYPE in_flight gauge", "in_flight 1"]
+    gauge.set(7.5)
+    assert gauge.render()[-1] == "in_flight 7.5"
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("stage_seconds", "Stage duration", ["stage"], buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 3.0):
+        histogram.observe(value, stage="retrieval")
+
+    assert histogram.render()[2:] == [
+        'stage_seconds_bucket{stage="retrieval",le="0.1"} 1',
+        'stage_seconds_bucket{stage="retrieval",le="1"} 3',
+        'stage_seconds_bucket{stage="retrieval",le="+Inf"} 4',
+        'stage_seconds_sum{stage="retrieval"} 4.25',
+        'stage_seconds_count{stage="retrieval"} 4',
+    ]
+
+def test_registry_renders_metrics_and_collectors():
+    registry = MetricsRegistry()
+
+    def collector():
+        yield "rag_documents", "gauge", "Documents", [({"state": "on_disk"}, 12), ({"state": "indexed"}, None)]
+
+    def broken_collector():
+        raise RuntimeError("service not started")
+
+    registry.register_collector(broken_collector)
+    registry.register_collector(collector)
+    registry.questions.inc(endpoint="/ask", result="ok")
+    text = registry.render()
+
+    assert text.endswith("\n")
+    assert 'rag_questions_total{endpoint="/ask",result="ok"} 1\n' in text
+    assert "# TYPE rag_stage_duration_seconds histogram\n" in text
+    # A failing collector is skipped, None samples are left out
+    assert '# TYPE rag_documents gauge\nrag_documents{state="on_disk"} 12\n' in text
+    assert 'state="indexed"' not in text
+
+def test_stage_records_duration_and_timings():
+    registry = MetricsRegistry()
+    timings = {}
+
+    with registry.stage("retrieval", timings):
+        pass
+    with registry.stage("retrieval", timings):
+        pass
+
+    assert timings["retrieval"] >= 0
+    assert 'rag_stage_duration_seconds_count{stage="retrieval"} 2' in registry.render()
@@ -0,0 +1,125 @@
+"""
+Registry tests
+SQLite registry: SQL diff, batched updates, directory fingerprints and migrations
+"""
+import json
+import os
+
+from app.services.documents.registry import RegistryManager
+
+def _meta(size, mtime_ns, **extra):
+    return {"size": size, "mtime_ns": mtime_ns, "modified": f"iso-{mtime_ns}", **extra}
+
+def _path(name):
+    return os.path.join("/docs", name)
+
+def test_diff_new_modified_deleted(registry):
+    registry.add_files({_path("same.txt"): _meta(1, 10), _path("size.txt"): _meta(1, 10),
+                        _path("mtime.txt"): _meta(1, 10), _path("gone.txt"): _meta(1, 10)})
+
+    diff = registry.diff({_path("same.txt"): _meta(1, 10), _path("size.txt"): _meta(2, 10),
+                          _path("mtime.txt"): _meta(1, 11), _path("new.txt"): _meta(1, 10)})
+
+    assert diff == {"new": [_path("new.txt")], "modified": sorted([_path("size.txt"), _path("mtime.txt")]),
+                    "deleted": [_path("gone.txt")]}
+
+def test_diff_falls_back_to_iso_modified_for_old_entries(registry):
+    registry.add_files({_path("old.txt"): {"size": 1, "modified": "2024-01-01T00:00:00"}})
+    unchanged = registry.diff({_path("old.txt"): {"size": 1, "mtime_ns": 5, "modified": "2024-01-01T00:00:00"}})
+    changed = registry.diff({_path("old.txt"): {"size": 1, "mtime_ns": 5, "modified": "2024-02-01T00:00:00"}})
+    assert unchanged["modified"] == [] and changed["modified"] == [_path("old.txt")]
+
+def test_update_registry_upserts_and_deletes(registry):
+    registry.add_files({_path("a.txt"): _meta(1, 10), _path("b.txt"): _meta(1, 10)})
+
+    assert registry.update_registry({
+        "changed_files": {_path("a.txt"): _meta(2, 20, content_hash="h2"), _path("c.txt"): _meta(3, 30)},
+        "touched_files": {_path("d.txt"): _meta(4, 40)},
+        "deleted_files": [_path("b.txt")]
+    })
+
+    entries = registry.get_current_registry()
+    assert sorted(path for path in entries if not path.startswith("_")) == [_path(name) for name in ("a.txt", "c.txt", "d.txt")]
+    assert entries[_path("a.txt")]["content_hash"] == "h2"
+    assert registry.get_files_in_directories(["/docs"]).keys() == {_path("a.txt"), _path("c.txt"), _path("d.txt")}
+    assert registry.get_entries([_path("c.txt"), _path("missing.txt")]) == {_path("c.txt"): _meta(3, 30)}
+
+def test_directory_fingerprints_are_stored_per_row(registry):
+    fingerprints = {
+        "/docs": {"mtime_ns": 1, "files": 2, "subdirs": ["b", "a"]},
+        "/docs/a": {"mtime_ns": 2, "files": 0, "subdirs": []},
+        "/docs/b": {"mtime_ns": 3, "files": 1, "subdirs": []},
+    }
+    registry.update_registry({"directories": fingerprints, "scan_report": {"pruning": False}})
+    assert registry.get_directories()["/docs"] == {"mtime_ns": 1, "files": 2, "subdirs": ["a", "b"]}
+
+    # Only the rows that differ are written; directories gone from the scan are removed
+    fingerprints = {"/docs": {"mtime_ns": 1, "files": 2, "subdirs": ["a", "b"]}, "/docs/a": {"mtime_ns": 9, "files": 1, "subdirs": []}}
+    with registry._lock:
+        registry._open()
+        with registry._db:
+            assert registry._write_directories(fingerprints) == 2
+    assert registry.get_directories() == {
+        "/docs": {"mtime_ns": 1, "files": 2, "subdirs": ["a", "b"]},
+        "/docs/a": {"mtime_ns": 9, "files": 1, "subdirs": []},
+    }
+    assert registry.get_current_registry()["_directories"] == registry.get_directories()
+    assert "full_verified_at" in registry.get_meta("_scan")
+
+def test_invalidate_directories_only_touches_the_given_rows(registry):
+    registry.update_registry({"directories": {"/docs": {"mtime_ns": 1, "files": 0, "subdirs": ["a"]},
+                                              "/docs/a": {"mtime_ns": 2, "files": 0, "subdirs": []}}})
+
+    assert registry.invalidate_directories(["/docs/a", "/docs/unknown"]) == 1
+
+    directories = registry.get_directories()
+    assert directories["/docs/a"]["mtime_ns"] is None
+    assert directories["/docs"]["mtime_ns"] == 1
+
+def test_rebuild_replaces_everything(registry):
+    registry.add_files({_path("old.txt"): _meta(1, 10)})
+    registry.rebuild_registry({"all_files": {_path("new.txt"): _meta(1, 10)},
+                               "directories": {"/docs": {"mtime_ns": 1, "files": 1, "subdirs": []}}})
+    assert registry.count() == 1
+    assert registry.get_entries([_path("new.txt")])
+    assert list(registry.get_directories()) == ["/docs"]
+
+def test_stats_before_and_after_the_first_write(registry):
+    stats = registry.get_stats()
+    assert (stats["total_files"], stats["registry_exists"]) == (0, False)
+    assert not registry.db_path.exists()
+
+    registry.add_file(_path("a.txt"), _meta(1, 10))
+    stats = registry.get_stats()
+    assert (stats["total_files"], stats["registry_exists"]) == (1, True)
+    assert stats["registry_size_bytes"] > 0
+
+def test_legacy_json_registry_is_migrated(data_dir):
+    legacy = data_dir / "file_registry.json"
+    legacy.write_text(json.dumps({
+        _path("a.txt"): _meta(1, 10),
+        "_directories": {"/docs": {"mtime_ns": 1, "files": 1, "subdirs": []}},
+        "_metadata": {"last_updated": "2024-01-01T00:00:00"}
+    }), encoding="utf-8")
+
+    manager = RegistryManager()
+    try:
+        assert manager.count() == 1
+        assert manager.get_directories() == {"/docs": {"mtime_ns": 1, "files": 1, "subdirs": []}}
+        assert not legacy.exists() and legacy.with_suffix(".json.migrated").exists()
+    finally:
+        manager.close()
+
+def test_directories_meta_blob_is_moved_to_its_table(registry):
+    with registry._lock:
+        registry._open()
+        with registry._db:
+            registry._set_meta("_directories", {"/docs": {"mtime_ns": 1, "files": 0, "subdirs": []}})
+    registry.close()
+
+    reopened = RegistryManager()
+    try:
+        assert reopened.get_directories() == {"/docs": {"mtime_ns": 1, "files": 0, "subdirs": []}}
+        assert reopened.get_meta("_directories") is None
+    finally:
+        reopened.close()
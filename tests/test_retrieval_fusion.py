@@ -0,0 +1,78 @@
+"""
+Hybrid retrieval tests
+Reciprocal-rank fusion of vector and BM25 hits (ScoredRetriever._fuse)
+"""
+import pytest
+from langchain_core.documents import Document
+
+from app.services.qa.retrieval import ScoredRetriever
+
+class FakeCollection:
+    """Stored embeddings for the lexical-only hits, cosine space"""
+    metadata = {"hnsw:space": "cosine"}
+
+    def __init__(self, embeddings):
+        self.embeddings = embeddings
+
+    def get(self, ids, include):
+        known = [chunk_id for chunk_id in ids if chunk_id in self.embeddings]
+        return {"ids": known, "embeddings": [self.embeddings[chunk_id] for chunk_id in known]}
+
+class FakeVectorStore:
+    def __init__(self, embeddings):
+        self._collection = FakeCollection(embeddings)
+
+    @staticmethod
+    def _select_relevance_score_fn():
+        return lambda distance: 1.0 - distance
+
+def _retriever(embeddings=None, **kwargs):
+    return ScoredRetriever(vectorstore=FakeVectorStore(embeddings or {}), **kwargs)
+
+def _vector_hit(chunk_id, score):
+    return chunk_id, Document(page_content=chunk_id, metadata={"relative_path": chunk_id, "score": score}), score
+
+def _lexical_hit(chunk_id, bm25):
+    return chunk_id, f"text of {chunk_id}", {"relative_path": chunk_id}, bm25
+
+QUERY = [1.0, 0.0]
+
+def test_hits_found_by_both_searches_rank_first():
+    retriever = _retriever({"b": [1.0, 0.0]})
+    vector_hits = [_vector_hit("a", 0.9), _vector_hit("b", 0.8)]
+    lexical_hits = [_lexical_hit("b", 12.0)]
+
+    fused = retriever._fuse(QUERY, vector_hits, lexical_hits, limit=5)
+
+    assert [document.page_content for document, _ in fused] == ["b", "a"]
+    best = fused[0][0]
+    assert fused[0][1] == 0.8  # returned score stays the vector relevance
+    assert best.metadata["lexical_rank"] == 1
+    assert best.metadata["bm25"] == 12.0
+    # Second by vector and first by BM25, against first by both
+    assert best.metadata["rrf_score"] == pytest.approx((1 / 62 + 1 / 61) / (2 / 61), abs=1e-4)
+
+def test_lexical_only_hits_are_scored_from_their_stored_embedding():
+    retriever = _retriever({"close": [1.0, 0.0], "far": [0.0, 1.0]}, score_threshold=0.5)
+    lexical_hits = [_lexical_hit("far", 9.0), _lexical_hit("close", 5.0), _lexical_hit("unknown", 3.0)]
+
+    fused = retriever._fuse(QUERY, [], lexical_hits, limit=5)
+
+    # "far" scores 0 (orthogonal) and "unknown" has no stored embedding: both dropped
+    assert len(fused) == 1
+    document, score = fused[0]
+    assert document.page_content == "text of close"
+    assert score == pytest.approx(1.0, abs=1e-4)
+    assert document.metadata["score"] == score
+    assert document.metadata["lexical_rank"] == 2
+
+def test_limit_and_order_follow_the_fused_rank():
+    retriever = _retriever()
+    vector_hits = [_vector_hit(chunk_id, 0.9 - index / 10) for index, chunk_id in enumerate("abcd")]
+
+    fused = retriever._fuse(QUERY, vector_hits, [], limit=2)
+
+    assert [document.page_content for document, _ in fused] == ["a", "b"]
+    assert [document.metadata["rrf_score"] for document, _ in fused] == [
+        pytest.approx(0.5, abs=1e-4), pytest.approx((1 / 62) / (2 / 61), abs=1e-4)
+    ]
@@ -0,0 +1,153 @@
+"""
+File Scanner tests
+Stat-only parallel walk, registry change detection and directory pruning
+"""
+import asyncio
+import os
+import time
+
+import pytest
+
+from app.core.config import config
+from app.services.documents.scanner import FileScanner
+
+def _write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+@pytest.fixture
+def documents(data_dir):
+    documents_dir = data_dir / "documents"
+    _write(documents_dir / "a.txt", "alpha\nbeta")
+    _write(documents_dir / "sub" / "b.md", "# titre")
+    _write(documents_dir / "sub" / "deep" / "c.pptx", "slides")
+    _write(documents_dir / "sub" / "image.png", "12345")
+    return documents_dir
+
+def test_scan_files_walks_the_tree(documents):
+    files, directories, report = FileScanner().scan_files()
+
+    assert {metadata["relative_path"] for metadata in files.values()} == {
+        "a.txt", os.path.join("sub", "b.md"), os.path.join("sub", "deep", "c.pptx")
+    }
+    entry = files[str(documents / "a.txt")]
+    assert entry["size"] == 10
+    assert entry["mtime_ns"] == os.stat(documents / "a.txt").st_mtime_ns
+    assert entry["extension"] == ".txt"
+    assert set(directories) == {str(documents), str(documents / "sub"), str(documents / "sub" / "deep")}
+    assert directories[str(documents / "sub")]["files"] == 1
+    assert directories[str(documents / "sub")]["subdirs"] == ["deep"]
+    assert (report["files_total"], report["other_files"], report["other_size_bytes"]) == (3, 1, 5)
+    assert not report["pruning"]
+
+def test_scan_files_without_documents_dir(data_dir):
+    (data_dir / "documents").rmdir()
+    files, directories, report = FileScanner().scan_files()
+    assert (files, directories, report["files_total"]) == ({}, {}, 0)
+
+def test_scan_for_changes_against_the_registry(documents, registry):
+    scanner = FileScanner()
+
+    first = asyncio.run(scanner.scan_for_changes())
+    assert len(first["changed_files"]) == 3
+    assert first["changed_files"][str(documents / "a.txt")]["line_count"] == 2
+    assert registry.update_registry(first)
+
+    assert asyncio.run(scanner.scan_for_changes())["changed_files"] == {}
+
+    _write(documents / "a.txt", "alpha\nbeta\ngamma")
+    os.remove(documents / "sub" / "b.md")
+    _write(documents / "new.json", '{"key": 1}')
+    changes = asyncio.run(scanner.scan_for_changes())
+
+    assert set(changes["changed_files"]) == {str(documents / "a.txt"), str(documents / "new.json")}
+    assert changes["changed_files"][str(documents / "new.json")]["json_keys"] == ["key"]
+    assert changes["deleted_files"] == [str(documents / "sub" / "b.md")]
+
+# ===== DIRECTORY PRUNING =====
+
+def _settle(documents_dir):
+    """Move directory mtimes out of the racy window, so their fingerprints can be used for pruning"""
+    past = time.time_ns() - 3600 * 10**9
+    for root, _, _ in os.walk(documents_dir):
+        os.utime(root, ns=(past, past))
+
+def _scan(scanner, prune=True):
+    return asyncio.run(scanner.scan_for_changes(prune=prune))
+
+@pytest.fixture
+def indexed(documents, registry):
+    """Documents scanned once and recorded in the registry, fingerprints trusted"""
+    _settle(documents)
+    scanner = FileScanner()
+    first = _scan(scanner)
+    assert not first["scan_report"]["pruning"]
+    assert registry.update_registry(first)
+    return scanner
+
+def test_unchanged_directories_are_pruned(documents, indexed):
+    changes = _scan(indexed)
+
+    report = changes["scan_report"]
+    assert report["pruning"]
+    assert (report["directories_total"], report["directories_skipped"]) == (3, 3)
+    assert (report["files_total"], report["files_skipped"], report["files_visited"]) == (3, 3, 0)
+    assert changes["changed_files"] == {} and changes["deleted_files"] == []
+
+def test_only_changed_directories_are_listed(documents, indexed):
+    new_file = _write(documents / "sub" / "new.txt", "nouveau")
+
+    changes = _scan(indexed)
+
+    assert list(changes["changed_files"]) == [new_file]
+    assert (changes["scan_report"]["directories_visited"], changes["scan_report"]["directories_skipped"]) == (1, 2)
+    assert changes["total_current_files"] == 4
+
+def test_in_place_edit_needs_an_unpruned_scan_or_an_invalidation(documents, indexed, registry):
+    edited = _write(documents / "a.txt", "alpha\nbeta\ngamma")
+
+    # The directory mtime did not move: a pruned scan cannot see the edit
+    assert _scan(indexed)["changed_files"] == {}
+    # Poll mode scans without pruning
+    assert list(_scan(indexed, prune=False)["changed_files"]) == [edited]
+    # The inotify watcher invalidates the directory it saw change
+    assert registry.invalidate_directories([str(documents), str(documents)]) == 1
+    assert registry.invalidate_directories([str(documents)]) == 0
+    assert list(_scan(indexed)["changed_files"]) == [edited]
+
+def test_file_count_mismatch_lists_the_directory(documents, indexed, registry):
+    missing = str(documents / "sub" / "b.md")
+    registry.remove_file(missing)
+
+    changes = _scan(indexed)
+
+    assert list(changes["changed_files"]) == [missing]
+    assert changes["scan_report"]["directories_skipped"] == 2
+
+def test_full_verification_due_disables_pruning(documents, registry, monkeypatch):
+    monkeypatch.setattr(config, "SCAN_FULL_VERIFY_SECONDS", -1)
+    _settle(documents)
+    scanner = FileScanner()
+    registry.update_registry(_scan(scanner))
+
+    assert not _scan(scanner)["scan_report"]["pruning"]
+
+def test_pruning_switch(documents, indexed, monkeypatch):
+    monkeypatch.setattr(config, "SCAN_PRUNE_DIRECTORIES", False)
+    assert not _scan(FileScanner())["scan_report"]["pruning"]
+    assert not _scan(indexed, prune=False)["scan_report"]["pruning"]
+
+# ===== CONTENT HASHES =====
+
+def test_rewrite_with_identical_content_is_touched(documents, registry):
+    scanner = FileScanner()
+    registry.update_registry(asyncio.run(scanner.scan_for_changes()))
+
+    path = documents / "a.txt"
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 5_000_000_000))
+    changes = asyncio.run(scanner.scan_for_changes())
+
+    assert changes["changed_files"] == {}
+    assert list(changes["touched_files"]) == [str(path)]
@@ -0,0 +1,89 @@
+"""
+Single Flight tests
+Identical in-flight calls share one execution
+"""
+import asyncio
+
+import pytest
+
+from app.services.qa.single_flight import SingleFlight
+
+def test_concurrent_calls_share_one_execution():
+    async def scenario():
+        flight = SingleFlight()
+        release = asyncio.Event()
+        executions = []
+
+        async def work():
+            executions.append(1)
+            await release.wait()
+            return "answer"
+
+        callers = [asyncio.ensure_future(flight.do("q", work)) for _ in range(3)]
+        await asyncio.sleep(0)
+        assert flight.get_stats()["in_flight"] == 1
+        release.set()
+        return flight, executions, await asyncio.gather(*callers)
+
+    flight, executions, results = asyncio.run(scenario())
+
+    assert executions == [1]
+    assert results == [("answer", False), ("answer", True), ("answer", True)]
+    assert flight.get_stats() == {
+        "enabled": True, "in_flight": 0, "executions": 1, "coalesced": 2, "coalesced_ratio": round(2 / 3, 4)
+    }
+
+def test_sequential_and_distinct_keys_execute_separately():
+    async def scenario():
+        flight = SingleFlight()
+        calls = []
+
+        async def work(key):
+            calls.append(key)
+            return key.upper()
+
+        first = await flight.do("a", lambda: work("a"))
+        second = await flight.do("a", lambda: work("a"))
+        other = await flight.do("b", lambda: work("b"))
+        return calls, [first, second, other]
+
+    calls, results = asyncio.run(scenario())
+
+    assert calls == ["a", "a", "b"]
+    assert results == [("A", False), ("A", False), ("B", False)]
+
+def test_cancelled_caller_does_not_cancel_the_shared_work():
+    async def scenario():
+        flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def work():
+            await release.wait()
+            return 42
+
+        leader = asyncio.ensure_future(flight.do("q", work))
+        follower = asyncio.ensure_future(flight.do("q", work))
+        await asyncio.sleep(0)
+        leader.cancel()
+        release.set()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(scenario()) == (42, True)
+
+def test_errors_reach_every_caller_and_are_not_kept():
+    async def scenario():
+        flight = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0)
+            raise RuntimeError("ollama down")
+
+        results = await asyncio.gather(flight.do("q", fail), flight.do("q", fail), return_exceptions=True)
+        return flight, results
+
+    flight, results = asyncio.run(scenario())
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert flight.get_stats()["in_flight"] == 0
@@ -0,0 +1,36 @@
+"""
+Server-Sent Events framing tests (POST /ask/stream)
+"""
+import json
+
+from app.api.endpoints.ask.stream import format_sse
+
+def _parse(stream: str):
+    """Split an SSE body into (event, data) pairs the way an EventSource client does"""
+    events = []
+    for block in stream.split("\n\n"):
+        if not block:
+            continue
+        fields = dict(line.split(": ", 1) for line in block.split("\n"))
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+def test_one_event_per_block():
+    frame = format_sse("token", "Bonjour")
+    assert frame == 'event: token\ndata: "Bonjour"\n\n'
+
+def test_multiline_and_unicode_data_stay_on_one_data_line():
+    frame = format_sse("token", "ligne 1\nligne 2 – é")
+    assert frame.count("\n") == 3
+    assert "é" in frame
+    assert _parse(frame) == [("token", "ligne 1\nligne 2 – é")]
+
+def test_stream_round_trip():
+    events = [
+        ("sources", [{"source": "a.txt", "score": 0.9}]),
+        ("token", "Hel"),
+        ("token", "lo\n\n"),
+        ("done", {"timings": {"generation": 1.5}, "cached": False}),
+    ]
+    stream = "".join(format_sse(event, data) for event, data in events)
+    assert _parse(stream) == events
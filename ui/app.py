@@ -1,4 +1,5 @@
 import os
+import json
 import streamlit as st
 import requests
 import time
@@ -17,45 +18,74 @@ if "history" not in st.session_state:
 question = st.text_input("Posez votre question technique ici :", "")
 
 
+# ✅ LECTURE DU FLUX SSE
+def iter_sse_events(response):
+    """Parse un flux Server-Sent Events en tuples (event, data)"""
+    event, data_lines = "message", []
+    for line in response.iter_lines(decode_unicode=True):
+        if line is None:
+            continue
+        if line == "":
+            if data_lines:
+                yield event, json.loads("\n".join(data_lines))
+            event, data_lines = "message", []
+        elif line.startswith("event:"):
+            event = line[len("event:"):].strip()
+        elif line.startswith("data:"):
+            data_lines.append(line[len("data:"):].strip())
+
+
 # ✅ BOUTON PRINCIPAL POUR QUESTIONS
 if st.button("🤖 ask RAG") and question:
-    with st.spinner("Traitement en cours..."):
-        progress = st.progress(0)
-        log = st.empty()
-        try:
-            st.info(f"Envoi vers RAG: {BACKEND_URL}/ask")
-             
-            for i in range(5):
-                time.sleep(0.3)
-                progress.progress((i + 1) * 20)
-                log.text(f"Étape {i+1}/5 : traitement en cours...")
-
-            # ✅ Appel au backend RAG
-            response = requests.post(
-                f"{BACKEND_URL}/ask", 
-                json={"question": question}, 
-                timeout=120
-            )
-
-            st.write(f"**Status Code:** {response.status_code}")
-
-            if response.status_code == 200:
-                data = response.json()
-                answer = data.get("answer", "Pas de réponse reçue")
-                st.session_state.history.append((question, f"[RAG] {answer}"))
-                st.success("✅ Réponse reçue du RAG")
-                st.write(f"**Réponse complète:** {answer}")
-            else:
+    status = st.empty()
+    sources_box = st.empty()
+    answer_box = st.empty()
+    try:
+        status.info(f"Envoi vers RAG: {BACKEND_URL}/ask/stream")
+
+        # ✅ Appel au backend RAG en streaming
+        with requests.post(
+            f"{BACKEND_URL}/ask/stream",
+            json={"question": question},
+            stream=True,
+            timeout=(10, 600)
+        ) as response:
+
+            if response.status_code == 503:
+                phase = response.json().get("phase", "starting")
+                st.warning(f"⏳ Backend en cours de démarrage ({phase}) - réessayez dans {response.headers.get('Retry-After', '10')}s")
+            elif response.status_code != 200:
                 st.error(f"❌ Erreur RAG: {response.status_code}")
                 st.error(f"**Response:** {response.text}")
-    
-        except Exception as e:
-            st.error(f"❌ Erreur RAG: {str(e)}")
-            import traceback
-            st.code(traceback.format_exc())
-        finally:
-            progress.empty()
-            log.empty()
+            else:
+                answer = ""
+                status.info("🔍 Recherche des documents...")
+                for event, data in iter_sse_events(response):
+                    if event == "sources":
+                        status.info("✍️ Génération de la réponse...")
+                        if data:
+                            sources_box.markdown("**📚 Sources:** " + ", ".join(
+                                f"{source['document']} ({source['score']:.2f})" for source in data
+                            ))
+                    elif event == "token":
+                        answer += data
+                        answer_box.markdown(f"**Réponse:** {answer}▌")
+                    elif event == "done":
+                        answer_box.markdown(f"**Réponse complète:** {answer}")
+                        status.success(
+                            f"✅ Réponse reçue du RAG - premier token: {data.get('time_to_first_token_seconds')}s, "
+                            f"total: {data.get('total_seconds')}s"
+                        )
+                    elif event == "error":
+                        status.error(f"❌ Erreur RAG: {data.get('error')}")
+
+                if answer:
+                    st.session_state.history.append((question, f"[RAG] {answer}"))
+
+    except Exception as e:
+        st.error(f"❌ Erreur RAG: {str(e)}")
+        import traceback
+        st.code(traceback.format_exc())
 
 # ✅ BOUTON OPTIONNEL POUR N8N
 if st.button("send to n8n") and question:
@@ -236,7 +266,7 @@ with col4:
 with col2:
     if st.button("🤖 Test Ollama Direct"):
         try:
-            test_response = requests.post(f"{BACKEND_URL}/test-simple", timeout=30)
+            test_response = requests.post(f"{BACKEND_URL}/test-simple", params={"deep": "true"}, timeout=120)
             if test_response.status_code == 200:
                 test_data = test_response.json()
                 if test_data["status"] == "ok":